@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Background alert delivery for the scheduler watchdog
+Alerts are queued per channel and sent by worker threads, so a slow or hung
+SMTP server / webhook never blocks health checking. Repeats of the same alert
+are deduplicated, bursts are batched into digests, and each channel is rate
+limited with its own token bucket.
+"""
+import json
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Alert:
+    """A single alert waiting for delivery"""
+    subject: str
+    message: str
+    fingerprint: str = ""
+    created: float = field(default_factory=time.time)
+    attempts: int = 0
+    count: int = 1  # number of raised alerts this one stands for (digests > 1)
+
+
+def build_digest(alerts: list[Alert]) -> Alert:
+    """Collapse alerts raised within one batch window into a single alert"""
+    if len(alerts) == 1:
+        return alerts[0]
+    
+    subjects = list(dict.fromkeys(a.subject for a in alerts))
+    sections = [
+        f"[{datetime.fromtimestamp(a.created).isoformat(timespec='seconds')}] {a.subject}\n{a.message}"
+        for a in alerts
+    ]
+    return Alert(
+        subject=f"{len(alerts)} alerts: {', '.join(subjects)}",
+        message="\n\n".join(sections),
+        fingerprint="digest",
+        created=min(a.created for a in alerts),
+        count=len(alerts),
+    )
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst`"""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """Take a token, returning how long to wait before it may be used"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+@dataclass
+class ChannelStats:
+    """Delivery counters for one channel"""
+    delivered: int = 0
+    failed_attempts: int = 0
+    dead_lettered: int = 0
+    dropped: int = 0
+    rate_limited: int = 0
+    last_latency: float = 0.0
+    max_latency: float = 0.0
+    total_latency: float = 0.0
+
+    def record_delivery(self, latency: float):
+        self.delivered += 1
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+
+
+class AlertChannel:
+    """A bounded queue plus the worker threads that drain it"""
+
+    def __init__(self, name: str, send: Callable[[Alert], None], max_queue: int,
+                 bucket: Optional[TokenBucket] = None):
+        self.name = name
+        self.send = send
+        self.bucket = bucket
+        self.queue: "queue.Queue[Optional[Alert]]" = queue.Queue(maxsize=max_queue)
+        self.stats = ChannelStats()
+        self.workers: list[threading.Thread] = []
+
+
+class AlertDispatcher:
+    """Delivers alerts asynchronously with timeouts, retries and dead-lettering"""
+
+    def __init__(self, max_queue: int = 100, workers_per_channel: int = 1,
+                 max_retries: int = 3, backoff_base: float = 2.0,
+                 backoff_max: float = 60.0,
+                 dead_letter_file: Optional[str] = "/tmp/watchdog_dead_letters.jsonl",
+                 dedupe_window: float = 300.0, batch_window: float = 5.0):
+        self.dedupe_window = dedupe_window
+        self.batch_window = batch_window
+        self.max_queue = max_queue
+        self.workers_per_channel = workers_per_channel
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.dead_letter_file = dead_letter_file
+        self.channels: Dict[str, AlertChannel] = {}
+        self._stopping = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._dead_letter_lock = threading.Lock()
+        
+        # Dedupe and batching state, shared by all channels
+        self._pending: list[Alert] = []
+        self._pending_lock = threading.Lock()
+        self._has_pending = threading.Event()
+        self._last_seen: Dict[str, float] = {}
+        self.raised = 0
+        self.suppressed = 0
+        self.digests = 0
+        self._batcher: Optional[threading.Thread] = None
+        if batch_window > 0:
+            self._batcher = threading.Thread(target=self._batch_loop,
+                                             name="alert-batcher", daemon=True)
+            self._batcher.start()
+
+    def register_channel(self, name: str, send: Callable[[Alert], None],
+                         rate_per_minute: Optional[float] = None, burst: int = 5):
+        """
+        Add a delivery channel. `send` must raise on failure and should apply
+        its own network timeout. `rate_per_minute` caps sustained delivery on
+        this channel with a token bucket allowing bursts of `burst`.
+        """
+        bucket = TokenBucket(rate_per_minute / 60.0, burst) if rate_per_minute else None
+        channel = AlertChannel(name, send, self.max_queue, bucket)
+        for i in range(self.workers_per_channel):
+            worker = threading.Thread(
+                target=self._worker, args=(channel,),
+                name=f"alert-{name}-{i}", daemon=True
+            )
+            worker.start()
+            channel.workers.append(worker)
+        self.channels[name] = channel
+
+    def submit(self, subject: str, message: str, fingerprint: Optional[str] = None) -> bool:
+        """
+        Raise an alert without blocking. Alerts with the same fingerprint
+        (default: the subject) are suppressed for `dedupe_window` seconds.
+        Returns False if the alert was suppressed as a duplicate.
+        """
+        fingerprint = fingerprint or subject
+        now = time.monotonic()
+        alert = Alert(subject=subject, message=message, fingerprint=fingerprint)
+        
+        with self._pending_lock:
+            self.raised += 1
+            last = self._last_seen.get(fingerprint)
+            if last is not None and now - last < self.dedupe_window:
+                self.suppressed += 1
+                logger.info(f"Suppressing duplicate alert: {fingerprint}")
+                return False
+            self._last_seen[fingerprint] = now
+            
+            if self._batcher is not None:
+                self._pending.append(alert)
+                self._has_pending.set()
+                return True
+        
+        self._enqueue(alert)
+        return True
+
+    def resolve(self, fingerprint: str):
+        """Forget a fingerprint so the next alert for it is sent immediately"""
+        with self._pending_lock:
+            self._last_seen.pop(fingerprint, None)
+
+    def _batch_loop(self):
+        """Collect alerts for one batch window after the first arrives, then flush a digest"""
+        while not self._stopping.is_set():
+            self._has_pending.wait()
+            self._stopping.wait(self.batch_window)
+            self._flush_pending()
+
+    def _flush_pending(self):
+        with self._pending_lock:
+            alerts, self._pending = self._pending, []
+            self._has_pending.clear()
+            self._prune_fingerprints()
+        if not alerts:
+            return
+        digest = build_digest(alerts)
+        if digest.count > 1:
+            self.digests += 1
+        self._enqueue(digest)
+
+    def _prune_fingerprints(self):
+        """Drop fingerprints whose dedupe window has passed (caller holds _pending_lock)"""
+        cutoff = time.monotonic() - self.dedupe_window
+        expired = [fp for fp, seen in self._last_seen.items() if seen < cutoff]
+        for fp in expired:
+            del self._last_seen[fp]
+
+    def _enqueue(self, template: Alert) -> int:
+        """Hand an alert (or digest) to every channel's queue"""
+        accepted = 0
+        for channel in self.channels.values():
+            alert = Alert(subject=template.subject, message=template.message,
+                          fingerprint=template.fingerprint, created=template.created,
+                          count=template.count)
+            try:
+                channel.queue.put_nowait(alert)
+                accepted += 1
+            except queue.Full:
+                with self._stats_lock:
+                    channel.stats.dropped += 1
+                self._dead_letter(channel, alert, "queue full")
+        return accepted
+
+    def _worker(self, channel: AlertChannel):
+        while True:
+            alert = channel.queue.get()
+            try:
+                if alert is None:
+                    return
+                self._deliver(channel, alert)
+            finally:
+                channel.queue.task_done()
+
+    def _deliver(self, channel: AlertChannel, alert: Alert):
+        """Send one alert, retrying with exponential backoff"""
+        if channel.bucket is not None:
+            delay = channel.bucket.reserve()
+            if delay > 0:
+                with self._stats_lock:
+                    channel.stats.rate_limited += 1
+                logger.info(f"{channel.name} rate limited, delaying alert {delay:.1f}s")
+                self._stopping.wait(delay)
+        
+        while True:
+            alert.attempts += 1
+            try:
+                channel.send(alert)
+            except Exception as e:
+                with self._stats_lock:
+                    channel.stats.failed_attempts += 1
+                if alert.attempts > self.max_retries or self._stopping.is_set():
+                    self._dead_letter(channel, alert, str(e))
+                    return
+                delay = min(self.backoff_max, self.backoff_base ** alert.attempts)
+                logger.warning(f"{channel.name} delivery failed (attempt {alert.attempts}), "
+                               f"retrying in {delay:.0f}s: {e}")
+                if self._stopping.wait(delay):
+                    self._dead_letter(channel, alert, f"shutdown during retry: {e}")
+                    return
+                continue
+
+            latency = time.time() - alert.created
+            with self._stats_lock:
+                channel.stats.record_delivery(latency)
+            logger.info(f"Alert delivered via {channel.name} in {latency:.2f}s: {alert.subject}")
+            return
+
+    def _dead_letter(self, channel: AlertChannel, alert: Alert, reason: str):
+        """Record an alert that could not be delivered"""
+        with self._stats_lock:
+            channel.stats.dead_lettered += 1
+        logger.error(f"Dead-lettered {channel.name} alert after {alert.attempts} attempt(s) "
+                     f"({reason}): {alert.subject}")
+        if not self.dead_letter_file:
+            return
+        record = {
+            'time': datetime.now().isoformat(),
+            'channel': channel.name,
+            'reason': reason,
+            'attempts': alert.attempts,
+            'created': datetime.fromtimestamp(alert.created).isoformat(),
+            'subject': alert.subject,
+            'message': alert.message,
+        }
+        try:
+            with self._dead_letter_lock, open(self.dead_letter_file, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logger.error(f"Could not write dead letter: {e}")
+
+    def get_metrics(self) -> Dict[str, Dict[str, float]]:
+        """Queue depth and delivery stats per channel"""
+        metrics = {}
+        with self._stats_lock:
+            for name, channel in self.channels.items():
+                stats = channel.stats
+                metrics[name] = {
+                    'queue_depth': channel.queue.qsize(),
+                    'delivered': stats.delivered,
+                    'failed_attempts': stats.failed_attempts,
+                    'dead_lettered': stats.dead_lettered,
+                    'dropped': stats.dropped,
+                    'rate_limited': stats.rate_limited,
+                    'last_latency_seconds': stats.last_latency,
+                    'max_latency_seconds': stats.max_latency,
+                    'avg_latency_seconds': (stats.total_latency / stats.delivered
+                                            if stats.delivered else 0.0),
+                }
+        return metrics
+
+    def get_pipeline_metrics(self) -> Dict[str, float]:
+        """Dedupe and batching counters across all channels"""
+        with self._pending_lock:
+            return {
+                'raised': self.raised,
+                'suppressed': self.suppressed,
+                'digests': self.digests,
+                'pending': len(self._pending),
+                'suppression_ratio': self.suppressed / self.raised if self.raised else 0.0,
+            }
+
+    def wait_idle(self, timeout: float = 10.0) -> bool:
+        """
+        Wait until no alerts are pending a batch and every channel has
+        finished the ones queued, with rate limiting and retries still in
+        force (unlike close()). Returns False on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._pending_lock:
+                busy = bool(self._pending)
+            busy = busy or any(channel.queue.unfinished_tasks
+                               for channel in self.channels.values())
+            if not busy:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+
+    def close(self, timeout: float = 10.0):
+        """Stop accepting retries and give queued alerts a chance to drain"""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        self._has_pending.set()
+        if self._batcher is not None:
+            self._batcher.join(timeout)
+        self._flush_pending()
+        for channel in self.channels.values():
+            for _ in channel.workers:
+                try:
+                    channel.queue.put(None, timeout=timeout)
+                except queue.Full:
+                    pass
+        deadline = time.monotonic() + timeout
+        for channel in self.channels.values():
+            for worker in channel.workers:
+                worker.join(max(0.0, deadline - time.monotonic()))
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Alert sinks for the scheduler watchdog
+Each sink delivers an Alert to one destination (SMTP, Slack, a generic
+webhook, a file or syslog). Sinks are plugged into AlertDispatcher, which
+handles queueing, retries and rate limiting around them.
+"""
+import abc
+import json
+import os
+import smtplib
+import socket
+import syslog
+import threading
+import time
+from datetime import datetime
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from typing import Dict, List, Optional
+import logging
+
+from alert_dispatch import Alert
+
+logger = logging.getLogger(__name__)
+
+
+def alert_to_dict(alert: Alert) -> Dict:
+    """JSON-friendly view of an alert for webhook and file sinks"""
+    return {
+        'subject': alert.subject,
+        'message': alert.message,
+        'fingerprint': alert.fingerprint,
+        'count': alert.count,
+        'created': datetime.fromtimestamp(alert.created).isoformat(),
+        'host': socket.gethostname(),
+    }
+
+
+class AlertSink(abc.ABC):
+    """
+    Base class for alert destinations.
+    Subclasses implement send(), which must raise on failure and apply its own
+    network timeout. rate_per_minute/burst set the channel's token bucket.
+    """
+
+    name = "sink"
+    rate_per_minute: Optional[float] = None
+    burst: int = 5
+
+    @abc.abstractmethod
+    def send(self, alert: Alert):
+        """Deliver one alert"""
+
+    def close(self):
+        """Release connections or file handles"""
+
+
+class PersistentSMTP:
+    """Keeps one SMTP session open across alerts"""
+
+    # Probe the connection with NOOP before reuse once it has been idle this long
+    IDLE_PROBE_SECONDS = 30
+
+    def __init__(self, host: str, port: int, user: Optional[str] = None,
+                 password: Optional[str] = None, timeout: float = 10.0,
+                 starttls: bool = True):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self.starttls = starttls
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._server is not None:
+            if time.monotonic() - self._last_used < self.IDLE_PROBE_SECONDS:
+                return self._server
+            try:
+                if self._server.noop()[0] == 250:
+                    return self._server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.close()
+
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            if self.user:
+                server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+        return server
+
+    def send_message(self, msg):
+        """
+        Send over the open session, reconnecting once if the server dropped it.
+        Other SMTP errors (refused recipients, rejected data, failed login)
+        are raised as they are: resending would not help and could deliver twice.
+        """
+        for attempt in (1, 2):
+            server = self._connect()
+            try:
+                server.send_message(msg)
+                self._last_used = time.monotonic()
+                return
+            # SMTPException subclasses OSError, so name the connection-level errors
+            except (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout):
+                self.close()
+                if attempt == 2:
+                    raise
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                self._server.close()
+            self._server = None
+
+
+class SMTPSink(AlertSink):
+    """Email alerts over a persistent SMTP session"""
+
+    name = "email"
+
+    def __init__(self, host: str, port: int, sender: str, recipient: str,
+                 user: Optional[str] = None, password: Optional[str] = None,
+                 timeout: float = 10.0, starttls: bool = True,
+                 rate_per_minute: float = 6, burst: int = 3):
+        self.sender = sender
+        self.recipient = recipient
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.smtp = PersistentSMTP(host, port, user, password, timeout, starttls)
+
+    def send(self, alert: Alert):
+        msg = MIMEMultipart()
+        msg['From'] = self.sender
+        msg['To'] = self.recipient
+        msg['Subject'] = f"[ALERT] {alert.subject}"
+        msg['X-Alert-Created'] = repr(alert.created)
+        msg.attach(MIMEText(alert.message, 'plain'))
+        self.smtp.send_message(msg)
+
+    def close(self):
+        self.smtp.close()
+
+
+class WebhookSink(AlertSink):
+    """POSTs the alert as JSON to an arbitrary HTTP endpoint"""
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = 10.0, headers: Optional[Dict] = None,
+                 rate_per_minute: Optional[float] = 60, burst: int = 10, name: str = None):
+        import requests
+
+        self.url = url
+        self.timeout = timeout
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        if name:
+            self.name = name
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+
+    def payload(self, alert: Alert) -> Dict:
+        return alert_to_dict(alert)
+
+    def send(self, alert: Alert):
+        response = self.session.post(
+            self.url, json=self.payload(alert), timeout=self.timeout,
+            headers={'X-Alert-Created': repr(alert.created)}
+        )
+        response.raise_for_status()
+
+    def close(self):
+        self.session.close()
+
+
+class SlackWebhookSink(WebhookSink):
+    """Slack incoming-webhook message"""
+
+    name = "slack"
+
+    def __init__(self, url: str, timeout: float = 10.0,
+                 rate_per_minute: float = 30, burst: int = 5):
+        super().__init__(url, timeout, rate_per_minute=rate_per_minute, burst=burst)
+
+    def payload(self, alert: Alert) -> Dict:
+        return {
+            'text': f"🚨 *Scheduler Alert*\n{alert.message}",
+            'username': 'Scheduler Watchdog'
+        }
+
+
+class FileSink(AlertSink):
+    """Appends alerts as JSON lines to a local file"""
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, alert: Alert):
+        line = json.dumps(alert_to_dict(alert)) + "\n"
+        with self._lock, open(self.path, 'a') as f:
+            f.write(line)
+
+
+class SyslogSink(AlertSink):
+    """Writes alerts to the local syslog daemon"""
+
+    name = "syslog"
+
+    def __init__(self, ident: str = "scheduler-watchdog",
+                 facility: int = syslog.LOG_DAEMON):
+        syslog.openlog(ident, syslog.LOG_PID, facility)
+
+    def send(self, alert: Alert):
+        text = alert.message.replace("\n", " | ")
+        syslog.syslog(syslog.LOG_ALERT, f"{alert.subject}: {text}")
+
+    def close(self):
+        syslog.closelog()
+
+
+def build_sinks(config: dict) -> List[AlertSink]:
+    """
+    Create sinks from watchdog config / environment.
+    Email and Slack keep their existing settings; extra sinks come from a
+    "sinks" list, e.g. [{"type": "webhook", "url": "..."}, {"type": "file",
+    "path": "/var/log/alerts.jsonl"}, {"type": "syslog"}].
+    """
+    sinks: List[AlertSink] = []
+    timeout = float(config.get('alert_timeout', 10))
+
+    # Get email configuration from environment or config
+    smtp_host = os.getenv('SMTP_HOST', config.get('smtp_host', 'smtp.gmail.com'))
+    smtp_port = int(os.getenv('SMTP_PORT', config.get('smtp_port', 587)))
+    smtp_user = os.getenv('SMTP_USER', config.get('smtp_user'))
+    smtp_pass = os.getenv('SMTP_PASS', config.get('smtp_pass'))
+    alert_to = os.getenv('ALERT_EMAIL', config.get('alert_email'))
+
+    if all([smtp_user, smtp_pass, alert_to]):
+        sinks.append(SMTPSink(
+            smtp_host, smtp_port, sender=smtp_user, recipient=alert_to,
+            user=smtp_user, password=smtp_pass, timeout=timeout,
+            starttls=config.get('smtp_starttls', True),
+            rate_per_minute=float(config.get('email_rate_per_minute', 6)),
+            burst=int(config.get('email_burst', 3))
+        ))
+    else:
+        logger.warning("Email configuration incomplete, email alerts disabled")
+
+    webhook_url = os.getenv('SLACK_WEBHOOK', config.get('slack_webhook'))
+    if webhook_url:
+        try:
+            sinks.append(SlackWebhookSink(
+                webhook_url, timeout=timeout,
+                rate_per_minute=float(config.get('slack_rate_per_minute', 30)),
+                burst=int(config.get('slack_burst', 5))
+            ))
+        except ImportError:
+            logger.warning("requests module not available for Slack alerts")
+    else:
+        logger.warning("Slack webhook not configured, Slack alerts disabled")
+
+    for spec in config.get('sinks', []):
+        sink_type = spec.get('type')
+        try:
+            if sink_type == 'smtp':
+                sinks.append(SMTPSink(
+                    spec['host'], int(spec.get('port', 25)),
+                    sender=spec['from'], recipient=spec['to'],
+                    user=spec.get('user'), password=spec.get('password'),
+                    timeout=timeout, starttls=spec.get('starttls', True),
+                    rate_per_minute=spec.get('rate_per_minute', 6),
+                    burst=spec.get('burst', 3)
+                ))
+            elif sink_type == 'slack':
+                sinks.append(SlackWebhookSink(spec['url'], timeout=timeout))
+            elif sink_type == 'webhook':
+                sinks.append(WebhookSink(
+                    spec['url'], timeout=timeout, headers=spec.get('headers'),
+                    rate_per_minute=spec.get('rate_per_minute', 60),
+                    burst=spec.get('burst', 10), name=spec.get('name')
+                ))
+            elif sink_type == 'file':
+                sinks.append(FileSink(spec['path']))
+            elif sink_type == 'syslog':
+                sinks.append(SyslogSink(spec.get('ident', 'scheduler-watchdog')))
+            else:
+                logger.warning(f"Unknown alert sink type: {sink_type}")
+        except (KeyError, ImportError) as e:
+            logger.warning(f"Skipping misconfigured {sink_type} sink: {e}")
+
+    return sinks
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Compact bar container for the market data API
+A BarSeries keeps bars as typed columns - epoch-ms int64 't', float64
+open/high/low/close/volume and a uint8 'ints' mask, 49 bytes a bar - instead
+of one dict (with a timestamp string) per bar, which costs several hundred. It is also a
+read-only sequence of bar dicts in the API format, built on access:
+
+    series[i]        {'timestamp': '2024-05-01T13:30:00Z', 'open': ..., 'volume': ...}
+    series[a:b]      list of such dicts (what the JSON encoder is given)
+    series.window(a, b)   BarSeries sharing the columns, no copy
+
+Columns are never modified in place; concat()/window() return new series, so
+a series handed to a response stays consistent while the cache moves on.
+
+JSON stays what Polygon's bars produced: 'ints' has bit i set when value
+column i (VALUE_COLUMNS order) was a JSON integer upstream, so 450 is emitted
+as 450 and 123456780.0 as 123456780.0.
+"""
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+COLUMNS = ('t', 'open', 'high', 'low', 'close', 'volume', 'ints')
+VALUE_COLUMNS = COLUMNS[1:6]
+# Polygon aggregate keys for 't' and each value column
+POLYGON_KEYS = ('t', 'o', 'h', 'l', 'c', 'v')
+# Iteration builds bar dicts this many at a time
+ITER_CHUNK = 1000
+
+
+def _number(value: float, was_int: int):
+    return int(value) if was_int else value
+
+
+def format_timestamps(t: np.ndarray) -> List[str]:
+    """ISO-8601 UTC strings for epoch ms, as datetime.isoformat() + 'Z' writes them"""
+    stamps = np.datetime_as_string(t.astype('datetime64[ms]'), unit='s')
+    fractional = np.flatnonzero(t % 1000)
+    if len(fractional):
+        # isoformat() only adds a fraction when there is one, and then to microseconds
+        stamps[fractional] = np.datetime_as_string(t[fractional].astype('datetime64[ms]'),
+                                                   unit='us')
+    return [stamp + 'Z' for stamp in stamps.tolist()]
+
+
+class BarSeries(Sequence):
+    """Bars as typed columns, readable as a sequence of API bar dicts"""
+
+    __slots__ = COLUMNS
+
+    def __init__(self, t: np.ndarray, open: np.ndarray, high: np.ndarray, low: np.ndarray,
+                 close: np.ndarray, volume: np.ndarray, ints: Optional[np.ndarray] = None):
+        self.t = t
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        # Without a mask every value is emitted as a float
+        self.ints = np.zeros(len(t), dtype=np.uint8) if ints is None else ints
+
+    @classmethod
+    def empty(cls) -> 'BarSeries':
+        return cls(np.empty(0, dtype=np.int64), *(np.empty(0) for _ in VALUE_COLUMNS),
+                   np.empty(0, dtype=np.uint8))
+
+    @classmethod
+    def from_columns(cls, cols: Dict[str, np.ndarray]) -> 'BarSeries':
+        """Wrap existing columns (e.g. shared-cache views) without copying"""
+        return cls(*(cols[name] for name in COLUMNS))
+
+    @classmethod
+    def from_polygon(cls, results: List[dict]) -> 'BarSeries':
+        """Columns from Polygon aggregate results ({'t', 'o', 'h', 'l', 'c', 'v', ...})"""
+        count = len(results)
+        columns = [np.fromiter((bar['t'] for bar in results), dtype=np.int64, count=count)]
+        ints = np.zeros(count, dtype=np.uint8)
+        for bit, key in enumerate(POLYGON_KEYS[1:]):
+            columns.append(np.fromiter((bar[key] for bar in results), dtype=np.float64,
+                                       count=count))
+            was_int = np.fromiter((type(bar[key]) is int for bar in results), dtype=bool,
+                                  count=count)
+            ints |= was_int.astype(np.uint8) << bit
+        return cls(*columns, ints)
+
+    @classmethod
+    def concat(cls, parts: Iterable['BarSeries']) -> 'BarSeries':
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls.empty()
+        if len(parts) == 1:
+            return parts[0]
+        return cls(*(np.concatenate([getattr(part, name) for part in parts])
+                     for name in COLUMNS))
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """The columns by name (the arrays themselves, not copies)"""
+        return {name: getattr(self, name) for name in COLUMNS}
+
+    def window(self, start: Optional[int] = None, stop: Optional[int] = None) -> 'BarSeries':
+        """Bars [start:stop] as a series viewing the same columns"""
+        return BarSeries(*(getattr(self, name)[start:stop] for name in COLUMNS))
+
+    def copy(self) -> 'BarSeries':
+        """Series with its own columns, releasing anything this one views"""
+        return BarSeries(*(getattr(self, name).copy() for name in COLUMNS))
+
+    def where(self, keep: np.ndarray) -> 'BarSeries':
+        """Bars where the boolean mask `keep` is set"""
+        return BarSeries(*(getattr(self, name)[keep] for name in COLUMNS))
+
+    def after(self, t_ms: int) -> 'BarSeries':
+        """Bars at or after t_ms (bars are in time order)"""
+        return self.window(int(np.searchsorted(self.t, t_ms, side='left')))
+
+    def bars(self, start: int = 0, stop: Optional[int] = None) -> List[dict]:
+        """Bar dicts in the API format for [start:stop]"""
+        window = self.window(start, stop)
+        rows = zip(format_timestamps(window.t), window.open.tolist(), window.high.tolist(),
+                   window.low.tolist(), window.close.tolist(), window.volume.tolist(),
+                   window.ints.tolist())
+        return [
+            {'timestamp': stamp, 'open': _number(o, k & 1), 'high': _number(h, k & 2),
+             'low': _number(l, k & 4), 'close': _number(c, k & 8), 'volume': _number(v, k & 16)}
+            for stamp, o, h, l, c, v, k in rows
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in COLUMNS)
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return self.bars(start, stop)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('bar index out of range')
+        return self.bars(index, index + 1)[0]
+
+    def __iter__(self):
+        for start in range(0, len(self), ITER_CHUNK):
+            yield from self.bars(start, start + ITER_CHUNK)
+
+    def __repr__(self) -> str:
+        return f"<BarSeries {len(self)} bars>"
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Alerting throughput/latency benchmark
+Pushes synthetic scheduler failures through SchedulerWatchdog._check_scheduler
+and delivers the resulting alerts to in-process fake SMTP and webhook
+receivers, then reports end-to-end alert latency and the suppression ratio.
+
+Run with: python bench_alerts.py --checks 5000 --schedulers 20
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+import logging
+
+from alert_sinks import SMTPSink, SlackWebhookSink, WebhookSink
+from fake_receivers import FakeHTTPReceiver, FakeSMTPServer
+from scheduler_monitor import HealthStatus
+from scheduler_watchdog import AlertManager, SchedulerWatchdog
+
+
+class SyntheticChecker:
+    """Stands in for ExternalHealthChecker, failing in streaks with occasional recoveries"""
+
+    def __init__(self, name: str, failure_rate: float, rng: random.Random):
+        self.state_file = Path(f"/synthetic/{name}.json")
+        self.failure_rate = failure_rate
+        self.rng = rng
+        self.failing = False
+
+    def check(self) -> tuple[bool, HealthStatus]:
+        # Flip state rarely so failures arrive in streaks, like real incidents
+        if self.rng.random() < 0.05:
+            self.failing = self.rng.random() < self.failure_rate
+        status = HealthStatus(
+            timestamp=datetime.now().isoformat(),
+            is_alive=not self.failing,
+            last_execution=datetime.now().isoformat(),
+            error_count=0,
+            last_error="synthetic failure" if self.failing else None,
+            uptime_seconds=0,
+            active_jobs=1,
+            total_executions=0
+        )
+        return not self.failing, status
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_benchmark(checks: int, schedulers: int, failure_rate: float,
+                  batch_window: float, cooldown: float, rate_per_minute: float,
+                  spread: float = 0.0, seed: int = 42) -> dict:
+    smtp = FakeSMTPServer().start()
+    slack = FakeHTTPReceiver().start()
+    webhook = FakeHTTPReceiver().start()
+
+    sinks = [
+        SMTPSink("127.0.0.1", smtp.port, sender="watchdog@localhost",
+                 recipient="oncall@localhost", starttls=False,
+                 rate_per_minute=rate_per_minute, burst=10),
+        SlackWebhookSink(slack.url, rate_per_minute=rate_per_minute, burst=10),
+        WebhookSink(webhook.url, rate_per_minute=rate_per_minute, burst=10),
+    ]
+    config = {
+        'alert_batch_window': batch_window,
+        'alert_cooldown': cooldown,
+        'alert_queue_size': 10000,
+        'dead_letter_file': None,
+    }
+    alert_manager = AlertManager(config, sinks=sinks)
+
+    rng = random.Random(seed)
+    watchdogs = [
+        SchedulerWatchdog(
+            checker=SyntheticChecker(f"scheduler-{i}", failure_rate, rng),
+            alert_manager=alert_manager
+        )
+        for i in range(schedulers)
+    ]
+
+    check_times = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for n in range(checks):
+            if spread:
+                # Pace checks evenly over `spread` seconds instead of firing them back to back
+                time.sleep(max(0.0, start + spread * n / checks - time.perf_counter()))
+            watchdog = watchdogs[n % schedulers]
+            t0 = time.perf_counter()
+            watchdog._check_scheduler()
+            check_times.append(time.perf_counter() - t0)
+    submit_elapsed = time.perf_counter() - start
+    busy = sum(check_times)
+
+    # close() skips rate-limit waits and flushes the open batch early, so let
+    # delivery finish on its own and only then shut the pipeline down
+    timeout = max(30.0, batch_window * 2)
+    if not alert_manager.dispatcher.wait_idle(timeout):
+        logging.getLogger(__name__).error("Alerts still queued after %.0fs", timeout)
+    # Channels are registered in sink order
+    for receiver, stats in zip((smtp, slack, webhook), alert_manager.get_metrics().values()):
+        receiver.wait_for(int(stats['delivered']), timeout=5.0)
+    alert_manager.close(timeout=timeout)
+    for receiver in (smtp, slack, webhook):
+        receiver.stop()
+
+    pipeline = alert_manager.dispatcher.get_pipeline_metrics()
+    channels = alert_manager.get_metrics()
+    latencies = [
+        r.latency for receiver in (smtp, slack, webhook)
+        for r in receiver.received if r.latency is not None
+    ]
+
+    return {
+        'checks': checks,
+        'schedulers': schedulers,
+        'batch_window': batch_window,
+        'cooldown': cooldown,
+        'check_loop_seconds': submit_elapsed,
+        'checks_per_second': checks / busy if busy else 0.0,
+        'check_p50_us': percentile(check_times, 50) * 1e6,
+        'check_p99_us': percentile(check_times, 99) * 1e6,
+        'check_max_us': max(check_times) * 1e6 if check_times else 0.0,
+        'alerts_raised': pipeline['raised'],
+        'alerts_suppressed': pipeline['suppressed'],
+        'suppression_ratio': pipeline['suppression_ratio'],
+        'digests': pipeline['digests'],
+        'received': {
+            'smtp': len(smtp.received),
+            'slack': len(slack.received),
+            'webhook': len(webhook.received),
+        },
+        'latency_p50_ms': percentile(latencies, 50) * 1000,
+        'latency_p99_ms': percentile(latencies, 99) * 1000,
+        'latency_mean_ms': statistics.mean(latencies) * 1000 if latencies else 0.0,
+        'latency_max_ms': max(latencies) * 1000 if latencies else 0.0,
+        'channels': channels,
+    }
+
+
+def print_report(result: dict):
+    print("\n" + "="*60)
+    print("ALERTING BENCHMARK")
+    print("="*60)
+    print(f"Checks:             {result['checks']} across {result['schedulers']} schedulers")
+    print(f"Check loop:         {result['checks_per_second']:.0f} checks/s "
+          f"(p50 {result['check_p50_us']:.0f}us, p99 {result['check_p99_us']:.0f}us, "
+          f"max {result['check_max_us']:.0f}us)")
+    print(f"Alerts raised:      {result['alerts_raised']}")
+    print(f"Suppressed:         {result['alerts_suppressed']} "
+          f"(ratio {result['suppression_ratio']:.3f})")
+    print(f"Digests:            {result['digests']}")
+    print(f"Received:           {result['received']}")
+    print(f"End-to-end latency: p50 {result['latency_p50_ms']:.1f}ms, "
+          f"p99 {result['latency_p99_ms']:.1f}ms, max {result['latency_max_ms']:.1f}ms")
+    print("="*60 + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Alerting throughput/latency benchmark')
+    parser.add_argument('--checks', type=int, default=5000,
+                        help='Number of synthetic health checks (default: 5000)')
+    parser.add_argument('--schedulers', type=int, default=20,
+                        help='Number of simulated schedulers (default: 20)')
+    parser.add_argument('--failure-rate', type=float, default=0.7,
+                        help='Probability a scheduler is failing after a state flip')
+    parser.add_argument('--batch-window', type=float, default=0.5,
+                        help='Alert batch window in seconds (default: 0.5)')
+    parser.add_argument('--cooldown', type=float, default=300,
+                        help='Per-fingerprint dedupe window in seconds (default: 300)')
+    parser.add_argument('--rate', type=float, default=600,
+                        help='Per-channel rate limit in alerts/minute (default: 600)')
+    parser.add_argument('--spread', type=float, default=0.0,
+                        help='Spread the checks over this many seconds (default: back to back)')
+    parser.add_argument('--json', type=str,
+                        help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+
+    result = run_benchmark(args.checks, args.schedulers, args.failure_rate,
+                           args.batch_window, args.cooldown, args.rate, args.spread)
+    print_report(result)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,611 @@
+#!/usr/bin/env python3
+"""
+Monitoring stack benchmark suite
+Measures the scheduler-side and watchdog-side costs of monitoring:
+
+    heartbeat   SchedulerMonitor.heartbeat/tick/record_error throughput and
+                per-call latency, from 1 thread and from many threads at once
+    check       ExternalHealthChecker.check latency with N concurrent readers
+                while a writer heartbeats, and how many reads were torn
+    dashboard   scheduler_dashboard requests/sec per route over real HTTP
+    detection   time from SIGKILL of a scheduler process to the watchdog's
+                first failed check and to the alert reaching a webhook, for
+                the polling and the event-driven watchdog
+    recovery    time from a crash, hang or stall of a FakeScheduler to the
+                watchdog's remediation bringing it back healthy, and from a
+                crash to a failover onto a standby
+
+Results are written as JSON (with the git commit and host) so runs can be
+compared across commits:
+
+    python bench_monitor.py --json before.json
+    python bench_monitor.py --json after.json --compare before.json
+    python bench_monitor.py --suite heartbeat,check --quick
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+import logging
+
+import scheduler_monitor
+from alert_sinks import WebhookSink
+from bench_alerts import percentile
+from fake_receivers import FakeHTTPReceiver
+from fake_scheduler import FakeProcessController, FakeScheduler
+from log_setup import setup_logging
+from remediation import RemediationEngine
+from scheduler_monitor import ExternalHealthChecker, SchedulerMonitor, liveness_path, stack_dump_path
+from scheduler_watchdog import AlertManager, SchedulerWatchdog
+
+SUITES = ('heartbeat', 'check', 'dashboard', 'detection', 'recovery')
+RECOVERY_FAULTS = ('crash', 'hang', 'stall', 'failover')
+THREAD_COUNTS = (1, 4, 16)
+READER_COUNTS = (1, 4, 16)
+DASHBOARD_ROUTES = ('/api/status', '/api/health', '/')
+
+# Scheduler process for the detection benchmark: ticks and heartbeats until killed
+SCHEDULER_SCRIPT = """
+import sys, time
+from scheduler_monitor import SchedulerMonitor
+monitor = SchedulerMonitor(sys.argv[1]).start()
+tick, beat = float(sys.argv[2]), float(sys.argv[3])
+print('ready', flush=True)
+last_beat = 0.0
+while True:
+    now = time.monotonic()
+    if now - last_beat >= beat:
+        monitor.heartbeat()
+        last_beat = now
+    else:
+        monitor.tick()
+    time.sleep(tick)
+"""
+
+
+def _latency_summary(samples: List[float]) -> dict:
+    return {
+        'p50_us': percentile(samples, 50) * 1e6,
+        'p99_us': percentile(samples, 99) * 1e6,
+        'max_us': max(samples) * 1e6 if samples else 0.0,
+    }
+
+
+def _remove_monitor_files(state_file: Path):
+    for path in (state_file, liveness_path(state_file)):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def _run_threads(threads: int, body: Callable[[int], None]) -> float:
+    """Run body(i) on `threads` threads released together; returns wall seconds"""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(i):
+        barrier.wait()
+        body(i)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker_thread in workers:
+        worker_thread.join()
+    return time.perf_counter() - start
+
+
+def bench_heartbeat(workdir: Path, ops: int, thread_counts=THREAD_COUNTS) -> dict:
+    """Throughput and latency of the calls a scheduler makes on every run"""
+    state_file = workdir / 'heartbeat_state.json'
+    monitor = SchedulerMonitor(str(state_file)).start()
+    operations = {
+        'heartbeat': monitor.heartbeat,
+        'tick': monitor.tick,
+        'record_error': lambda: monitor.record_error('benchmark error'),
+    }
+    results = {}
+    try:
+        for name, call in operations.items():
+            results[name] = {}
+            for threads in thread_counts:
+                per_thread = max(1, ops // threads)
+                samples: List[List[float]] = [[] for _ in range(threads)]
+
+                def body(i, call=call, per_thread=per_thread):
+                    out = samples[i]
+                    clock = time.perf_counter
+                    for _ in range(per_thread):
+                        t0 = clock()
+                        call()
+                        out.append(clock() - t0)
+
+                wall = _run_threads(threads, body)
+                latencies = [s for thread_samples in samples for s in thread_samples]
+                results[name][f"threads_{threads}"] = {
+                    'calls': len(latencies),
+                    'ops_per_second': len(latencies) / wall if wall else 0.0,
+                    **_latency_summary(latencies),
+                }
+            monitor.reset_errors()
+    finally:
+        if monitor._beacon is not None:
+            monitor._beacon.close()
+        _remove_monitor_files(state_file)
+    return results
+
+
+def bench_check(workdir: Path, duration: float, writer_hz: float,
+                reader_counts=READER_COUNTS) -> dict:
+    """ExternalHealthChecker.check latency under N readers and one heartbeating writer"""
+    state_file = workdir / 'check_state.json'
+    monitor = SchedulerMonitor(str(state_file))
+    monitor.heartbeat()
+    results = {'writer_hz': writer_hz}
+    try:
+        for readers in reader_counts:
+            stop = threading.Event()
+            writes = 0
+
+            def writer():
+                nonlocal writes
+                interval = 1.0 / writer_hz
+                next_write = time.perf_counter()
+                while not stop.is_set():
+                    monitor.heartbeat()
+                    writes += 1
+                    next_write += interval
+                    stop.wait(max(0.0, next_write - time.perf_counter()))
+
+            samples: List[List[float]] = [[] for _ in range(readers)]
+            failed = [0] * readers
+
+            def body(i):
+                checker = ExternalHealthChecker(str(state_file))
+                out = samples[i]
+                clock = time.perf_counter
+                deadline = clock() + duration
+                while clock() < deadline:
+                    t0 = clock()
+                    is_healthy, _ = checker.check()
+                    out.append(clock() - t0)
+                    if not is_healthy:
+                        failed[i] += 1
+
+            writer_thread = threading.Thread(target=writer)
+            writer_thread.start()
+            try:
+                wall = _run_threads(readers, body)
+            finally:
+                stop.set()
+                writer_thread.join()
+            latencies = [s for reader_samples in samples for s in reader_samples]
+            results[f"readers_{readers}"] = {
+                'checks': len(latencies),
+                'checks_per_second': len(latencies) / wall if wall else 0.0,
+                'writes': writes,
+                # A healthy scheduler read as unhealthy: a torn or half-written state file
+                'failed_checks': sum(failed),
+                **_latency_summary(latencies),
+            }
+    finally:
+        if monitor._beacon is not None:
+            monitor._beacon.close()
+        _remove_monitor_files(state_file)
+    return results
+
+
+def bench_dashboard(workdir: Path, duration: float, clients: int,
+                    routes=DASHBOARD_ROUTES) -> dict:
+    """Requests/sec per dashboard route over HTTP with `clients` concurrent clients"""
+    from werkzeug.serving import make_server
+    import scheduler_dashboard
+
+    state_file = workdir / 'dashboard_state.json'
+    monitor = SchedulerMonitor(str(state_file))
+    monitor.heartbeat()
+    # The routes read the module-level cache; point it at the benchmark's state file
+    scheduler_dashboard.snapshots = scheduler_dashboard.StatusSnapshotCache(
+        ExternalHealthChecker(str(state_file)))
+    server = make_server('127.0.0.1', 0, scheduler_dashboard.app, threaded=True)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    results = {'clients': clients}
+    try:
+        for route in routes:
+            samples: List[List[float]] = [[] for _ in range(clients)]
+            errors = [0] * clients
+
+            def body(i, url=base + route):
+                out = samples[i]
+                clock = time.perf_counter
+                deadline = clock() + duration
+                while clock() < deadline:
+                    t0 = clock()
+                    try:
+                        with urllib.request.urlopen(url, timeout=10) as response:
+                            response.read()
+                    except OSError as e:
+                        # /api/health answers 503 while unhealthy; that is still a response
+                        if getattr(e, 'code', None) is None:
+                            errors[i] += 1
+                            continue
+                    out.append(clock() - t0)
+
+            wall = _run_threads(clients, body)
+            latencies = [s for client_samples in samples for s in client_samples]
+            results[route] = {
+                'requests': len(latencies),
+                'requests_per_second': len(latencies) / wall if wall else 0.0,
+                'errors': sum(errors),
+                **_latency_summary(latencies),
+            }
+    finally:
+        server.shutdown()
+        server.server_close()
+        if monitor._beacon is not None:
+            monitor._beacon.close()
+        _remove_monitor_files(state_file)
+    return results
+
+
+def _detection_trial(workdir: Path, event_driven: bool, check_interval: float,
+                     tick_interval: float, warmup: float, timeout: float) -> dict:
+    state_file = workdir / f"detect_{'event' if event_driven else 'poll'}.json"
+    _remove_monitor_files(state_file)
+    receiver = FakeHTTPReceiver().start()
+    alert_manager = AlertManager(
+        {'alert_batch_window': 0, 'alert_cooldown': 0, 'dead_letter_file': None},
+        sinks=[WebhookSink(receiver.url, rate_per_minute=None)]
+    )
+    scheduler = subprocess.Popen(
+        [sys.executable, '-c', SCHEDULER_SCRIPT, str(state_file),
+         str(tick_interval), str(tick_interval * 5)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    watchdog = None
+    watchdog_thread = None
+    try:
+        scheduler.stdout.readline()
+        watchdog = SchedulerWatchdog(check_interval=check_interval, event_driven=event_driven,
+                                     checker=ExternalHealthChecker(str(state_file)),
+                                     alert_manager=alert_manager)
+        failures = []
+        check = watchdog._check_scheduler
+
+        def timed_check(*args, **kwargs):
+            result = check(*args, **kwargs)
+            if not result[0]:
+                failures.append(time.time())
+            return result
+
+        watchdog._check_scheduler = timed_check
+        watchdog_thread = threading.Thread(target=watchdog.run, daemon=True)
+        watchdog_thread.start()
+        time.sleep(warmup)
+
+        killed_at = time.time()
+        spurious = len(failures)
+        scheduler.send_signal(signal.SIGKILL)
+        # Reap it at once: a zombie still answers kill(pid, 0)
+        scheduler.wait()
+        # Spurious failures may already have raised alerts; wait for one after the kill
+        deadline = time.monotonic() + timeout
+        alerts = []
+        while not alerts and time.monotonic() < deadline:
+            alerts = [a.received for a in list(receiver.received)
+                      if a.received >= killed_at and 'Failed' in a.subject]
+            time.sleep(0.01)
+        detected = [t for t in failures if t >= killed_at]
+        return {
+            'detect_seconds': detected[0] - killed_at if detected else None,
+            'alert_seconds': alerts[0] - killed_at if alerts else None,
+            # Failed checks while the scheduler was still running
+            'spurious_failures': spurious,
+        }
+    finally:
+        if scheduler.poll() is None:
+            scheduler.kill()
+            scheduler.wait()
+        if watchdog is not None:
+            watchdog.stop()
+        if watchdog_thread is not None:
+            watchdog_thread.join(check_interval + 1)
+        receiver.stop()
+        _remove_monitor_files(state_file)
+
+
+def bench_detection(workdir: Path, trials: int, check_interval: float,
+                    liveness_timeout: float, tick_interval: float = 0.1) -> dict:
+    """
+    Kill-to-detection and kill-to-alert latency. The polling watchdog alerts
+    after max_consecutive_failures (3) failed checks, so it includes two
+    re-check intervals after the first failure; the event-driven one sees
+    the process exit and alerts on that confirmed failure at once. LIVENESS_TIMEOUT is lowered
+    to `liveness_timeout` for the run so a trial takes seconds, not minutes.
+    """
+    saved_timeout = scheduler_monitor.LIVENESS_TIMEOUT
+    scheduler_monitor.LIVENESS_TIMEOUT = timedelta(seconds=liveness_timeout)
+    results = {'check_interval': check_interval, 'liveness_timeout': liveness_timeout,
+               'trials': trials}
+    try:
+        for mode, event_driven in (('poll', False), ('event', True)):
+            # The watchdog prints a banner per alert
+            with contextlib.redirect_stdout(io.StringIO()):
+                runs = [_detection_trial(workdir, event_driven, check_interval, tick_interval,
+                                         warmup=max(1.0, check_interval * 1.5),
+                                         timeout=liveness_timeout + check_interval * 5 + 5)
+                        for _ in range(trials)]
+            detect = [r['detect_seconds'] for r in runs if r['detect_seconds'] is not None]
+            alert = [r['alert_seconds'] for r in runs if r['alert_seconds'] is not None]
+            results[mode] = {
+                'spurious_failures': sum(r['spurious_failures'] for r in runs),
+                'detected': len(detect),
+                'alerted': len(alert),
+                'detect_p50_seconds': percentile(detect, 50),
+                'detect_max_seconds': max(detect) if detect else None,
+                'alert_p50_seconds': percentile(alert, 50),
+                'alert_max_seconds': max(alert) if alert else None,
+            }
+    finally:
+        scheduler_monitor.LIVENESS_TIMEOUT = saved_timeout
+    return results
+
+
+def _recovery_trial(workdir: Path, fault: str, check_interval: float, warmup: float,
+                    timeout: float) -> dict:
+    primary = FakeScheduler(workdir / 'recover_primary.json')
+    standby = FakeScheduler(workdir / 'recover_standby.json') if fault == 'failover' else None
+    schedulers = [s for s in (primary, standby) if s is not None]
+    for scheduler in schedulers:
+        scheduler.remove_files()
+    alert_manager = AlertManager({'alert_batch_window': 0, 'dead_letter_file': None}, sinks=[])
+    controller = FakeProcessController(primary, standby)
+    # A failover trial fails over at the first attempt
+    ladders = {'dead': ['failover']} if fault == 'failover' else None
+    remediation = RemediationEngine(controller, primary.state_file, ladders=ladders,
+                                    min_failures=1, backoff_initial=check_interval * 2,
+                                    recheck_interval=check_interval, dump_wait=0.1,
+                                    notify=alert_manager.send_alert)
+    watchdog = None
+    watchdog_thread = None
+    try:
+        primary.start()
+        watchdog = SchedulerWatchdog(check_interval=check_interval,
+                                     checker=ExternalHealthChecker(str(primary.state_file)),
+                                     alert_manager=alert_manager, remediation=remediation)
+        watchdog_thread = threading.Thread(target=watchdog.run, daemon=True)
+        watchdog_thread.start()
+        time.sleep(warmup)
+
+        spurious = len(remediation.recoveries) + remediation.in_incident
+        injected_at = time.monotonic()
+        getattr(primary, 'crash' if fault == 'failover' else fault)()
+        deadline = injected_at + timeout
+        while not remediation.recoveries[spurious:] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        recovered = remediation.recoveries[spurious:]
+        return {
+            'recover_seconds': time.monotonic() - injected_at if recovered else None,
+            # First failed check to the next healthy one, as exported by the watchdog
+            'incident_seconds': recovered[0] if recovered else None,
+            'restarts': primary.restarts,
+            'failed_over': remediation.state_file != primary.state_file,
+            'stacks_dumped': stack_dump_path(primary.state_file).exists()
+                             and stack_dump_path(primary.state_file).stat().st_size > 0,
+            'spurious_incidents': spurious,
+        }
+    finally:
+        if watchdog is not None:
+            watchdog.running = False
+        if watchdog_thread is not None:
+            watchdog_thread.join(check_interval + 1)
+        if watchdog is not None:
+            watchdog.stop()
+        for scheduler in schedulers:
+            scheduler.stop()
+            scheduler.remove_files()
+
+
+def bench_recovery(workdir: Path, trials: int, check_interval: float,
+                   liveness_timeout: float) -> dict:
+    """
+    Fault-to-recovery time with remediation on (min_failures 1). A crash is
+    restarted on the first failed check; a hang is only seen once
+    LIVENESS_TIMEOUT passes, then gets a stack dump and a restart; a stall
+    gets a stack dump, then a restart after the backoff.
+    """
+    saved_timeout = scheduler_monitor.LIVENESS_TIMEOUT
+    scheduler_monitor.LIVENESS_TIMEOUT = timedelta(seconds=liveness_timeout)
+    results = {'check_interval': check_interval, 'liveness_timeout': liveness_timeout,
+               'trials': trials}
+    try:
+        for fault in RECOVERY_FAULTS:
+            with contextlib.redirect_stdout(io.StringIO()):
+                runs = [_recovery_trial(workdir, fault, check_interval,
+                                        warmup=max(1.0, check_interval * 1.5),
+                                        timeout=liveness_timeout + check_interval * 10 + 10)
+                        for _ in range(trials)]
+            recover = [r['recover_seconds'] for r in runs if r['recover_seconds'] is not None]
+            incident = [r['incident_seconds'] for r in runs if r['incident_seconds'] is not None]
+            results[fault] = {
+                'recovered': len(recover),
+                'recover_p50_seconds': percentile(recover, 50),
+                'recover_max_seconds': max(recover) if recover else None,
+                'incident_p50_seconds': percentile(incident, 50),
+                'restarts': sum(r['restarts'] for r in runs),
+                'failovers': sum(r['failed_over'] for r in runs),
+                'stack_dumps': sum(r['stacks_dumped'] for r in runs),
+                'spurious_incidents': sum(r['spurious_incidents'] for r in runs),
+            }
+    finally:
+        scheduler_monitor.LIVENESS_TIMEOUT = saved_timeout
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                              timeout=5).stdout.strip() or 'unknown'
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+
+def run_suite(suites, quick: bool = False, check_interval: float = 1.0,
+              liveness_timeout: float = 2.0, trials: int = 3, clients: int = 8) -> dict:
+    scale = 0.2 if quick else 1.0
+    result = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'quick': quick,
+        }
+    }
+    with tempfile.TemporaryDirectory(prefix='bench_monitor_') as tmp:
+        workdir = Path(tmp)
+        if 'heartbeat' in suites:
+            result['heartbeat'] = bench_heartbeat(workdir, ops=int(2000 * scale))
+        if 'check' in suites:
+            result['check'] = bench_check(workdir, duration=2.0 * scale, writer_hz=100)
+        if 'dashboard' in suites:
+            result['dashboard'] = bench_dashboard(workdir, duration=3.0 * scale, clients=clients)
+        if 'detection' in suites:
+            result['detection'] = bench_detection(workdir, trials=1 if quick else trials,
+                                                  check_interval=check_interval,
+                                                  liveness_timeout=liveness_timeout)
+        if 'recovery' in suites:
+            result['recovery'] = bench_recovery(workdir, trials=1 if quick else trials,
+                                                check_interval=check_interval,
+                                                liveness_timeout=liveness_timeout)
+    return result
+
+
+def _flatten(result: dict, prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    for key, value in result.items():
+        if key == 'meta':
+            continue
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def print_report(result: dict):
+    print("\n" + "="*60)
+    print(f"MONITORING BENCHMARK  (commit {result['meta']['commit']}, "
+          f"{result['meta']['cpus']} CPUs)")
+    print("="*60)
+    for name, runs in result.get('heartbeat', {}).items():
+        for threads, r in runs.items():
+            print(f"{name + ' ' + threads:<26} {r['ops_per_second']:>10.0f} ops/s  "
+                  f"p50 {r['p50_us']:.1f}us  p99 {r['p99_us']:.1f}us")
+    check = result.get('check')
+    if check:
+        for readers, r in check.items():
+            if isinstance(r, dict):
+                print(f"{'check ' + readers:<26} {r['checks_per_second']:>10.0f} checks/s  "
+                      f"p50 {r['p50_us']:.1f}us  p99 {r['p99_us']:.1f}us  "
+                      f"failed {r['failed_checks']}")
+    dashboard = result.get('dashboard')
+    if dashboard:
+        for route, r in dashboard.items():
+            if isinstance(r, dict):
+                print(f"{'GET ' + route:<26} {r['requests_per_second']:>10.0f} req/s  "
+                      f"p50 {r['p50_us'] / 1000:.2f}ms  p99 {r['p99_us'] / 1000:.2f}ms  "
+                      f"({dashboard['clients']} clients)")
+    detection = result.get('detection')
+    if detection:
+        for mode in ('poll', 'event'):
+            r = detection[mode]
+            print(f"{'detection ' + mode:<26} detect p50 {r['detect_p50_seconds']:.2f}s  "
+                  f"alert p50 {r['alert_p50_seconds']:.2f}s  "
+                  f"({r['alerted']}/{detection['trials']} alerted, "
+                  f"{r['spurious_failures']} spurious failures)")
+    recovery = result.get('recovery')
+    if recovery:
+        for fault in RECOVERY_FAULTS:
+            r = recovery[fault]
+            recover = (f"{r['recover_p50_seconds']:.2f}s" if r['recover_p50_seconds'] is not None
+                       else 'n/a')
+            print(f"{'recovery ' + fault:<26} recover p50 {recover}  "
+                  f"({r['recovered']}/{recovery['trials']} recovered, {r['restarts']} restarts, "
+                  f"{r['failovers']} failovers, {r['stack_dumps']} stack dumps)")
+    print("="*60 + "\n")
+
+
+def print_comparison(result: dict, baseline: dict):
+    """Ratio of every numeric result to the same result in `baseline`"""
+    current, previous = _flatten(result), _flatten(baseline)
+    print(f"Compared with commit {baseline.get('meta', {}).get('commit', 'unknown')}:")
+    for name in sorted(current.keys() & previous.keys()):
+        if previous[name]:
+            print(f"  {name:<50} {previous[name]:>12.4g} -> {current[name]:>12.4g}  "
+                  f"({current[name] / previous[name]:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Monitoring stack benchmark suite')
+    parser.add_argument('--suite', type=str, default=','.join(SUITES),
+                        help=f"Comma-separated benchmarks to run (default: {','.join(SUITES)})")
+    parser.add_argument('--quick', action='store_true',
+                        help='Shorter runs and a single detection/recovery trial')
+    parser.add_argument('--clients', type=int, default=8,
+                        help='Concurrent dashboard clients (default: 8)')
+    parser.add_argument('--trials', type=int, default=3,
+                        help='Kill/detect trials per watchdog mode and fault (default: 3)')
+    parser.add_argument('--check-interval', type=float, default=1.0,
+                        help='Watchdog check interval for detection/recovery (default: 1)')
+    parser.add_argument('--liveness-timeout', type=float, default=2.0,
+                        help='LIVENESS_TIMEOUT used by detection/recovery (default: 2)')
+    parser.add_argument('--json', type=str,
+                        help='Write results as JSON to this file')
+    parser.add_argument('--compare', type=str,
+                        help='Print each result relative to this earlier JSON result')
+    args = parser.parse_args()
+
+    suites = [s.strip() for s in args.suite.split(',') if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"Unknown suite(s): {', '.join(sorted(unknown))}")
+
+    # Keep the logging cost in the measurements but off the console
+    setup_logging(console=False, force=True)
+
+    result = run_suite(suites, args.quick, args.check_interval, args.liveness_timeout,
+                       args.trials, args.clients)
+    print_report(result)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(result, json.load(f))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
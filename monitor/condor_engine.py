@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Batch evaluation engine for open iron condor positions
+Loads every open position into NumPy arrays (one row per position, one
+column per leg) and prices all legs with Black-Scholes in a single
+vectorized pass: leg prices and Greeks, net position Greeks, cost to close,
+unrealized P&L and adjustment triggers. Very large books can be sharded
+across a process pool.
+
+Run a synthetic benchmark with: python condor_engine.py --positions 100000
+"""
+import argparse
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime, time as dt_time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+import logging
+
+import numpy as np
+
+try:
+    from scipy.special import ndtr as _ndtr
+except ImportError:
+    _ndtr = None
+
+logger = logging.getLogger(__name__)
+
+# Leg order used for every (n, 4) array
+LEGS = ('long_put', 'short_put', 'short_call', 'long_call')
+IS_CALL = np.array([False, False, True, True])
+# +1 for legs we own, -1 for legs we are short
+LEG_SIGN = np.array([1.0, -1.0, -1.0, 1.0])
+
+SECONDS_PER_YEAR = 365.0 * 24 * 3600
+# Options expire at the 16:00 New York close; expiry dates without a time get
+# this one, and naive expiry times are read as exchange time
+EXPIRY_TIME = dt_time(16, 0)
+EXPIRY_TZ = ZoneInfo("America/New_York")
+MIN_YEARS = 1e-6
+
+# Adjustment trigger bits in BookEvaluation.flags
+PROFIT_TARGET = 1
+STOP_LOSS = 2
+SHORT_PUT_TESTED = 4
+SHORT_CALL_TESTED = 8
+EXPIRY_NEAR = 16
+NO_QUOTE = 32
+
+TRIGGER_NAMES = {
+    PROFIT_TARGET: 'profit_target',
+    STOP_LOSS: 'stop_loss',
+    SHORT_PUT_TESTED: 'short_put_tested',
+    SHORT_CALL_TESTED: 'short_call_tested',
+    EXPIRY_NEAR: 'expiry_near',
+    NO_QUOTE: 'no_quote',
+}
+
+OPEN_POSITIONS_SQL = """
+    SELECT position_id, symbol, expiry_date,
+           long_put_strike, short_put_strike, short_call_strike, long_call_strike,
+           long_put_entry_price, short_put_entry_price,
+           short_call_entry_price, long_call_entry_price,
+           total_credit, max_risk, entry_iv, profit_target_min, stop_loss_price
+    FROM iron_condor_positions
+    WHERE status = 'open'
+"""
+
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal CDF (scipy when installed, else an erf approximation good to ~1e-7)"""
+    if _ndtr is not None:
+        return _ndtr(x)
+    # Abramowitz & Stegun 7.1.26 applied to erf(|x| / sqrt(2))
+    z = np.abs(x) / math.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741
+                + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.copysign(erf, x))
+
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / math.sqrt(2.0 * math.pi)
+
+
+@dataclass
+class EvaluationConfig:
+    """Thresholds for adjustment triggers"""
+    rate: float = 0.045               # risk-free rate, annualized
+    profit_take: float = 0.5          # close once this fraction of the credit is captured
+    stop_multiple: float = 2.0        # stop once cost to close reaches this multiple of the credit
+    short_delta_limit: float = 0.30   # a short leg is "tested" beyond this |delta|
+    exit_dte: float = 7.0             # flag positions this many days from expiry
+
+
+@dataclass
+class PositionBook:
+    """
+    Open positions as column arrays. Strike and price columns are (n, 4) in
+    LEGS order; prices, credit and P&L are per share, like the position table.
+    """
+    position_id: np.ndarray           # object
+    symbol: np.ndarray                # object
+    expiry_ts: np.ndarray             # epoch seconds of the expiry close
+    strikes: np.ndarray               # (n, 4)
+    entry_prices: np.ndarray          # (n, 4)
+    total_credit: np.ndarray
+    max_risk: np.ndarray
+    entry_iv: np.ndarray              # NaN when unknown
+    profit_target: np.ndarray         # NaN -> profit_take * credit
+    stop_loss_price: np.ndarray       # NaN -> stop_multiple * credit
+
+    def __len__(self) -> int:
+        return len(self.position_id)
+
+    @property
+    def symbols(self) -> List[str]:
+        return sorted(set(self.symbol.tolist()))
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple]) -> 'PositionBook':
+        """Build from rows in OPEN_POSITIONS_SQL column order"""
+        n = len(rows)
+        book = cls(
+            position_id=np.empty(n, dtype=object),
+            symbol=np.empty(n, dtype=object),
+            expiry_ts=np.empty(n),
+            strikes=np.empty((n, 4)),
+            entry_prices=np.empty((n, 4)),
+            total_credit=np.empty(n),
+            max_risk=np.empty(n),
+            entry_iv=np.empty(n),
+            profit_target=np.empty(n),
+            stop_loss_price=np.empty(n),
+        )
+        for i, row in enumerate(rows):
+            (position_id, symbol, expiry, lp, sp, sc, lc, lp_px, sp_px, sc_px, lc_px,
+             credit, max_risk, entry_iv, target, stop) = row
+            if not isinstance(expiry, datetime):
+                expiry = datetime.combine(expiry, EXPIRY_TIME, EXPIRY_TZ)
+            elif expiry.tzinfo is None:
+                if expiry.time() == dt_time(0, 0):
+                    expiry = datetime.combine(expiry.date(), EXPIRY_TIME)
+                expiry = expiry.replace(tzinfo=EXPIRY_TZ)
+            book.position_id[i] = str(position_id)
+            book.symbol[i] = symbol
+            book.expiry_ts[i] = expiry.timestamp()
+            book.strikes[i] = (lp, sp, sc, lc)
+            book.entry_prices[i] = (lp_px, sp_px, sc_px, lc_px)
+            book.total_credit[i] = credit
+            book.max_risk[i] = max_risk
+            book.entry_iv[i] = np.nan if entry_iv is None else entry_iv
+            book.profit_target[i] = np.nan if target is None else target
+            book.stop_loss_price[i] = np.nan if stop is None else stop
+        # entry_iv may be stored in percent (18.5) rather than as a fraction (0.185)
+        book.entry_iv = np.where(book.entry_iv > 3.0, book.entry_iv / 100.0, book.entry_iv)
+        return book
+
+    @classmethod
+    def load_open(cls, db_url: str) -> 'PositionBook':
+        """All open positions from iron_condor_positions in one query"""
+        import psycopg2
+
+        conn = psycopg2.connect(db_url)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(OPEN_POSITIONS_SQL)
+                rows = cur.fetchall()
+        finally:
+            conn.close()
+        return cls.from_rows(rows)
+
+    @classmethod
+    def synthetic(cls, n: int, symbols: Sequence[str] = ('SPY', 'QQQ', 'IWM', 'DIA'),
+                  spot: float = 500.0, seed: int = 7) -> 'PositionBook':
+        """Random but plausible condors around `spot`, for benchmarks"""
+        rng = np.random.default_rng(seed)
+        short_put = spot * (1 - rng.uniform(0.02, 0.08, n))
+        short_call = spot * (1 + rng.uniform(0.02, 0.08, n))
+        width = rng.choice([5.0, 10.0], n)
+        strikes = np.stack([short_put - width, short_put, short_call, short_call + width], axis=1)
+        entry = np.stack([rng.uniform(0.3, 0.8, n), rng.uniform(1.0, 2.0, n),
+                          rng.uniform(1.0, 2.0, n), rng.uniform(0.3, 0.8, n)], axis=1)
+        credit = entry[:, 1] + entry[:, 2] - entry[:, 0] - entry[:, 3]
+        return cls(
+            position_id=np.array([f"syn-{i}" for i in range(n)], dtype=object),
+            symbol=np.array(symbols, dtype=object)[rng.integers(0, len(symbols), n)],
+            expiry_ts=time.time() + rng.uniform(1, 45, n) * 86400,
+            strikes=strikes,
+            entry_prices=entry,
+            total_credit=credit,
+            max_risk=width - credit,
+            entry_iv=rng.uniform(0.12, 0.30, n),
+            profit_target=np.full(n, np.nan),
+            stop_loss_price=np.full(n, np.nan),
+        )
+
+
+@dataclass
+class BookEvaluation:
+    """Per-position results, row-aligned with the PositionBook they came from"""
+    position_id: np.ndarray
+    symbol: np.ndarray
+    spot: np.ndarray
+    dte: np.ndarray
+    leg_price: np.ndarray             # (n, 4) theoretical price per leg
+    leg_delta: np.ndarray             # (n, 4)
+    net_delta: np.ndarray
+    net_gamma: np.ndarray
+    net_theta: np.ndarray             # per calendar day
+    net_vega: np.ndarray              # per 1 vol point
+    current_value: np.ndarray         # cost to close (shorts minus longs)
+    unrealized_pnl: np.ndarray        # total_credit - current_value
+    flags: np.ndarray                 # OR of trigger bits
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.position_id)
+
+    def adjustments(self) -> List[Dict]:
+        """Positions with at least one trigger, worst P&L first"""
+        flagged = np.flatnonzero(self.flags)
+        flagged = flagged[np.argsort(self.unrealized_pnl[flagged])]
+        return [
+            {
+                'position_id': self.position_id[i],
+                'symbol': self.symbol[i],
+                'triggers': [name for bit, name in TRIGGER_NAMES.items() if self.flags[i] & bit],
+                'spot': float(self.spot[i]),
+                'dte': float(self.dte[i]),
+                'current_value': float(self.current_value[i]),
+                'unrealized_pnl': float(self.unrealized_pnl[i]),
+                'net_delta': float(self.net_delta[i]),
+            }
+            for i in flagged
+        ]
+
+
+def market_inputs(book: PositionBook, spot: Dict[str, float],
+                  iv: Optional[Dict[str, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-position underlying price and volatility. `spot` maps symbol ->
+    price; `iv` optionally maps symbol -> implied vol (fraction), falling back
+    to each position's entry IV and then to 20%.
+    """
+    iv = iv or {}
+    # Per-symbol inputs broadcast to positions through one index array
+    symbols, symbol_idx = np.unique(book.symbol.astype(str), return_inverse=True)
+    S = np.array([spot.get(s, np.nan) for s in symbols])[symbol_idx]
+    sym_iv = np.array([iv.get(s, np.nan) for s in symbols])[symbol_idx]
+    sigma = np.where(np.isnan(sym_iv), book.entry_iv, sym_iv)
+    sigma = np.where(np.isnan(sigma) | (sigma <= 0), 0.20, sigma)
+    return S, sigma
+
+
+def price_positions(S: np.ndarray, sigma: np.ndarray, expiry_ts: np.ndarray,
+                    strikes: np.ndarray, total_credit: np.ndarray,
+                    profit_target: np.ndarray, stop_loss_price: np.ndarray,
+                    config: EvaluationConfig, now: float) -> Dict[str, np.ndarray]:
+    """Black-Scholes for all legs plus triggers; purely numeric so shards pickle cheaply"""
+    n = len(S)
+    T = np.maximum((expiry_ts - now) / SECONDS_PER_YEAR, MIN_YEARS)
+    K = strikes
+    S2, sigma2, T2 = S[:, None], sigma[:, None], T[:, None]
+    sqrt_T = np.sqrt(T2)
+    vol_sqrt_T = sigma2 * sqrt_T
+    discount = np.exp(-config.rate * T2)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        d1 = (np.log(S2 / K) + (config.rate + 0.5 * sigma2 ** 2) * T2) / vol_sqrt_T
+    d2 = d1 - vol_sqrt_T
+    nd1, nd2 = norm_cdf(d1), norm_cdf(d2)
+    pdf_d1 = norm_pdf(d1)
+
+    call_price = S2 * nd1 - K * discount * nd2
+    put_price = call_price - S2 + K * discount          # put-call parity
+    price = np.where(IS_CALL, call_price, put_price)
+    delta = np.where(IS_CALL, nd1, nd1 - 1.0)
+    gamma = pdf_d1 / (S2 * vol_sqrt_T)
+    vega = S2 * pdf_d1 * sqrt_T / 100.0
+    decay = -S2 * pdf_d1 * sigma2 / (2.0 * sqrt_T)
+    carry = config.rate * K * discount
+    theta = np.where(IS_CALL, decay - carry * nd2, decay + carry * (1.0 - nd2)) / 365.0
+
+    current_value = -(price @ LEG_SIGN)
+    pnl = total_credit - current_value
+    dte = (expiry_ts - now) / 86400.0
+
+    target = np.where(np.isnan(profit_target), config.profit_take * total_credit, profit_target)
+    stop = np.where(np.isnan(stop_loss_price), config.stop_multiple * total_credit, stop_loss_price)
+
+    flags = np.zeros(n, dtype=np.int32)
+    flags |= np.where(pnl >= target, PROFIT_TARGET, 0)
+    flags |= np.where(current_value >= stop, STOP_LOSS, 0)
+    flags |= np.where((S <= K[:, 1]) | (np.abs(delta[:, 1]) >= config.short_delta_limit),
+                      SHORT_PUT_TESTED, 0)
+    flags |= np.where((S >= K[:, 2]) | (np.abs(delta[:, 2]) >= config.short_delta_limit),
+                      SHORT_CALL_TESTED, 0)
+    flags |= np.where(dte <= config.exit_dte, EXPIRY_NEAR, 0)
+    # Without a quote every comparison above is False; report that instead
+    flags = np.where(np.isnan(S), NO_QUOTE, flags).astype(np.int32)
+
+    return {
+        'spot': S,
+        'dte': dte,
+        'leg_price': price,
+        'leg_delta': delta,
+        'net_delta': delta @ LEG_SIGN,
+        'net_gamma': gamma @ LEG_SIGN,
+        'net_theta': theta @ LEG_SIGN,
+        'net_vega': vega @ LEG_SIGN,
+        'current_value': current_value,
+        'unrealized_pnl': pnl,
+        'flags': flags,
+    }
+
+
+def evaluate_book(book: PositionBook, spot: Dict[str, float],
+                  iv: Optional[Dict[str, float]] = None,
+                  config: EvaluationConfig = None, now: float = None) -> BookEvaluation:
+    """Price every leg of every position in one vectorized pass"""
+    config = config or EvaluationConfig()
+    now = time.time() if now is None else now
+    S, sigma = market_inputs(book, spot, iv)
+    columns = price_positions(S, sigma, book.expiry_ts, book.strikes, book.total_credit,
+                              book.profit_target, book.stop_loss_price, config, now)
+    return BookEvaluation(position_id=book.position_id, symbol=book.symbol, **columns)
+
+
+def _price_shard(args) -> Dict[str, np.ndarray]:
+    return price_positions(*args)
+
+
+class CondorEvaluationEngine:
+    """
+    Runs load -> market data -> evaluate for the scheduler, timing each stage
+    through SchedulerMonitor.track_job() when a monitor is given. Books with at
+    least `shard_threshold` positions are split across `workers` processes.
+    """
+
+    def __init__(self, config: EvaluationConfig = None, monitor=None,
+                 workers: int = 0, shard_threshold: int = 50000):
+        self.config = config or EvaluationConfig()
+        self.monitor = monitor
+        self.workers = workers
+        self.shard_threshold = shard_threshold
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _stage(self, name: str):
+        if self.monitor is None:
+            return nullcontext()
+        return self.monitor.track_job(f"iron_condor_check.{name}")
+
+    def evaluate(self, book: PositionBook, spot: Dict[str, float],
+                 iv: Optional[Dict[str, float]] = None, now: float = None) -> BookEvaluation:
+        if self.workers <= 1 or len(book) < self.shard_threshold:
+            return evaluate_book(book, spot, iv, self.config, now)
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        now = time.time() if now is None else now
+        # Symbols are resolved here so workers only receive float arrays
+        S, sigma = market_inputs(book, spot, iv)
+        shard = math.ceil(len(book) / self.workers)
+        jobs = [
+            (S[i:i + shard], sigma[i:i + shard], book.expiry_ts[i:i + shard],
+             book.strikes[i:i + shard], book.total_credit[i:i + shard],
+             book.profit_target[i:i + shard], book.stop_loss_price[i:i + shard],
+             self.config, now)
+            for i in range(0, len(book), shard)
+        ]
+        parts = list(self._pool.map(_price_shard, jobs))
+        columns = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        return BookEvaluation(position_id=book.position_id, symbol=book.symbol, **columns)
+
+    def run(self, load_book: Callable[[], PositionBook],
+            load_market: Callable[[List[str]], Tuple[Dict[str, float], Optional[Dict[str, float]]]]
+            ) -> BookEvaluation:
+        """
+        One scheduler cycle. `load_book` returns the open positions and
+        `load_market(symbols)` returns (spot, iv) dicts for those symbols.
+        """
+        timings = {}
+
+        start = time.perf_counter()
+        with self._stage('load_positions'):
+            book = load_book()
+        timings['load_positions'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with self._stage('load_market'):
+            spot, iv = load_market(book.symbols) if len(book) else ({}, None)
+        timings['load_market'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with self._stage('evaluate'):
+            result = self.evaluate(book, spot, iv)
+        timings['evaluate'] = time.perf_counter() - start
+
+        result.timings = timings
+        logger.info(f"Evaluated {len(book)} positions: " +
+                    ", ".join(f"{stage} {seconds * 1000:.1f}ms" for stage, seconds in timings.items()))
+        return result
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def polygon_spot_prices(symbols: List[str], api_key: str,
+                        timeout: float = 10.0) -> Dict[str, float]:
+    """Latest underlying prices for all symbols from one Polygon snapshot request"""
+    import requests
+
+    response = requests.get(
+        "https://api.polygon.io/v2/snapshot/locale/us/markets/stocks/tickers",
+        params={'tickers': ','.join(symbols), 'apiKey': api_key},
+        timeout=timeout
+    )
+    response.raise_for_status()
+    prices = {}
+    for ticker in response.json().get('tickers', []):
+        price = ((ticker.get('lastTrade') or {}).get('p')
+                 or (ticker.get('day') or {}).get('c')
+                 or (ticker.get('prevDay') or {}).get('c'))
+        if price:
+            prices[ticker['ticker']] = float(price)
+    return prices
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Iron condor evaluation benchmark')
+    parser.add_argument('--positions', type=int, default=100000,
+                        help='Number of synthetic positions (default: 100000)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Shard across this many processes (default: single process)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Timed evaluations to run (default: 5)')
+    args = parser.parse_args()
+
+    book = PositionBook.synthetic(args.positions)
+    spot = {symbol: 500.0 for symbol in book.symbols}
+    engine = CondorEvaluationEngine(workers=args.workers, shard_threshold=1)
+
+    try:
+        engine.evaluate(book, spot)  # warm up (and start the pool)
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = engine.evaluate(book, spot)
+            times.append(time.perf_counter() - start)
+    finally:
+        engine.close()
+
+    best = min(times)
+    print(f"{len(book)} positions ({len(book) * 4} legs), workers={args.workers}: "
+          f"best {best * 1000:.1f}ms, {len(book) / best:,.0f} positions/s")
+    print(f"Positions needing attention: {len(result.adjustments())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,12 @@ Example integration of SchedulerMonitor with your iron condor scheduler
 
 This shows how to integrate the monitoring into your existing scheduler code.
 """
-from apscheduler.schedulers.blocking import BlockingScheduler
-from scheduler_monitor import SchedulerMonitor
+import os
+from datetime import datetime
+from condor_engine import CondorEvaluationEngine, PositionBook, polygon_spot_prices
+from job_scheduling import SchedulingReporter, build_scheduler
+from metrics import start_http_server
+from scheduler_monitor import ExternalHealthChecker, SchedulerMonitor, describe_health
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,9 +18,17 @@ logger = logging.getLogger(__name__)
 class MonitoredIronCondorScheduler:
     """Example of your scheduler with monitoring integrated"""
     
-    def __init__(self):
-        self.scheduler = BlockingScheduler()
+    def __init__(self, workers: int = 0, scheduling: dict = None):
+        # Thread pool executor so a long check never delays the liveness job;
+        # misfires, skipped runs and queue wait are reported to the monitor
+        self.scheduler = build_scheduler(scheduling)
         self.monitor = SchedulerMonitor(state_file="/tmp/scheduler_state.json")
+        SchedulingReporter(self.monitor).attach(self.scheduler)
+        
+        # Batch evaluation of all open positions; each stage is timed by the monitor
+        self.db_url = os.getenv("DATABASE_URL")
+        self.polygon_api_key = os.getenv("POLYGON_API_KEY", "")
+        self.engine = CondorEvaluationEngine(monitor=self.monitor, workers=workers)
         
         # Set up your existing jobs
         self._setup_jobs()
@@ -30,17 +42,33 @@ class MonitoredIronCondorScheduler:
             minute='*/5',
             hour='9-16',  # Market hours
             day_of_week='mon-fri',
-            id='iron_condor_check'
+            id='iron_condor_check',
+            max_instances=1,         # never overlap a still-running check
+            coalesce=True,           # after a stall, run once rather than catching up
+            misfire_grace_time=120   # a check more than 2 minutes late is dropped
         )
         
-        # Heartbeat job - updates status every 30 seconds
+        # Liveness tick every 15 seconds - shared memory only, no state file write,
+        # and it does not count as an execution
         self.scheduler.add_job(
-            func=self.monitor.heartbeat,
+            func=self.monitor.tick,
             trigger='interval',
-            seconds=30,
-            id='heartbeat'
+            seconds=15,
+            id='liveness',
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=10
         )
     
+    def _expect_next_check(self, save: bool = False):
+        """Judge progress against the check schedule, so nights and weekends stay healthy"""
+        job = self.scheduler.get_job('iron_condor_check')
+        next_run = getattr(job, 'next_run_time', None)
+        if next_run is None:
+            # Not started yet: ask the trigger directly
+            next_run = job.trigger.get_next_fire_time(None, datetime.now(job.trigger.timezone))
+        self.monitor.expect_next_execution(next_run, save=save)
+    
     def check_iron_condors(self):
         """Your actual iron condor checking logic"""
         try:
@@ -53,10 +81,12 @@ class MonitoredIronCondorScheduler:
             # - Determine if adjustment needed
             # - Execute trades if necessary
             
-            # Simulate work
-            self._do_iron_condor_checks()
+            # Simulate work (timed into scheduler_job_duration_seconds)
+            with self.monitor.track_job('iron_condor_check'):
+                self._do_iron_condor_checks()
             
-            # Record successful execution
+            # Record successful execution (and when the next one is due)
+            self._expect_next_check()
             self.monitor.heartbeat()
             
             logger.info("Iron condor check completed successfully")
@@ -68,28 +98,42 @@ class MonitoredIronCondorScheduler:
     
     def _do_iron_condor_checks(self):
         """
-        Replace this with your actual iron condor logic
-        This is where you'd:
-        - Fetch positions from Alpaca
-        - Calculate current Greeks
-        - Check against your thresholds
-        - Execute adjustments if needed
+        Evaluate every open position in one vectorized pass:
+        - Load open positions from iron_condor_positions
+        - Fetch underlying prices (one Polygon snapshot call)
+        - Calculate current Greeks, P&L and adjustment triggers
+        Executing the adjustments is left to your order logic.
         """
-        # Placeholder for your logic
-        pass
+        if not self.db_url:
+            logger.warning("DATABASE_URL not set, skipping position evaluation")
+            return
+        
+        evaluation = self.engine.run(
+            lambda: PositionBook.load_open(self.db_url),
+            lambda symbols: (polygon_spot_prices(symbols, self.polygon_api_key), None)
+        )
+        for adjustment in evaluation.adjustments():
+            logger.warning(f"Position {adjustment['position_id']} ({adjustment['symbol']}) "
+                           f"needs attention: {', '.join(adjustment['triggers'])}, "
+                           f"P&L {adjustment['unrealized_pnl']:.2f}")
     
     def run(self):
         """Start the scheduler"""
         logger.info("Starting monitored iron condor scheduler")
+        self.monitor.start()
+        self._expect_next_check(save=True)
         try:
             self.scheduler.start()
         except (KeyboardInterrupt, SystemExit):
             logger.info("Scheduler stopped")
+        finally:
+            self.engine.close()
     
     def status(self):
         """Get current status (for --status command)"""
-        status = self.monitor.get_status()
-        is_healthy, message = self.monitor.check_health()
+        # Runs in its own process, so judge the scheduler from outside
+        _, status = ExternalHealthChecker(self.monitor.state_file).check()
+        is_healthy, message = describe_health(status)
         
         print(f"\nScheduler Status: {message}")
         print(f"Total Executions: {status.total_executions}")
@@ -107,14 +151,37 @@ def main():
     parser = argparse.ArgumentParser(description='Iron Condor Scheduler')
     parser.add_argument('--status', action='store_true',
                        help='Show scheduler status and exit')
+    parser.add_argument('--metrics-port', type=int,
+                       help='Serve Prometheus metrics on this port')
+    parser.add_argument('--workers', type=int, default=0,
+                       help='Shard very large position books across this many processes')
+    parser.add_argument('--status-socket', type=str,
+                       help='Answer PING/HEALTH/STATUS on this Unix socket path')
+    parser.add_argument('--thread-workers', type=int, default=10,
+                       help='Scheduler thread pool size (default: 10)')
+    parser.add_argument('--profile-slow-jobs', type=float, metavar='SECONDS',
+                       help='Sample the stack of tracked jobs that run longer than this')
+    parser.add_argument('--stack-dumps', action='store_true',
+                       help='Dump all thread stacks on SIGUSR1 (sent by watchdog remediation)')
     
     args = parser.parse_args()
     
-    scheduler = MonitoredIronCondorScheduler()
+    scheduler = MonitoredIronCondorScheduler(
+        workers=args.workers,
+        scheduling={'thread_workers': args.thread_workers}
+    )
     
     if args.status:
         scheduler.status()
     else:
+        if args.metrics_port:
+            start_http_server(args.metrics_port)
+        if args.status_socket:
+            scheduler.monitor.serve_status_socket(args.status_socket)
+        if args.profile_slow_jobs:
+            scheduler.monitor.enable_slow_job_profiling(budget=args.profile_slow_jobs)
+        if args.stack_dumps:
+            scheduler.monitor.enable_stack_dumps()
         scheduler.run()
 
 
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+In-process stand-ins for alert destinations
+FakeSMTPServer and FakeHTTPReceiver accept alerts on localhost and record
+when each one arrived, so alerting can be tested and benchmarked offline.
+"""
+import json
+import socketserver
+import threading
+import time
+from dataclasses import dataclass, field
+from email import message_from_bytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+
+@dataclass
+class ReceivedAlert:
+    """One alert as seen by a fake receiver"""
+    received: float
+    created: Optional[float]
+    subject: str
+    body: str = ""
+    headers: dict = field(default_factory=dict)
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Seconds from the alert being raised to it arriving here"""
+        if self.created is None:
+            return None
+        return self.received - self.created
+
+
+class _ReceiverMixin:
+    """Shared bookkeeping for the fake servers"""
+
+    def _init_received(self):
+        self.received: List[ReceivedAlert] = []
+        self._received_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, alert: ReceivedAlert):
+        with self._received_lock:
+            self.received.append(alert)
+
+    def wait_for(self, count: int, timeout: float = 10.0) -> bool:
+        """Block until at least `count` alerts arrived"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._received_lock:
+                if len(self.received) >= count:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def _parse_created(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO, AUTH, MAIL, RCPT, DATA, NOOP, RSET, QUIT"""
+
+    def reply(self, line: str):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 fake-smtp ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+
+            if verb == 'EHLO':
+                self.wfile.write(b"250-fake-smtp\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+            elif verb == 'HELO':
+                self.reply("250 fake-smtp")
+            elif verb == 'AUTH':
+                self.reply("235 2.7.0 Authentication successful")
+            elif verb in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self.reply("250 OK")
+            elif verb == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                self._read_message()
+                self.reply("250 OK queued")
+            elif verb == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+    def _read_message(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            if line.startswith(b".."):
+                line = line[1:]
+            lines.append(line)
+        received = time.time()
+        message = message_from_bytes(b"".join(lines))
+        body = ""
+        for part in message.walk():
+            if part.get_content_type() == 'text/plain':
+                body = part.get_payload(decode=True).decode(errors='replace')
+                break
+        self.server.record(ReceivedAlert(
+            received=received,
+            created=_parse_created(message.get('X-Alert-Created')),
+            subject=message.get('Subject', ''),
+            body=body,
+            headers=dict(message.items()),
+        ))
+
+
+class FakeSMTPServer(_ReceiverMixin, socketserver.ThreadingTCPServer):
+    """Local SMTP server that accepts everything (use starttls=False)"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _SMTPHandler)
+        self._init_received()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length)
+        received = time.time()
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            payload = {}
+        subject = payload.get('subject') or payload.get('text', '').split('\n', 1)[0]
+        self.server.record(ReceivedAlert(
+            received=received,
+            created=_parse_created(self.headers.get('X-Alert-Created')),
+            subject=subject,
+            body=payload.get('message') or payload.get('text', ''),
+            headers=dict(self.headers.items()),
+        ))
+        status = self.server.status_code
+        self.send_response(status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeHTTPReceiver(_ReceiverMixin, ThreadingHTTPServer):
+    """Local webhook endpoint (works for both Slack and generic webhook sinks)"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, status_code: int = 200):
+        super().__init__((host, port), _HTTPHandler)
+        self.status_code = status_code
+        self._init_received()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/hook"
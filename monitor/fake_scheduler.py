@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the scheduler process
+FakeScheduler runs a small child process that keeps a SchedulerMonitor
+alive (liveness ticks, heartbeats, stack dumps on SIGUSR1) and can be told
+to fail the way a real scheduler does, so remediation can be tested and
+benchmarked without systemd:
+
+    crash()   the process exits                       -> dead
+    hang()    it stops ticking but stays alive        -> hung
+    stall()   it ticks but stops executing jobs       -> stalled
+    errors()  it records a burst of errors            -> errors
+
+FakeProcessController restarts and fails over between FakeSchedulers the
+way SystemdController does between units.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from remediation import ProcessController
+from scheduler_monitor import liveness_path, stack_dump_path
+
+
+class FakeScheduler:
+    """A scheduler child process writing `state_file`"""
+
+    def __init__(self, state_file, tick: float = 0.05, beat: float = 0.25):
+        self.state_file = Path(state_file)
+        self.tick = tick
+        self.beat = beat
+        self.restarts = 0
+        self._process: Optional[subprocess.Popen] = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self.running else None
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> 'FakeScheduler':
+        """Start the child and wait until it has written its state"""
+        self._process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), str(self.state_file),
+             str(self.tick), str(self.beat)],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+        self._process.stdout.readline()
+        return self
+
+    def stop(self):
+        if self._process is None:
+            return
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+        for stream in (self._process.stdin, self._process.stdout):
+            stream.close()
+        self._process = None
+
+    def restart(self):
+        self.stop()
+        self.restarts += 1
+        self.start()
+
+    def remove_files(self):
+        """Delete the state, beacon and stack dump files"""
+        for path in (self.state_file, liveness_path(self.state_file),
+                     stack_dump_path(self.state_file)):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _send(self, command: str):
+        self._process.stdin.write(command + '\n')
+        self._process.stdin.flush()
+
+    def crash(self):
+        self._send('crash')
+        self._process.wait()
+
+    def hang(self):
+        self._send('hang')
+
+    def stall(self):
+        self._send('stall')
+
+    def errors(self):
+        self._send('errors')
+
+
+class FakeProcessController(ProcessController):
+    """Restarts a FakeScheduler; failover stops it and starts the standby"""
+
+    name = "fake"
+
+    def __init__(self, primary: FakeScheduler, standby: FakeScheduler = None):
+        self.schedulers = {primary.state_file: primary}
+        self.standby = standby
+        if standby is not None:
+            self.schedulers[standby.state_file] = standby
+
+    @property
+    def can_failover(self) -> bool:
+        return self.standby is not None
+
+    def restart(self, state_file: Path):
+        self.schedulers[Path(state_file)].restart()
+
+    def failover(self, state_file: Path) -> Path:
+        if self.standby is None:
+            return super().failover(state_file)
+        primary = self.schedulers[Path(state_file)]
+        primary.stop()
+        active, self.standby = self.standby, primary
+        if not active.running:
+            active.start()
+        return active.state_file
+
+
+def _child(state_file: str, tick: float, beat: float):
+    """Child process body: tick and heartbeat until told to fail"""
+    from scheduler_monitor import SchedulerMonitor
+
+    monitor = SchedulerMonitor(state_file)
+    monitor.enable_stack_dumps()
+    mode = {'value': 'ok'}
+
+    def commands():
+        for line in sys.stdin:
+            command = line.strip()
+            if command == 'crash':
+                os._exit(1)
+            if command == 'errors':
+                for n in range(11):
+                    monitor.record_error(f"fake error {n}")
+            else:
+                mode['value'] = command
+
+    threading.Thread(target=commands, daemon=True).start()
+    def expect():
+        # A missed heartbeat shows up as overdue after two beats
+        monitor.expect_next_execution(datetime.now() + timedelta(seconds=beat),
+                                      grace=timedelta(seconds=beat))
+
+    expect()
+    monitor.heartbeat()
+    print('ready', flush=True)
+
+    last_beat = time.monotonic()
+    while True:
+        if mode['value'] == 'hang':
+            threading.Event().wait()
+        now = time.monotonic()
+        if mode['value'] == 'ok' and now - last_beat >= beat:
+            expect()
+            monitor.heartbeat()
+            last_beat = now
+        else:
+            monitor.tick()
+        time.sleep(tick)
+
+
+if __name__ == '__main__':
+    _child(sys.argv[1], float(sys.argv[2]), float(sys.argv[3]))
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Technical indicators over cached bar series
+Each indicator is computed two ways that produce the same values:
+  compute(cols)  vectorized over a whole series with NumPy (initial load), and
+                 leaves the rolling state positioned after the last bar
+  step(...)      advances that state by one bar in O(1) (intraday updates)
+Rolling state is a handful of scalars plus at most one window-sized ring, so
+it is cheap to copy and keep next to the cached bars.
+
+Indicators are requested as a comma-separated spec, e.g.
+    sma:20,ema:12,vwap,rsi:14,bb:20:2
+Values before an indicator has enough bars are NaN (null in JSON).
+"""
+import copy
+import math
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+try:
+    from scipy.signal import lfilter as _lfilter
+except ImportError:
+    _lfilter = None
+
+SESSION_TZ = ZoneInfo("America/New_York")
+
+
+def _recursive_smooth(x: np.ndarray, alpha: float, seed: float) -> np.ndarray:
+    """y[i] = y[i-1] + alpha * (x[i] - y[i-1]) starting from y[-1] = seed"""
+    if not len(x):
+        return np.empty(0)
+    if _lfilter is not None:
+        y, _ = _lfilter([alpha], [1.0, alpha - 1.0], x, zi=[(1.0 - alpha) * seed])
+        return y
+    y = np.empty(len(x))
+    prev = seed
+    for i, value in enumerate(x.tolist()):
+        prev += alpha * (value - prev)
+        y[i] = prev
+    return y
+
+
+def _rolling_mean_std(x: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Trailing n-bar mean and population std (NaN until n bars)"""
+    mean = np.full(len(x), np.nan)
+    std = np.full(len(x), np.nan)
+    if len(x) < n:
+        return mean, std
+    windows = np.lib.stride_tricks.sliding_window_view(x, n)
+    mean[n - 1:] = windows.mean(axis=1)
+    std[n - 1:] = windows.std(axis=1)
+    return mean, std
+
+
+def session_key(t_ms: int) -> int:
+    """Trading-session date of a bar (as an ordinal), in exchange time"""
+    return datetime.fromtimestamp(t_ms / 1000, SESSION_TZ).toordinal()
+
+
+def session_keys(t_ms: np.ndarray) -> np.ndarray:
+    """session_key() for many bars; UTC offsets only change on the hour, so look up one per hour"""
+    hours, inverse = np.unique(np.asarray(t_ms, dtype=np.int64) // 3_600_000, return_inverse=True)
+    offsets_ms = np.array([
+        datetime.fromtimestamp(h * 3600, SESSION_TZ).utcoffset().total_seconds() * 1000 for h in hours.tolist()
+    ], dtype=np.int64)
+    local_ms = np.asarray(t_ms, dtype=np.int64) + offsets_ms[inverse.reshape(-1)]
+    # Day 0 of the epoch is ordinal 719163
+    return local_ms // 86_400_000 + 719163
+
+
+class Indicator:
+    """Base class; subclasses name their output series in `outputs`"""
+
+    kind = ''
+    outputs: Tuple[str, ...] = ()
+    params: Tuple = ()
+    # Most spec parameters the constructor takes, e.g. 'bb:20:2' -> 2
+    max_params = 1
+
+    def compute(self, cols: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        raise NotImplementedError
+
+    def step(self, t: int, high: float, low: float, close: float, volume: float) -> Tuple[float, ...]:
+        raise NotImplementedError
+
+    def copy(self) -> 'Indicator':
+        return copy.deepcopy(self)
+
+    def fresh(self) -> 'Indicator':
+        """Same indicator with empty state"""
+        return type(self)(*self.params)
+
+
+class _Window(Indicator):
+    """Trailing-window indicator keeping the last n closes and their running sums"""
+
+    def __init__(self, n: int):
+        if n < 1:
+            raise ValueError(f"{self.kind} window must be positive")
+        self.n = n
+        self.params = (n,)
+        self.ring: deque = deque(maxlen=n)
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def _seed(self, close: np.ndarray):
+        tail = close[-self.n:].tolist()
+        self.ring = deque(tail, maxlen=self.n)
+        self.total = math.fsum(tail)
+        self.total_sq = math.fsum(v * v for v in tail)
+
+    def _push(self, close: float) -> bool:
+        if len(self.ring) == self.n:
+            old = self.ring[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.ring.append(close)
+        self.total += close
+        self.total_sq += close * close
+        return len(self.ring) == self.n
+
+
+class SMA(_Window):
+    kind = 'sma'
+
+    def __init__(self, n: int = 20):
+        super().__init__(n)
+        self.outputs = (f"sma{n}",)
+
+    def compute(self, cols):
+        close = cols['close']
+        mean, _ = _rolling_mean_std(close, self.n)
+        self._seed(close)
+        return {self.outputs[0]: mean}
+
+    def step(self, t, high, low, close, volume):
+        full = self._push(close)
+        return (self.total / self.n if full else math.nan,)
+
+
+class Bollinger(_Window):
+    kind = 'bb'
+    max_params = 2
+
+    def __init__(self, n: int = 20, k: float = 2.0):
+        if not math.isfinite(k):
+            raise ValueError("bb band width must be finite")
+        super().__init__(n)
+        self.k = k
+        self.params = (n, k)
+        name = f"bb{n}" if k == 2.0 else f"bb{n}_{k:g}"
+        self.outputs = (f"{name}_mid", f"{name}_upper", f"{name}_lower")
+
+    def compute(self, cols):
+        close = cols['close']
+        mean, std = _rolling_mean_std(close, self.n)
+        self._seed(close)
+        mid, upper, lower = self.outputs
+        return {mid: mean, upper: mean + self.k * std, lower: mean - self.k * std}
+
+    def step(self, t, high, low, close, volume):
+        if not self._push(close):
+            return (math.nan, math.nan, math.nan)
+        mean = self.total / self.n
+        std = math.sqrt(max(self.total_sq / self.n - mean * mean, 0.0))
+        return (mean, mean + self.k * std, mean - self.k * std)
+
+
+class EMA(Indicator):
+    """Exponential moving average seeded with the SMA of the first n closes"""
+
+    kind = 'ema'
+
+    def __init__(self, n: int = 20):
+        if n < 1:
+            raise ValueError("ema window must be positive")
+        self.n = n
+        self.params = (n,)
+        self.alpha = 2.0 / (n + 1)
+        self.outputs = (f"ema{n}",)
+        self.count = 0
+        self.seed_total = 0.0
+        self.value = math.nan
+
+    def compute(self, cols):
+        close = cols['close']
+        out = np.full(len(close), np.nan)
+        self.count = len(close)
+        if len(close) < self.n:
+            self.seed_total = math.fsum(close.tolist())
+            return {self.outputs[0]: out}
+        seed = float(close[:self.n].mean())
+        out[self.n - 1] = seed
+        out[self.n:] = _recursive_smooth(close[self.n:], self.alpha, seed)
+        self.value = float(out[-1])
+        return {self.outputs[0]: out}
+
+    def step(self, t, high, low, close, volume):
+        self.count += 1
+        if self.count < self.n:
+            self.seed_total += close
+            return (math.nan,)
+        if self.count == self.n:
+            self.value = (self.seed_total + close) / self.n
+        else:
+            self.value += self.alpha * (close - self.value)
+        return (self.value,)
+
+
+class RSI(Indicator):
+    """Wilder's RSI: averages seeded with the mean of the first n changes"""
+
+    kind = 'rsi'
+
+    def __init__(self, n: int = 14):
+        if n < 1:
+            raise ValueError("rsi window must be positive")
+        self.n = n
+        self.params = (n,)
+        self.outputs = (f"rsi{n}",)
+        self.prev = math.nan
+        self.count = 0  # price changes seen
+        self.gain = 0.0
+        self.loss = 0.0
+
+    @staticmethod
+    def _rsi(gain: np.ndarray, loss: np.ndarray) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), 100.0 - 100.0 / (1.0 + gain / loss))
+
+    @staticmethod
+    def _rsi_scalar(gain: float, loss: float) -> float:
+        if loss == 0:
+            return 50.0 if gain == 0 else 100.0
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+
+    def compute(self, cols):
+        close = cols['close']
+        out = np.full(len(close), np.nan)
+        if not len(close):
+            return {self.outputs[0]: out}
+        self.prev = float(close[-1])
+        diff = np.diff(close)
+        self.count = len(diff)
+        gains = np.clip(diff, 0, None)
+        losses = np.clip(-diff, 0, None)
+        if len(diff) < self.n:
+            self.gain = math.fsum(gains.tolist())
+            self.loss = math.fsum(losses.tolist())
+            return {self.outputs[0]: out}
+        alpha = 1.0 / self.n
+        seed_gain = float(gains[:self.n].mean())
+        seed_loss = float(losses[:self.n].mean())
+        avg_gain = np.concatenate(([seed_gain], _recursive_smooth(gains[self.n:], alpha, seed_gain)))
+        avg_loss = np.concatenate(([seed_loss], _recursive_smooth(losses[self.n:], alpha, seed_loss)))
+        out[self.n:] = self._rsi(avg_gain, avg_loss)
+        self.gain = float(avg_gain[-1])
+        self.loss = float(avg_loss[-1])
+        return {self.outputs[0]: out}
+
+    def step(self, t, high, low, close, volume):
+        prev, self.prev = self.prev, close
+        if prev != prev:
+            return (math.nan,)
+        change = close - prev
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        self.count += 1
+        if self.count < self.n:
+            self.gain += gain
+            self.loss += loss
+            return (math.nan,)
+        if self.count == self.n:
+            self.gain = (self.gain + gain) / self.n
+            self.loss = (self.loss + loss) / self.n
+        else:
+            self.gain += (gain - self.gain) / self.n
+            self.loss += (loss - self.loss) / self.n
+        return (self._rsi_scalar(self.gain, self.loss),)
+
+
+class VWAP(Indicator):
+    """Session VWAP on typical price (h+l+c)/3, reset at each exchange-time date"""
+
+    kind = 'vwap'
+    outputs = ('vwap',)
+    max_params = 0
+
+    def __init__(self):
+        self.session = None
+        self.pv = 0.0
+        self.volume = 0.0
+
+    def compute(self, cols):
+        t = cols['t']
+        out = np.full(len(t), np.nan)
+        if not len(t):
+            return {'vwap': out}
+        keys = session_keys(t)
+        pv = (cols['high'] + cols['low'] + cols['close']) / 3.0 * cols['volume']
+        volume = cols['volume'].astype(float)
+        # Cumulative sums restarted at every session boundary
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        lengths = np.diff(np.r_[starts, len(t)])
+        cum_pv = np.cumsum(pv)
+        cum_v = np.cumsum(volume)
+        base_pv = np.repeat(np.r_[0.0, cum_pv[starts[1:] - 1]], lengths)
+        base_v = np.repeat(np.r_[0.0, cum_v[starts[1:] - 1]], lengths)
+        session_pv = cum_pv - base_pv
+        session_v = cum_v - base_v
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out = np.where(session_v > 0, session_pv / session_v, np.nan)
+        self.session = int(keys[-1])
+        self.pv = float(session_pv[-1])
+        self.volume = float(session_v[-1])
+        return {'vwap': out}
+
+    def step(self, t, high, low, close, volume):
+        session = session_key(t)
+        if session != self.session:
+            self.session = session
+            self.pv = 0.0
+            self.volume = 0.0
+        self.pv += (high + low + close) / 3.0 * volume
+        self.volume += volume
+        return (self.pv / self.volume if self.volume > 0 else math.nan,)
+
+
+INDICATORS = {cls.kind: cls for cls in (SMA, EMA, RSI, Bollinger, VWAP)}
+MAX_WINDOW = 1000
+
+
+def parse_indicators(spec: str) -> List[Indicator]:
+    """'sma:20,rsi,bb:20:2' -> fresh indicator instances; raises ValueError on bad input"""
+    indicators = []
+    seen = set()
+    for item in spec.split(','):
+        item = item.strip().lower()
+        if not item or item in seen:
+            continue
+        seen.add(item)
+        kind, *args = item.split(':')
+        if kind not in INDICATORS:
+            raise ValueError(f"Unknown indicator '{kind}' (known: {', '.join(sorted(INDICATORS))})")
+        cls = INDICATORS[kind]
+        if len(args) > cls.max_params:
+            raise ValueError(f"Indicator '{kind}' takes at most {cls.max_params} parameter(s)")
+        try:
+            params = [int(args[0])] + [float(a) for a in args[1:]] if args else []
+        except ValueError:
+            raise ValueError(f"Bad parameters in indicator '{item}'") from None
+        if params and not 0 < params[0] <= MAX_WINDOW:
+            raise ValueError(f"Indicator window must be between 1 and {MAX_WINDOW}")
+        indicators.append(cls(*params))
+    return indicators
+
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Slow-job sampling profiler for SchedulerMonitor
+Jobs run under SchedulerMonitor.track_job() are watched against a latency
+budget. When one overruns, a single background thread samples that job's
+stack with sys._current_frames() until it finishes and writes a collapsed
+stack file ("frame;frame;frame count" lines) that flamegraph.pl, speedscope
+or inferno can render directly.
+
+Nothing here runs unless profiling is enabled, and captures are rate limited:
+one at a time, at most one per `min_gap` seconds, each capped at `max_duration`.
+"""
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JobWatch:
+    """One in-flight job being watched against its budget"""
+
+    __slots__ = ('job_id', 'thread_id', 'started', 'deadline', 'done', 'finished')
+
+    def __init__(self, job_id: str, thread_id: int, started: float, budget: float):
+        self.job_id = job_id
+        self.thread_id = thread_id
+        self.started = started
+        self.deadline = started + budget
+        self.done = False
+        self.finished: Optional[float] = None
+
+
+def collapse_stack(frame) -> str:
+    """Root-first 'func (file:line);...' string for one sampled frame"""
+    parts: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    parts.reverse()
+    return ';'.join(parts)
+
+
+class _Capture:
+    """Samples collected for one slow job"""
+
+    def __init__(self, watch: JobWatch, now: float):
+        self.watch = watch
+        self.started = now
+        self.samples: Counter = Counter()
+
+
+class SlowJobProfiler:
+    """
+    Watches tracked jobs and profiles the ones that exceed their budget.
+    `budget` is the default latency budget in seconds; `budgets` overrides it
+    per job id. Profiles are written to `output_dir` as
+    <job>-<YYYYmmdd-HHMMSS>.folded.
+    """
+
+    def __init__(self, output_dir: str, budget: float = 30.0,
+                 budgets: Optional[Dict[str, float]] = None,
+                 interval: float = 0.01, max_duration: float = 120.0,
+                 min_gap: float = 600.0):
+        self.output_dir = Path(output_dir)
+        self.budget = budget
+        self.budgets = dict(budgets or {})
+        self.interval = interval
+        self.max_duration = max_duration
+        self.min_gap = min_gap
+
+        self.profiles_written = 0
+        self.skipped = 0
+        self.last_profile: Optional[Path] = None
+
+        self._watches: Dict[int, JobWatch] = {}
+        self._capture: Optional[_Capture] = None
+        self._last_capture_end = float('-inf')
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="slow-job-profiler", daemon=True)
+        self._thread.start()
+
+    def watch(self, job_id: str) -> JobWatch:
+        """Start watching the calling thread's job; pair with finish()"""
+        watch = JobWatch(job_id, threading.get_ident(), time.monotonic(),
+                         self.budgets.get(job_id, self.budget))
+        with self._cond:
+            self._watches[id(watch)] = watch
+            self._cond.notify()
+        return watch
+
+    def finish(self, watch: JobWatch):
+        watch.finished = time.monotonic()
+        watch.done = True
+        with self._cond:
+            self._watches.pop(id(watch), None)
+            if self._capture is not None and self._capture.watch is watch:
+                self._cond.notify()
+
+    def _next_wait(self, now: float) -> Optional[float]:
+        if self._capture is not None:
+            return self.interval
+        deadlines = [w.deadline for w in self._watches.values() if w.deadline != math.inf]
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - now)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    break
+                self._cond.wait(self._next_wait(time.monotonic()))
+                if not self._running:
+                    break
+                now = time.monotonic()
+                if self._capture is None:
+                    self._start_overdue(now)
+                capture = self._capture
+
+            if capture is not None:
+                self._sample(capture, time.monotonic())
+
+        if self._capture is not None:
+            self._write(self._capture, time.monotonic())
+
+    def _start_overdue(self, now: float):
+        """Pick the first job past its deadline, if the rate limit allows a capture"""
+        for watch in list(self._watches.values()):
+            if watch.deadline > now:
+                continue
+            # Each job is considered once; pushing its deadline out keeps it from re-triggering
+            watch.deadline = math.inf
+            if now - self._last_capture_end < self.min_gap:
+                self.skipped += 1
+                logger.info(f"Job {watch.job_id} is over budget; profiling skipped (rate limited)")
+                continue
+            logger.warning(f"Job {watch.job_id} still running after {now - watch.started:.1f}s "
+                           f"(over budget), sampling its stack")
+            self._capture = _Capture(watch, now)
+            return
+
+    def _sample(self, capture: _Capture, now: float):
+        watch = capture.watch
+        if not watch.done and now - capture.started < self.max_duration:
+            frame = sys._current_frames().get(watch.thread_id)
+            if frame is not None:
+                capture.samples[collapse_stack(frame)] += 1
+                del frame
+                return
+        with self._cond:
+            self._capture = None
+            self._last_capture_end = now
+        self._write(capture, now)
+
+    def _write(self, capture: _Capture, now: float):
+        watch = capture.watch
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        path = self.output_dir / f"{watch.job_id}-{stamp}.folded"
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w') as f:
+                for stack, count in capture.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError as e:
+            logger.error(f"Could not write profile for {watch.job_id}: {e}")
+            return
+        self.profiles_written += 1
+        self.last_profile = path
+        if watch.finished is not None:
+            runtime = f"ran {watch.finished - watch.started:.1f}s"
+        else:
+            runtime = f"still running after {now - watch.started:.1f}s"
+        logger.warning(f"Slow job {watch.job_id} {runtime}; "
+                       f"{sum(capture.samples.values())} stack samples written to {path}")
+
+    def close(self, timeout: float = 5.0):
+        """Stop the sampler, flushing any capture in progress"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+APScheduler setup with scheduling-lag accounting for SchedulerMonitor
+build_scheduler() configures thread/process pool executors and job defaults
+(max_instances, coalesce, misfire_grace_time). SchedulingReporter listens to
+scheduler events and reports misfires, skipped runs (max_instances reached or
+coalesced) and queue wait into a SchedulerMonitor.
+"""
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+import logging
+
+from apscheduler.events import (
+    EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED,
+    JobExecutionEvent, JobSubmissionEvent,
+)
+from apscheduler.executors.base import run_job
+from apscheduler.executors.pool import BasePoolExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+from apscheduler.schedulers.base import BaseScheduler
+from apscheduler.schedulers.blocking import BlockingScheduler
+
+logger = logging.getLogger(__name__)
+
+# Fire times to walk when counting coalesced runs (bounds work after a long stall)
+MAX_COALESCED_COUNT = 10000
+
+
+def _run_job_timed(submitted: float, job, jobstore_alias, run_times, logger_name):
+    """run_job() plus when it actually started; module level so process pools can pickle it"""
+    started = time.time()
+    events = run_job(job, jobstore_alias, run_times, logger_name)
+    return started - submitted, started - run_times[0].timestamp(), events
+
+
+class _TimedPoolExecutor(BasePoolExecutor):
+    """Pool executor that reports how long each job waited for a worker"""
+
+    # Called as on_job_start(job_id, queue_wait, start_delay) from the callback thread
+    on_job_start: Optional[Callable[[str, float, float], None]] = None
+
+    def _do_submit_job(self, job, run_times):
+        def callback(f):
+            exc, tb = (
+                f.exception_info()
+                if hasattr(f, "exception_info")
+                else (f.exception(), getattr(f.exception(), "__traceback__", None))
+            )
+            if exc:
+                self._run_job_error(job.id, exc, tb)
+                return
+            queue_wait, start_delay, events = f.result()
+            if self.on_job_start is not None:
+                try:
+                    self.on_job_start(job.id, queue_wait, start_delay)
+                except Exception as e:
+                    logger.error(f"Scheduling report failed for {job.id}: {e}")
+            self._run_job_success(job.id, events)
+
+        f = self._pool.submit(
+            _run_job_timed, time.time(), job, job._jobstore_alias, run_times, self._logger.name
+        )
+        f.add_done_callback(callback)
+
+
+class TimedThreadPoolExecutor(ThreadPoolExecutor, _TimedPoolExecutor):
+    """APScheduler ThreadPoolExecutor with queue wait reporting"""
+
+
+class TimedProcessPoolExecutor(ProcessPoolExecutor, _TimedPoolExecutor):
+    """APScheduler ProcessPoolExecutor with queue wait reporting (jobs must be picklable)"""
+
+
+def build_scheduler(config: Dict = None, scheduler_class=BlockingScheduler) -> BaseScheduler:
+    """
+    Scheduler with a thread pool ("default") and, if process_workers > 0, a
+    process pool ("processpool") executor. Config keys and defaults:
+        thread_workers: 10, process_workers: 0,
+        max_instances: 1, coalesce: True, misfire_grace_time: 30
+    Jobs can override max_instances/coalesce/misfire_grace_time in add_job().
+    """
+    config = config or {}
+    executors = {'default': TimedThreadPoolExecutor(int(config.get('thread_workers', 10)))}
+    if int(config.get('process_workers', 0)) > 0:
+        executors['processpool'] = TimedProcessPoolExecutor(int(config['process_workers']))
+
+    job_defaults = {
+        'max_instances': int(config.get('max_instances', 1)),
+        'coalesce': bool(config.get('coalesce', True)),
+        'misfire_grace_time': config.get('misfire_grace_time', 30),
+    }
+    return scheduler_class(executors=executors, job_defaults=job_defaults)
+
+
+class SchedulingReporter:
+    """Feeds APScheduler misfires, skipped runs and queue wait into a SchedulerMonitor"""
+
+    def __init__(self, monitor):
+        self.monitor = monitor
+        self.scheduler: Optional[BaseScheduler] = None
+        # Last run time submitted per job, to count the fire times coalescing dropped
+        self._last_run_time: Dict[str, datetime] = {}
+
+    def attach(self, scheduler: BaseScheduler) -> 'SchedulingReporter':
+        self.scheduler = scheduler
+        scheduler.add_listener(self._on_event,
+                               EVENT_JOB_SUBMITTED | EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED)
+        for executor in scheduler._executors.values():
+            if isinstance(executor, _TimedPoolExecutor):
+                executor.on_job_start = self.monitor.record_job_start
+            else:
+                logger.warning(f"Executor {executor!r} does not report queue wait; "
+                               f"use build_scheduler() executors")
+        return self
+
+    def _on_event(self, event):
+        if event.code == EVENT_JOB_MISSED:
+            lateness = self._lateness(event)
+            self.monitor.record_misfire(event.job_id, lateness)
+        elif event.code == EVENT_JOB_MAX_INSTANCES:
+            self.monitor.record_skipped_run(event.job_id, 'max_instances',
+                                            len(event.scheduled_run_times))
+            self._remember(event)
+        elif event.code == EVENT_JOB_SUBMITTED:
+            coalesced = self._count_coalesced(event)
+            if coalesced:
+                self.monitor.record_skipped_run(event.job_id, 'coalesced', coalesced)
+            self._remember(event)
+
+    @staticmethod
+    def _lateness(event: JobExecutionEvent) -> float:
+        run_time = event.scheduled_run_time
+        return (datetime.now(run_time.tzinfo) - run_time).total_seconds()
+
+    def _remember(self, event: JobSubmissionEvent):
+        if event.scheduled_run_times:
+            self._last_run_time[event.job_id] = event.scheduled_run_times[-1]
+
+    def _count_coalesced(self, event: JobSubmissionEvent) -> int:
+        """Fire times between the previous submission and this one that were merged away"""
+        previous = self._last_run_time.get(event.job_id)
+        if previous is None or not event.scheduled_run_times or self.scheduler is None:
+            return 0
+        job = self.scheduler.get_job(event.job_id)
+        if job is None or not job.coalesce:
+            return 0
+
+        first = event.scheduled_run_times[0]
+        count = 0
+        fire_time = job.trigger.get_next_fire_time(previous, previous)
+        while fire_time is not None and fire_time < first and count < MAX_COALESCED_COUNT:
+            count += 1
+            fire_time = job.trigger.get_next_fire_time(fire_time, fire_time)
+        return count
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Shared logging setup for the monitor services
+Callers only put records on a bounded in-memory queue; a background
+listener thread does the formatting and the console/file I/O, so a slow
+disk or a blocked terminal never stalls a heartbeat, a health check or an
+API request. The log file rotates by size (default) or by time.
+
+    from log_setup import setup_logging
+    setup_logging(log_file='/tmp/watchdog.log', max_bytes=10_000_000, backup_count=5)
+    setup_logging(log_file='/var/log/api.log', when='midnight', backup_count=7)
+
+If the queue fills up (the listener cannot keep up) records are dropped
+rather than blocking the caller, and the number dropped is logged once the
+queue drains. Messages logged on a hot path should pass arguments lazily
+(logger.info("Fetched %d bars", n)) and can be throttled with
+RateLimitFilter.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+QUEUE_SIZE = 10000
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 5
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional['_NonBlockingQueueHandler'] = None
+_setup_lock = threading.Lock()
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking on a full queue"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._drop_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now, since they may change before the listener
+        # gets to the record; the Formatter work (timestamps, tracebacks) is
+        # left to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+            return
+        if self.dropped:
+            with self._drop_lock:
+                dropped, self.dropped = self.dropped, 0
+            if dropped:
+                note = logging.LogRecord(__name__, logging.WARNING, __file__, 0,
+                                         "Log queue full, dropped %d record(s)", (dropped,), None)
+                try:
+                    self.queue.put_nowait(self.prepare(note))
+                except queue.Full:
+                    with self._drop_lock:
+                        self.dropped += dropped
+
+
+def setup_logging(log_file: Optional[str] = None, level: int = logging.INFO,
+                  max_bytes: int = MAX_BYTES, backup_count: int = BACKUP_COUNT,
+                  when: Optional[str] = None, console: bool = True,
+                  fmt: str = LOG_FORMAT, queue_size: int = QUEUE_SIZE,
+                  force: bool = False) -> bool:
+    """
+    Route the root logger through a queue to console and/or file handlers
+    `when` ('midnight', 'h', 'w0', ... as for TimedRotatingFileHandler)
+    selects time-based rotation; otherwise the file rotates at max_bytes.
+    Like logging.basicConfig() this leaves a root logger configured by
+    someone else alone unless `force` is set; an earlier setup_logging()
+    is always replaced. Returns whether logging was (re)configured.
+    """
+    global _listener, _queue_handler
+    with _setup_lock:
+        root = logging.getLogger()
+        foreign = [h for h in root.handlers if h is not _queue_handler]
+        if foreign and not force:
+            return False
+        _stop_listener()
+        for handler in foreign:
+            root.removeHandler(handler)
+            handler.close()
+
+        formatter = logging.Formatter(fmt)
+        handlers = []
+        if console:
+            handlers.append(logging.StreamHandler())
+        if log_file:
+            if when:
+                handlers.append(logging.handlers.TimedRotatingFileHandler(
+                    log_file, when=when, backupCount=backup_count, delay=True))
+            else:
+                handlers.append(logging.handlers.RotatingFileHandler(
+                    log_file, maxBytes=max_bytes, backupCount=backup_count, delay=True))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.Queue(maxsize=queue_size)
+        _queue_handler = _NonBlockingQueueHandler(log_queue)
+        _listener = logging.handlers.QueueListener(log_queue, *handlers,
+                                                   respect_handler_level=True)
+        _listener.start()
+        root.addHandler(_queue_handler)
+        root.setLevel(level)
+        return True
+
+
+def _stop_listener():
+    """Flush queued records and close the handlers of the current setup"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def shutdown_logging():
+    """Write out everything still queued; registered to run at exit"""
+    with _setup_lock:
+        _stop_listener()
+
+
+def dropped_records() -> int:
+    """Records dropped because the queue was full and not yet reported"""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+atexit.register(shutdown_logging)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per message template for hot-path loggers
+    Lets `burst` records of one template (logger, level and unformatted
+    message) through at once, refilled at `rate` per second. Suppressed
+    records are counted and the count is appended to the next record of the
+    same template that gets through. Attach it with logger.addFilter() to a
+    child logger used only for hot-path messages, so errors logged on the
+    module logger are never dropped; it runs in the calling thread but only
+    does a dict lookup and some arithmetic.
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 10):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        # template -> (tokens, last refill, suppressed)
+        self._buckets: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1.0
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar suppressed)"
+            record.args = None
+        return True
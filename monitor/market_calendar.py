@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+US equity session calendar and refresh hints
+Knows NYSE full holidays and 1pm early closes (rule-based, so no yearly
+table to maintain), the regular session (9:30-16:00 ET) and the extended
+hours Polygon publishes bars for (4:00-20:00 ET). freshness() turns that
+into hints for pollers: when the next bar closes, or how long the market
+stays closed, plus matching Cache-Control/Retry-After headers.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+EXCHANGE_TZ = ZoneInfo("America/New_York")
+
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+EXTENDED_OPEN = time(4, 0)
+EXTENDED_CLOSE = time(20, 0)
+# Extended trading ends this long after an early close
+EARLY_EXTENDED_CLOSE = time(17, 0)
+
+# Polygon needs a moment after a bar closes before the bar is served
+BAR_SETTLE_SECONDS = 5
+# Shared caches are never told to hold a response longer than this
+MAX_CACHE_SECONDS = 3600
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th (1-based) weekday of a month; n = -1 for the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """Saturday holidays are observed on Friday, Sunday holidays on Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=32)
+def holidays(year: int) -> frozenset:
+    """Full-day NYSE closures in a year"""
+    days = {
+        _nth_weekday(year, 1, 0, 3),   # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),   # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _observed(date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),   # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),
+    }
+    # New Year's Day falling on a Saturday is not observed on the prior Friday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() == 6:
+        days.add(new_year + timedelta(days=1))
+    elif new_year.weekday() < 5:
+        days.add(new_year)
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(days)
+
+
+@lru_cache(maxsize=32)
+def early_closes(year: int) -> frozenset:
+    """1pm closes: July 3, the day after Thanksgiving and Christmas Eve (when trading days)"""
+    candidates = {
+        date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    }
+    return frozenset(d for d in candidates if is_trading_day(d))
+
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def session_hours(day: date, extended: bool = False) -> Optional[Tuple[datetime, datetime]]:
+    """(open, close) in exchange time for a trading day, else None"""
+    if not is_trading_day(day):
+        return None
+    early = day in early_closes(day.year)
+    if extended:
+        start, end = EXTENDED_OPEN, EARLY_EXTENDED_CLOSE if early else EXTENDED_CLOSE
+    else:
+        start, end = REGULAR_OPEN, EARLY_CLOSE if early else REGULAR_CLOSE
+    return (datetime.combine(day, start, EXCHANGE_TZ), datetime.combine(day, end, EXCHANGE_TZ))
+
+
+def next_open(now: datetime, extended: bool = False) -> datetime:
+    """Start of the next session at or after `now` (the current one if already open)"""
+    local = now.astimezone(EXCHANGE_TZ)
+    day = local.date()
+    for _ in range(15):
+        hours = session_hours(day, extended)
+        if hours is not None and local < hours[1]:
+            return max(hours[0], local)
+        day += timedelta(days=1)
+    raise RuntimeError(f"No session found within 15 days of {now}")
+
+
+def market_phase(now: datetime) -> str:
+    """'regular', 'pre', 'post' or 'closed'"""
+    local = now.astimezone(EXCHANGE_TZ)
+    extended = session_hours(local.date(), extended=True)
+    if extended is None or not extended[0] <= local < extended[1]:
+        return 'closed'
+    regular = session_hours(local.date())
+    if local < regular[0]:
+        return 'pre'
+    if local < regular[1]:
+        return 'regular'
+    return 'post'
+
+
+def freshness(bar_seconds: Optional[int], now: Optional[datetime] = None,
+              min_seconds: int = 1) -> Dict:
+    """
+    Refresh hints for market data that changes when bars close (bar_seconds)
+    or continuously during the session (bar_seconds None). The result has:
+        phase              market_phase()
+        nextBarClose       when the forming bar closes (ISO, UTC), in session
+        marketClosedUntil  next extended-hours open (ISO, UTC), when closed
+        refreshAfter       seconds a poller can wait without missing data
+    """
+    now = now or datetime.now(timezone.utc)
+    phase = market_phase(now)
+    hint = {'phase': phase, 'nextBarClose': None, 'marketClosedUntil': None}
+
+    if phase == 'closed':
+        reopen = next_open(now, extended=True)
+        hint['marketClosedUntil'] = reopen.astimezone(timezone.utc).isoformat()
+        wait = (reopen - now).total_seconds()
+    elif bar_seconds:
+        close = session_hours(now.astimezone(EXCHANGE_TZ).date(), extended=True)[1]
+        epoch = now.timestamp()
+        bar_close = min(datetime.fromtimestamp((epoch // bar_seconds + 1) * bar_seconds, timezone.utc), close)
+        hint['nextBarClose'] = bar_close.astimezone(timezone.utc).isoformat()
+        wait = (bar_close - now).total_seconds() + BAR_SETTLE_SECONDS
+    else:
+        wait = min_seconds
+
+    hint['refreshAfter'] = max(min_seconds, int(wait + 0.999))
+    return hint
+
+
+def cache_headers(hint: Dict) -> Dict[str, str]:
+    """Cache-Control (and Retry-After while closed) for a freshness() hint"""
+    max_age = min(hint['refreshAfter'], MAX_CACHE_SECONDS)
+    headers = {'Cache-Control': f"public, max-age={max_age}"}
+    if hint.get('marketClosedUntil'):
+        headers['Retry-After'] = str(hint['refreshAfter'])
+    return headers
@@ -3,15 +3,28 @@
 Market Data API using Polygon
 Provides historical market data for indices (SPY, QQQ, DIA, IWM)
 """
+import json
 import logging
 import os
 import sys
-from datetime import datetime, timedelta
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 
+import numpy as np
 import requests
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 
+from bar_series import BarSeries
+from indicators import SESSION_TZ, parse_indicators, session_key
+from log_setup import RateLimitFilter, setup_logging
+from market_calendar import cache_headers, freshness
+from polygon_replay import ArchiveRecorder
+from shared_cache import DEFAULT_CACHE_DIR, SharedBarCache
+
 # Add engine path to import common
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "engine"))
 try:
@@ -20,13 +33,22 @@ except ImportError:
     print("Warning: Could not import POLYGON_API_KEY from data.common")
     POLYGON_API_KEY = os.getenv("POLYGON_API_KEY", "")
 
-logging.basicConfig(level=logging.INFO)
+# Queued logging: request threads never wait on console or file I/O
+setup_logging(log_file=os.getenv("MARKET_DATA_LOG_FILE"))
 logger = logging.getLogger(__name__)
+# Per-request info (fetches) is throttled per template on its own child
+# logger; warnings and errors go to `logger` and are never dropped
+request_logger = logger.getChild("requests")
+request_logger.addFilter(RateLimitFilter(rate=1.0, burst=10))
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for Angular frontend
 
-POLYGON_BASE_URL = "https://api.polygon.io/v2"
+# POLYGON_API_URL points the service at a stand-in (e.g. polygon_replay.py serve)
+POLYGON_BASE_URL = os.getenv("POLYGON_API_URL", "https://api.polygon.io").rstrip("/") + "/v2"
+
+# Set by --record; captures upstream exchanges and incoming requests for replay
+_recorder = None
 
 
 def get_date_range(timeframe):
@@ -75,54 +97,165 @@ def get_date_range(timeframe):
     return start_date, end_date, multiplier, timespan
 
 
-def fetch_polygon_data(symbol, start_date, end_date, multiplier, timespan):
-    """Fetch aggregated bars from Polygon API"""
-    try:
-        # Format dates as YYYY-MM-DD
-        start_str = start_date.strftime("%Y-%m-%d")
-        end_str = end_date.strftime("%Y-%m-%d")
-
-        url = f"{POLYGON_BASE_URL}/aggs/ticker/{symbol}/range/{multiplier}/{timespan}/{start_str}/{end_str}"
-        params = {
-            "adjusted": "true",
-            "sort": "asc",
-            "limit": 50000,
-            "apiKey": POLYGON_API_KEY,
-        }
-
-        logger.info(f"Fetching {symbol} data from {start_str} to {end_str}")
-        response = requests.get(url, params=params, timeout=10)
+# Date span per request, sized so one chunk stays well under Polygon's 50000
+# base-aggregate limit; longer ranges are split and fetched concurrently
+CHUNK_DAYS = {"second": 1, "minute": 14, "hour": 180}
+DEFAULT_CHUNK_DAYS = 3650
+FETCH_WORKERS = 8
+MAX_PAGES = 100
+
+_fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="polygon")
+_session_local = threading.local()
+
+
+def _session():
+    """Per-thread requests session so chunk fetches reuse their connections"""
+    session = getattr(_session_local, "session", None)
+    if session is None:
+        session = _session_local.session = requests.Session()
+        if _recorder is not None:
+            session.hooks["response"].append(_recorder.upstream_hook)
+    return session
+
+
+@app.before_request
+def _record_request():
+    if _recorder is not None:
+        _recorder.record_client(request.full_path)
+
+
+def split_date_range(start_date, end_date, timespan):
+    """Split [start_date, end_date] into consecutive, non-overlapping day ranges"""
+    step = CHUNK_DAYS.get(timespan, DEFAULT_CHUNK_DAYS)
+    chunks = []
+    chunk_start = start_date.date() if isinstance(start_date, datetime) else start_date
+    last = end_date.date() if isinstance(end_date, datetime) else end_date
+    while chunk_start <= last:
+        chunk_end = min(chunk_start + timedelta(days=step - 1), last)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def _fetch_range(symbol, start_str, end_str, multiplier, timespan):
+    """Raw Polygon results for one date range, following next_url pages"""
+    url = f"{POLYGON_BASE_URL}/aggs/ticker/{symbol}/range/{multiplier}/{timespan}/{start_str}/{end_str}"
+    params = {
+        "adjusted": "true",
+        "sort": "asc",
+        "limit": 50000,
+        "apiKey": POLYGON_API_KEY,
+    }
+    session = _session()
+    results = []
+    for _ in range(MAX_PAGES):
+        response = session.get(url, params=params, timeout=10)
         response.raise_for_status()
-
         data = response.json()
 
         if data.get("status") != "OK":
-            logger.error(f"Polygon API error for {symbol}: {data.get('status')}")
-            return []
-
-        results = data.get("results", [])
-        logger.info(f"Fetched {len(results)} bars for {symbol}")
-
-        # Transform to our format (timestamps in UTC)
-        bars = []
-        for bar in results:
-            bars.append(
-                {
-                    "timestamp": datetime.utcfromtimestamp(bar["t"] / 1000).isoformat()
-                    + "Z",
-                    "open": bar["o"],
-                    "high": bar["h"],
-                    "low": bar["l"],
-                    "close": bar["c"],
-                    "volume": bar["v"],
-                }
-            )
+            raise RuntimeError(f"Polygon API error: {data.get('status')}")
+
+        results.extend(data.get("results", []))
+        url = data.get("next_url")
+        if not url:
+            return results
+        # next_url carries the cursor and query but not the key
+        params = {"apiKey": POLYGON_API_KEY}
+
+    logger.warning(
+        "Stopped following next_url for %s %s..%s after %d pages",
+        symbol, start_str, end_str, MAX_PAGES,
+    )
+    return results
+
+
+TIMESPAN_SECONDS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def bar_freshness(multiplier, timespan):
+    """Session-calendar refresh hint for bars of this size"""
+    return freshness(multiplier * TIMESPAN_SECONDS.get(timespan, 60))
+
+
+def _with_hints(response, hint):
+    response.headers.update(cache_headers(hint))
+    return response
+
 
-        return bars
+def _fetch_chunks(symbol, start_date, end_date, multiplier, timespan):
+    """
+    Bars for a date range plus the (start, end) strings of chunks that failed
+    Long ranges are split into date chunks (CHUNK_DAYS) fetched concurrently,
+    each following next_url until complete. Chunks are stitched in time order
+    with duplicate timestamps dropped; a chunk that fails is logged and left
+    out, so the bars around the gap are still returned.
+    """
+    chunks = [
+        (chunk_start.strftime("%Y-%m-%d"), chunk_end.strftime("%Y-%m-%d"))
+        for chunk_start, chunk_end in split_date_range(start_date, end_date, timespan)
+    ]
+    if not chunks:
+        return BarSeries.empty(), []
 
+    request_logger.info(
+        "Fetching %s data from %s to %s in %d chunk(s)",
+        symbol, chunks[0][0], chunks[-1][1], len(chunks),
+    )
+    if len(chunks) == 1:
+        futures = None
+        pending = [lambda: _fetch_range(symbol, *chunks[0], multiplier, timespan)]
+    else:
+        futures = [
+            _fetch_pool.submit(_fetch_range, symbol, start_str, end_str, multiplier, timespan)
+            for start_str, end_str in chunks
+        ]
+        pending = [future.result for future in futures]
+
+    parts = []
+    gaps = []
+    last_t = np.iinfo(np.int64).min
+    try:
+        for (start_str, end_str), result in zip(chunks, pending):
+            try:
+                chunk_bars = BarSeries.from_polygon(result())
+            except Exception as e:
+                logger.error(
+                    "Error fetching %s bars %s..%s, leaving a gap: %s",
+                    symbol, start_str, end_str, e,
+                )
+                gaps.append((start_str, end_str))
+                continue
+            # Ascending within a chunk; anything not after every earlier bar is a repeat
+            seen = np.maximum.accumulate(np.concatenate(([last_t], chunk_bars.t[:-1])))
+            keep = chunk_bars.t > seen
+            if not keep.all():
+                chunk_bars = chunk_bars.where(keep)
+            if not len(chunk_bars):
+                continue
+            last_t = chunk_bars.t[-1]
+            parts.append(chunk_bars)
+    finally:
+        if futures is not None:
+            for future in futures:
+                future.cancel()
+
+    bars = BarSeries.concat(parts)
+    request_logger.info("Fetched %d bars for %s", len(bars), symbol)
+    return bars, gaps
+
+
+def fetch_polygon_data(symbol, start_date, end_date, multiplier, timespan):
+    """
+    Fetch aggregated bars from Polygon API
+    Returns a BarSeries; chunks that failed are missing from it (see
+    _fetch_chunks), and it is empty if nothing could be fetched.
+    """
+    try:
+        return _fetch_chunks(symbol, start_date, end_date, multiplier, timespan)[0]
     except Exception as e:
-        logger.error(f"Error fetching data for {symbol}: {e}")
-        return []
+        logger.error("Error fetching data for %s: %s", symbol, e)
+        return BarSeries.empty()
 
 
 @app.route("/api/market/indices", methods=["GET"])
@@ -135,8 +268,9 @@ def get_indices():
         symbols = ["SPY", "QQQ", "DIA", "IWM"]
 
         start_date, end_date, multiplier, timespan = get_date_range(timeframe)
+        hint = bar_freshness(multiplier, timespan)
 
-        result = {"data": {}}
+        result = {"data": {}, "freshness": hint}
 
         for symbol in symbols:
             bars = fetch_polygon_data(
@@ -145,46 +279,426 @@ def get_indices():
             result["data"][symbol] = {
                 "symbol": symbol,
                 "timeFrame": timeframe,
-                "bars": bars,
+                "bars": bars.bars(),
             }
 
-        return jsonify(result)
+        return _with_hints(jsonify(result), hint)
 
     except Exception as e:
-        logger.error(f"Error in get_indices: {e}")
+        logger.error("Error in get_indices: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
+# Cached series are topped up from upstream at most this often
+BAR_CACHE_TTL = 10.0
+BAR_CACHE_MAX_ENTRIES = 256
+
+
+class CachedSeries:
+    """
+    Bars for one (symbol, timeframe) with indicator values and rolling state
+    The last bar may still be forming, so each indicator's state is kept as of
+    the bar before it; a refresh replaces that bar and steps the state forward
+    one bar at a time instead of recomputing the series. Bars are a BarSeries
+    and indicator values float64 arrays (NaN until warmed up); both are
+    replaced rather than modified, so view() hands them out without copying.
+    """
+
+    def __init__(self):
+        self.bars = BarSeries.empty()
+        self.values = {}  # output name -> float64 array aligned with bars
+        self.indicators = {}  # outputs tuple -> indicator with committed state
+        self.refreshed = None
+        self.lock = threading.Lock()
+
+    def load(self, bars):
+        self.bars = bars
+        indicators = list(self.indicators.values())
+        self.values = {}
+        self.indicators = {}
+        for indicator in indicators:
+            self.add_indicator(indicator.fresh())
+
+    def add_indicator(self, indicator):
+        computed = indicator.compute(self.bars.window(0, len(self.bars) - 1).columns())
+        provisional = self._step_provisional(indicator, len(self.bars) - 1) if len(self.bars) else ()
+        for i, name in enumerate(indicator.outputs):
+            values = np.asarray(computed[name], dtype=np.float64)
+            if provisional:
+                values = np.append(values, provisional[i])
+            self.values[name] = values
+        self.indicators[indicator.outputs] = indicator
+
+    def _step(self, indicator, i):
+        bars = self.bars
+        return indicator.step(
+            int(bars.t[i]), float(bars.high[i]), float(bars.low[i]),
+            float(bars.close[i]), float(bars.volume[i]),
+        )
+
+    def _step_provisional(self, indicator, i):
+        return self._step(indicator.copy(), i)
+
+    def extend(self, new_bars):
+        """Merge a refetch that starts at or before the last cached bar"""
+        if not len(self.bars):
+            return self.load(new_bars)
+        new = new_bars.after(int(self.bars.t[-1]))
+        if not len(new):
+            return
+        # Drop the provisional bar; committed state never included it
+        kept = len(self.bars) - 1
+        self.bars = BarSeries.concat([self.bars.window(0, kept), new])
+        for indicator in self.indicators.values():
+            steps = [self._step(indicator, i) for i in range(kept, len(self.bars) - 1)]
+            steps.append(self._step_provisional(indicator, len(self.bars) - 1))
+            for name, values in zip(indicator.outputs, zip(*steps)):
+                self.values[name] = np.concatenate((self.values[name][:kept], values))
+
+    def trim(self, start_ms):
+        """Forget bars before start_ms; indicator state does not depend on them"""
+        cut = int(np.searchsorted(self.bars.t, start_ms, side="left"))
+        if cut:
+            # Copy so the dropped bars (and any shared-cache mapping) are released
+            self.bars = self.bars.window(cut).copy()
+            for name, values in self.values.items():
+                self.values[name] = values[cut:].copy()
+
+    def view(self, outputs):
+        return self.bars, {name: self.values[name] for name in outputs}
+
+
+class BarCache:
+    """
+    In-process cache of bar series and their indicators, keyed by (symbol, timeframe)
+    A series is fetched in full once, then topped up at most every `ttl`
+    seconds by refetching from the last bar's session onward. Requests for the
+    same key wait on one fetch. Indicator values carry over across session
+    boundaries, so warm series have values from the first bar of the window.
+    """
+
+    def __init__(self, ttl=BAR_CACHE_TTL, max_entries=BAR_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, symbol, timeframe, indicators=()):
+        """(bars, {indicator output name: values}) for the timeframe's window"""
+        start_date, end_date, multiplier, timespan = get_date_range(timeframe)
+        key = (symbol, timeframe)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = CachedSeries()
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            self._entries.move_to_end(key)
+
+        with entry.lock:
+            now = time.monotonic()
+            if entry.refreshed is None or not len(entry.bars):
+                bars, complete = _fetch_bars(symbol, start_date, end_date, multiplier, timespan)
+                entry.load(bars)
+                # Serve what arrived, but refetch on the next request rather than after ttl
+                entry.refreshed = now if complete else None
+            elif now - entry.refreshed >= self.ttl:
+                since = date.fromordinal(session_key(int(entry.bars.t[-1])))
+                bars, complete = _fetch_bars(symbol, since, end_date, multiplier, timespan)
+                # A top-up with a gap would leave a hole; keep the cached bars and retry
+                if complete:
+                    entry.extend(bars)
+                    entry.refreshed = now
+            entry.trim(_session_start_ms(start_date))
+
+            outputs = []
+            for indicator in indicators:
+                if indicator.outputs not in entry.indicators:
+                    entry.add_indicator(indicator)
+                outputs.extend(indicator.outputs)
+            return entry.view(outputs)
+
+
+class _IncompleteFetch(Exception):
+    """Some chunks failed; raised through the shared cache so it stores nothing"""
+
+    def __init__(self, bars):
+        super().__init__("incomplete fetch")
+        self.bars = bars
+
+
+def _fetch_bars(symbol, start_date, end_date, multiplier, timespan):
+    """
+    (bars, complete) for a range, through the cross-worker cache when one is configured
+    Bars with gaps from failed chunks are returned with complete=False and are
+    never written to the shared cache, so an upstream error is not served to
+    every worker for the whole TTL.
+    """
+    if _shared_cache is None:
+        bars, gaps = _fetch_chunks(symbol, start_date, end_date, multiplier, timespan)
+        return bars, not gaps
+
+    def fetch():
+        bars, gaps = _fetch_chunks(symbol, start_date, end_date, multiplier, timespan)
+        if gaps:
+            raise _IncompleteFetch(bars)
+        return bars.columns()
+
+    key = f"{symbol}/{multiplier}/{timespan}/{start_date:%Y-%m-%d}/{end_date:%Y-%m-%d}"
+    try:
+        cols = _shared_cache.get_or_fetch(key, BAR_CACHE_TTL, fetch)
+    except _IncompleteFetch as e:
+        return e.bars, False
+    # Views over the shared mapping, not copies
+    return BarSeries.from_columns(cols), True
+
+
+def _session_start_ms(start_date):
+    """Epoch ms of exchange-time midnight on start_date's date (fetches are date granular)"""
+    midnight = datetime.combine(start_date.date(), datetime.min.time(), SESSION_TZ)
+    return int(midnight.timestamp() * 1000)
+
+
+_bar_cache = BarCache()
+
+# Set MARKET_DATA_SHARED_CACHE (or --shared-cache) to a directory, ideally on
+# /dev/shm, when running several workers so they share fetched bars
+_shared_cache = None
+if os.getenv("MARKET_DATA_SHARED_CACHE"):
+    _shared_cache = SharedBarCache(os.environ["MARKET_DATA_SHARED_CACHE"])
+
+# Bars encoded per write; json's C encoder only runs on whole documents, so
+# each slice is encoded in one call rather than through iterencode()
+STREAM_BARS_PER_CHUNK = 2000
+
+_encoder = json.JSONEncoder(separators=(",", ":"))
+
+
+def _json_values(values):
+    """Indicator array as a JSON-ready list (NaN becomes null)"""
+    return [None if v != v else v for v in values.tolist()]
+
+
+def _encode_list(values):
+    """Yield a JSON array (of a BarSeries or an indicator array) in STREAM_BARS_PER_CHUNK slices"""
+    yield "["
+    for start in range(0, len(values), STREAM_BARS_PER_CHUNK):
+        chunk = values[start:start + STREAM_BARS_PER_CHUNK]
+        if isinstance(chunk, np.ndarray):
+            chunk = _json_values(chunk)
+        encoded = _encoder.encode(chunk)
+        yield ("," if start else "") + encoded[1:-1]
+    yield "]"
+
+
+def _stream_symbols(symbols, timeframe, indicators, hint, first=None):
+    """
+    Yield the get_symbols JSON document one symbol section at a time
+    Each symbol's section is encoded in slices and released before the next,
+    so response memory is one symbol's bars and the first bytes go out immediately.
+    A section is fetched before any of it is written: once the 200 status has
+    gone out, a symbol that fails gets empty bars and an "error" field instead
+    of cutting the document short. `first` is the first symbol's (bars, values)
+    if the caller fetched it already.
+    """
+    yield f'{{"freshness":{_encoder.encode(hint)},"data":{{'
+    for i, symbol in enumerate(symbols):
+        section = (
+            f'{"," if i else ""}{_encoder.encode(symbol)}:'
+            f'{{"symbol":{_encoder.encode(symbol)},"timeFrame":{_encoder.encode(timeframe)},'
+        )
+        try:
+            if i == 0 and first is not None:
+                bars, values = first
+                first = None
+            else:
+                bars, values = _bar_cache.get(symbol, timeframe, indicators)
+        except Exception as e:
+            logger.error("Error in get_symbols for %s: %s", symbol, e)
+            yield f'{section}"bars":[],"error":{_encoder.encode(str(e))}}}'
+            continue
+        yield section + '"bars":'
+        yield from _encode_list(bars)
+        if indicators:
+            yield ',"indicators":{'
+            for j, (name, series) in enumerate(values.items()):
+                yield f'{"," if j else ""}{_encoder.encode(name)}:'
+                yield from _encode_list(series)
+            yield "}"
+        del bars, values
+        yield "}"
+    yield "}}"
+
+
 @app.route("/api/market/symbols", methods=["GET"])
 def get_symbols():
-    """Get market data for specific symbols"""
+    """
+    Get market data for specific symbols
+    indicators=sma:20,ema:12,vwap,rsi:14,bb:20:2 adds an "indicators" object
+    per symbol with one value list per output, aligned with "bars". The
+    response is streamed (chunked transfer) one symbol at a time; pass
+    stream=false to build and send the whole document at once. A failure on
+    the first symbol is a 500; later symbols that fail carry an "error" field.
+    """
     try:
         symbols_param = request.args.get("symbols", "")
         timeframe = request.args.get("timeFrame", "1d")
+        stream = request.args.get("stream", "true").lower() not in ("0", "false", "no")
 
         if not symbols_param:
             return jsonify({"error": "symbols parameter required"}), 400
 
-        symbols = [s.strip() for s in symbols_param.split(",")]
+        try:
+            indicators = parse_indicators(request.args.get("indicators", ""))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        start_date, end_date, multiplier, timespan = get_date_range(timeframe)
+        symbols = [s.strip() for s in symbols_param.split(",")]
+        _, _, multiplier, timespan = get_date_range(timeframe)
+        hint = bar_freshness(multiplier, timespan)
+
+        if stream:
+            # Fetched before the response starts, so a failing request still gets a 500
+            first = _bar_cache.get(symbols[0], timeframe, indicators)
+            return Response(
+                stream_with_context(_stream_symbols(symbols, timeframe, indicators, hint, first)),
+                mimetype="application/json",
+                headers=cache_headers(hint),
+            )
 
-        result = {"data": {}}
+        result = {"data": {}, "freshness": hint}
 
         for symbol in symbols:
-            bars = fetch_polygon_data(
-                symbol, start_date, end_date, multiplier, timespan
-            )
+            bars, values = _bar_cache.get(symbol, timeframe, indicators)
             result["data"][symbol] = {
                 "symbol": symbol,
                 "timeFrame": timeframe,
-                "bars": bars,
+                "bars": bars.bars(),
             }
+            if indicators:
+                result["data"][symbol]["indicators"] = {
+                    name: _json_values(series) for name, series in values.items()
+                }
+
+        return _with_hints(jsonify(result), hint)
+
+    except Exception as e:
+        logger.error("Error in get_symbols: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+
+POLYGON_SNAPSHOT_URL = f"{POLYGON_BASE_URL}/snapshot/locale/us/markets/stocks/tickers"
+# One upstream snapshot call per refresh cycle, shared by every client
+SNAPSHOT_TTL = 5.0
+# Symbols requested within this window are included in every refresh
+SNAPSHOT_TRACK_SECONDS = 120.0
+
+
+class SnapshotCache:
+    """
+    Latest trade and day OHLC per symbol from Polygon's multi-ticker snapshot
+    Every symbol any client asked for recently is refreshed together in one
+    upstream call at most once per `ttl`; concurrent requests wait on that
+    call instead of issuing their own.
+    """
+
+    def __init__(self, ttl=SNAPSHOT_TTL, track_seconds=SNAPSHOT_TRACK_SECONDS):
+        self.ttl = ttl
+        self.track_seconds = track_seconds
+        self.upstream_calls = 0
+        self._snapshots = {}  # symbol -> compact snapshot dict
+        self._fetched_at = {}  # symbol -> monotonic time of the call that covered it
+        self._requested_at = {}  # symbol -> monotonic time last asked for
+        self._lock = threading.Lock()
+
+    def get(self, symbols):
+        now = time.monotonic()
+        for symbol in symbols:
+            self._requested_at[symbol] = now
+        if self._stale(symbols, now):
+            with self._lock:
+                # Another request may have refreshed while this one waited
+                now = time.monotonic()
+                if self._stale(symbols, now):
+                    self._refresh(now)
+        return {symbol: self._snapshots.get(symbol) for symbol in symbols}
+
+    def _stale(self, symbols, now):
+        return any(now - self._fetched_at.get(symbol, float("-inf")) >= self.ttl for symbol in symbols)
+
+    def _refresh(self, now):
+        cutoff = now - self.track_seconds
+        tracked = sorted(
+            symbol for symbol, requested in list(self._requested_at.items()) if requested >= cutoff
+        )
+        for symbol in [s for s, requested in list(self._requested_at.items()) if requested < cutoff]:
+            self._requested_at.pop(symbol, None)
+
+        self.upstream_calls += 1
+        try:
+            response = _session().get(
+                POLYGON_SNAPSHOT_URL,
+                params={"tickers": ",".join(tracked), "apiKey": POLYGON_API_KEY},
+                timeout=10,
+            )
+            response.raise_for_status()
+            data = response.json()
+            if data.get("status") != "OK":
+                raise RuntimeError(f"Polygon snapshot error: {data.get('status')}")
+
+            for ticker in data.get("tickers", []):
+                self._snapshots[ticker["ticker"]] = _compact_snapshot(ticker)
+        finally:
+            # A failed call also waits out the ttl, so an outage isn't retried by every request
+            for symbol in tracked:
+                self._fetched_at[symbol] = now
+
+
+def _compact_snapshot(ticker):
+    """Polygon snapshot ticker to the fields the price views need"""
+    day = ticker.get("day") or {}
+    last_trade = ticker.get("lastTrade") or {}
+    minute = ticker.get("min") or {}
+    prev_day = ticker.get("prevDay") or {}
+    # Before the open 'day' is empty; fall back to the latest minute, then the previous close
+    last = last_trade.get("p") or minute.get("c") or day.get("c") or prev_day.get("c")
+    updated = ticker.get("updated") or last_trade.get("t")
+    return {
+        "last": last,
+        "open": day.get("o") or None,
+        "high": day.get("h") or None,
+        "low": day.get("l") or None,
+        "volume": day.get("v") or 0,
+        "prevClose": prev_day.get("c"),
+        "change": ticker.get("todaysChange"),
+        "changePercent": ticker.get("todaysChangePerc"),
+        # Polygon reports nanoseconds; clients get epoch milliseconds
+        "updated": int(updated / 1_000_000) if updated else None,
+    }
+
+
+_snapshot_cache = SnapshotCache()
+
+
+@app.route("/api/market/snapshot", methods=["GET"])
+def get_snapshot():
+    """Latest price, day OHLC and change for many symbols in one small response"""
+    try:
+        symbols_param = request.args.get("symbols", "")
+        if not symbols_param:
+            return jsonify({"error": "symbols parameter required"}), 400
 
-        return jsonify(result)
+        symbols = [s.strip().upper() for s in symbols_param.split(",") if s.strip()]
+        snapshots = _snapshot_cache.get(symbols)
+        # Prices move continuously in session; there is nothing new to fetch sooner than the cache refreshes
+        hint = freshness(None, min_seconds=int(_snapshot_cache.ttl))
+        return _with_hints(
+            jsonify({"asOf": int(time.time() * 1000), "snapshots": snapshots, "freshness": hint}),
+            hint,
+        )
 
     except Exception as e:
-        logger.error(f"Error in get_symbols: {e}")
+        logger.error("Error in get_snapshot: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -228,7 +742,7 @@ def get_available_symbols():
         return jsonify({"symbols": symbols})
 
     except Exception as e:
-        logger.error(f"Error fetching symbols: {e}")
+        logger.error("Error fetching symbols: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -242,8 +756,27 @@ if __name__ == "__main__":
     parser.add_argument(
         "--local", action="store_true", help="Use local database instead of Azure"
     )
+    parser.add_argument(
+        "--shared-cache",
+        nargs="?",
+        const=DEFAULT_CACHE_DIR,
+        help=f"Share fetched bars between worker processes via this directory (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="ARCHIVE",
+        help="Append upstream responses and incoming requests to this replay archive (.jsonl.gz)",
+    )
     args = parser.parse_args()
 
+    if args.record:
+        _recorder = ArchiveRecorder(args.record)
+        logger.info(f"Recording to {args.record}")
+
+    if args.shared_cache:
+        _shared_cache = SharedBarCache(args.shared_cache)
+        logger.info(f"Sharing bar cache across workers in {args.shared_cache}")
+
     if not POLYGON_API_KEY:
         logger.error(
             "POLYGON_API_KEY not found! Please set it in environment or data/common.py"
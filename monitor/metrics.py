@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Minimal Prometheus metrics for the scheduler monitoring stack
+Counters and histograms keep one cell per thread, so recording a value never
+takes a lock or contends with other threads; cells are only summed when
+/metrics is scraped. Exposes the Prometheus text format (version 0.0.4).
+"""
+import bisect
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# A sample as produced by collectors: (suffix, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+class _Sharded:
+    """Per-thread cells created on first use; only the owning thread writes its cell"""
+
+    def __init__(self, new_cell: Callable[[], list]):
+        self._new_cell = new_cell
+        self._local = threading.local()
+        self._cells: List[list] = []
+        self._lock = threading.Lock()
+
+    def cell(self) -> list:
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._new_cell()
+            with self._lock:
+                self._cells.append(cell)
+            self._local.cell = cell
+            return cell
+
+    def cells(self) -> List[list]:
+        with self._lock:
+            return list(self._cells)
+
+
+class Counter:
+    """Monotonic counter (name the family with a _total suffix)"""
+
+    def __init__(self):
+        self._shards = _Sharded(lambda: [0.0])
+
+    def inc(self, amount: float = 1.0):
+        self._shards.cell()[0] += amount
+
+    def value(self) -> float:
+        return sum(cell[0] for cell in self._shards.cells())
+
+    def samples(self) -> List[Sample]:
+        return [('', {}, self.value())]
+
+
+class Gauge:
+    """Value that can go up and down; a single attribute store, so no lock needed"""
+
+    def __init__(self, func: Optional[Callable[[], float]] = None):
+        self._value = 0.0
+        self._func = func
+
+    def set(self, value: float):
+        self._value = value
+
+    def value(self) -> float:
+        return self._func() if self._func is not None else self._value
+
+    def samples(self) -> List[Sample]:
+        return [('', {}, self.value())]
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # Cell layout: [count per bucket..., +Inf count, sum]
+        size = len(self.buckets) + 2
+        self._shards = _Sharded(lambda: [0.0] * size)
+
+    def observe(self, value: float):
+        cell = self._shards.cell()
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def samples(self) -> List[Sample]:
+        totals = [0.0] * (len(self.buckets) + 2)
+        for cell in self._shards.cells():
+            for i, v in enumerate(cell):
+                totals[i] += v
+        samples = []
+        cumulative = 0.0
+        for bound, count in zip(self.buckets + (math.inf,), totals[:-1]):
+            cumulative += count
+            samples.append(('_bucket', {'le': _format_value(bound)}, cumulative))
+        samples.append(('_count', {}, cumulative))
+        samples.append(('_sum', {}, totals[-1]))
+        return samples
+
+
+class MetricFamily:
+    """A named metric with optional labels; children are created per label set"""
+
+    def __init__(self, name: str, help_text: str, kind: str, factory: Callable,
+                 labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = factory()
+
+    def labels(self, *values, **kwargs):
+        """Child metric for one label set (cache the result on hot paths)"""
+        key = tuple(str(v) for v in values) or tuple(str(kwargs[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def __getattr__(self, attr):
+        # Unlabelled families proxy inc()/set()/observe() to their only child
+        if attr.startswith('_') or self.labelnames:
+            raise AttributeError(attr)
+        return getattr(self._children[()], attr)
+
+    def collect(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        for key, child in list(self._children.items()):
+            base = dict(zip(self.labelnames, key))
+            for suffix, labels, value in child.samples():
+                yield self.name + suffix, {**base, **labels}, value
+
+
+class Registry:
+    """Holds metric families and collector callbacks and renders them for scraping"""
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+        self._lock = threading.Lock()
+
+    def _family(self, name, help_text, kind, factory, labelnames) -> MetricFamily:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = MetricFamily(name, help_text, kind, factory, labelnames)
+                self._families[name] = family
+            return family
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._family(name, help_text, 'counter', Counter, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+              func: Optional[Callable[[], float]] = None) -> MetricFamily:
+        return self._family(name, help_text, 'gauge', lambda: Gauge(func), labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> MetricFamily:
+        return self._family(name, help_text, 'histogram', lambda: Histogram(buckets), labelnames)
+
+    def register_collector(self, collector: Callable):
+        """
+        Add a callback evaluated at scrape time. It returns an iterable of
+        (name, kind, help, [(suffix, labels, value), ...]).
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            families = list(self._families.values())
+            collectors = list(self._collectors)
+
+        for family in families:
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for name, labels, value in family.collect():
+                lines.append(_format_sample(name, labels, value))
+
+        for collector in collectors:
+            try:
+                for name, kind, help_text, samples in collector():
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for suffix, labels, value in samples:
+                        lines.append(_format_sample(name + suffix, labels, value))
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {e}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    value = float(value)
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_sample(name: str, labels: Dict[str, str], value: float) -> str:
+    if labels:
+        label_str = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+        return f"{name}{{{label_str}}} {_format_value(value)}"
+    return f"{name} {_format_value(value)}"
+
+
+# Process-wide default registry
+REGISTRY = Registry()
+
+
+def start_http_server(port: int, registry: Registry = REGISTRY,
+                      host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread (for processes without a web app)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"Serving Prometheus metrics on port {port}")
+    return server
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Record/replay harness for market_data_api and Polygon
+Recording (market_data_api.py --record ARCHIVE) appends every upstream
+Polygon exchange and every incoming UI request to a gzip'd JSON-lines
+archive, with the API key stripped. From an archive:
+
+    python polygon_replay.py info ARCHIVE
+    python polygon_replay.py serve ARCHIVE --port 5090 --speed 1
+        Stand-in for api.polygon.io answering with the recorded bodies after
+        the recorded upstream latency divided by --speed (0 = no delay).
+        Run the API against it with POLYGON_API_URL=http://127.0.0.1:5090
+    python polygon_replay.py traffic ARCHIVE --target http://127.0.0.1:5002 --speed 10
+        Replays the recorded UI requests on their original schedule compressed
+        N times and reports latency and throughput (optionally as --json).
+
+Repeated upstream requests are answered with their recordings in order (the
+last one repeats), so data that evolved during the recording evolves again.
+"""
+import argparse
+import atexit
+import gzip
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+import logging
+
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+POLYGON_ORIGIN = "https://api.polygon.io"
+# Query parameters never written to an archive
+SECRET_PARAMS = {'apikey'}
+
+
+def request_key(url: str) -> str:
+    """Path plus sorted query without credentials; how replayed requests are matched"""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k.lower() not in SECRET_PARAMS)
+    return parts.path + ('?' + urlencode(query) if query else '')
+
+
+class ArchiveRecorder:
+    """
+    Thread-safe writer for a replay archive
+    upstream_hook is a requests response hook; record_client() is called for
+    each incoming API request.
+    """
+
+    FLUSH_EVERY = 50
+
+    def __init__(self, path: str):
+        self.path = path
+        self.started = time.time()
+        self.records = 0
+        self._file = gzip.open(path, 'at', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._write({'kind': 'start', 'wall': self.started})
+        atexit.register(self.close)
+
+    def _write(self, record: dict):
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            self.records += 1
+            if self.records % self.FLUSH_EVERY == 0:
+                self._file.flush()
+
+    def upstream_hook(self, response, *args, **kwargs):
+        elapsed = response.elapsed.total_seconds()
+        self._write({
+            'kind': 'upstream',
+            't': round(time.time() - elapsed - self.started, 6),
+            'key': request_key(response.request.url),
+            'origin': '{0.scheme}://{0.netloc}'.format(urlsplit(response.request.url)),
+            'status': response.status_code,
+            'elapsed': round(elapsed, 6),
+            'body': response.text,
+        })
+        return response
+
+    def record_client(self, path_with_query: str):
+        self._write({
+            'kind': 'client',
+            't': round(time.time() - self.started, 6),
+            'path': request_key(path_with_query),
+        })
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_archive(path: str) -> Tuple[List[dict], List[dict]]:
+    """(upstream records, client records), each in recorded order"""
+    upstream, client = [], []
+    offset = 0.0
+    last_t = 0.0
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        while True:
+            try:
+                line = f.readline()
+            except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+                # A recorder stopped without close() (SIGTERM, kill) leaves the
+                # gzip stream unterminated; keep everything before the cut
+                logger.warning("Archive %s ends early (%s); using %d records",
+                               path, e, len(upstream) + len(client))
+                break
+            if not line:
+                break
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A recorder killed mid-write leaves a truncated last line
+                break
+            if record['kind'] == 'start':
+                # Appended sessions continue the timeline rather than overlapping it
+                offset = last_t
+                continue
+            record['t'] += offset
+            last_t = record['t']
+            (upstream if record['kind'] == 'upstream' else client).append(record)
+    return upstream, client
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        status, body, delay = self.server.lookup(self.path)
+        if delay > 0:
+            time.sleep(delay)
+        payload = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Local stand-in for api.polygon.io serving recorded responses"""
+
+    daemon_threads = True
+
+    def __init__(self, upstream: List[dict], port: int = 5090, host: str = '127.0.0.1',
+                 speed: float = 1.0):
+        super().__init__((host, port), _ReplayHandler)
+        self.speed = speed
+        self.origin = f"http://{host}:{self.server_port}"
+        self.responses: Dict[str, List[dict]] = defaultdict(list)
+        for record in upstream:
+            self.responses[record['key']].append(record)
+        self._served: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def lookup(self, path: str) -> Tuple[int, str, float]:
+        key = request_key(path)
+        with self._lock:
+            recordings = self.responses.get(key)
+            if not recordings:
+                self.misses += 1
+                logger.warning("No recording for %s", key)
+                return 404, json.dumps({'status': 'NOT_FOUND', 'request': key}), 0.0
+            index = min(self._served[key], len(recordings) - 1)
+            self._served[key] += 1
+            self.hits += 1
+        record = recordings[index]
+        # Pagination links must lead back here, not to Polygon
+        body = record['body'].replace(record.get('origin', POLYGON_ORIGIN), self.origin)
+        delay = record['elapsed'] / self.speed if self.speed > 0 else 0.0
+        return record['status'], body, delay
+
+    def start(self) -> 'ReplayServer':
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_traffic(client: List[dict], target: str, speed: float = 1.0,
+                concurrency: int = 32, timeout: float = 30.0) -> dict:
+    """
+    Issue the recorded client requests against `target` open-loop: each is sent
+    at its recorded offset / speed (speed 0 = back to back) whether or not
+    earlier ones have finished. Latency is measured from the scheduled send
+    time, so a backed-up server is not hidden by a slowed-down generator.
+    """
+    latencies: List[float] = []
+    statuses: Dict[str, int] = defaultdict(int)
+    bytes_received = 0
+    lock = threading.Lock()
+
+    def send(path: str, scheduled: float):
+        nonlocal bytes_received
+        try:
+            with urllib.request.urlopen(target.rstrip('/') + path, timeout=timeout) as response:
+                size = len(response.read())
+                status = str(response.status)
+        except urllib.error.HTTPError as e:
+            size, status = 0, str(e.code)
+        except (urllib.error.URLError, OSError) as e:
+            size, status = 0, type(e).__name__
+        finished = time.perf_counter()
+        with lock:
+            latencies.append(finished - scheduled)
+            statuses[status] += 1
+            bytes_received += size
+
+    first = client[0]['t'] if client else 0.0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for record in client:
+            scheduled = started + ((record['t'] - first) / speed if speed > 0 else 0.0)
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, record['path'], max(scheduled, started))
+    wall = time.perf_counter() - started
+
+    return {
+        'requests': len(client),
+        'speed': speed,
+        'concurrency': concurrency,
+        'recorded_seconds': (client[-1]['t'] - first) if client else 0.0,
+        'wall_seconds': wall,
+        'throughput_rps': len(client) / wall if wall > 0 else 0.0,
+        'statuses': dict(statuses),
+        'bytes_received': bytes_received,
+        'latency_p50_ms': percentile(latencies, 50) * 1000,
+        'latency_p95_ms': percentile(latencies, 95) * 1000,
+        'latency_p99_ms': percentile(latencies, 99) * 1000,
+        'latency_max_ms': max(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def print_report(result: dict):
+    print(f"Requests:    {result['requests']} at {result['speed']}x "
+          f"({result['recorded_seconds']:.1f}s recorded, {result['wall_seconds']:.1f}s wall)")
+    print(f"Throughput:  {result['throughput_rps']:.1f} req/s")
+    print(f"Latency:     p50 {result['latency_p50_ms']:.1f}ms  p95 {result['latency_p95_ms']:.1f}ms  "
+          f"p99 {result['latency_p99_ms']:.1f}ms  max {result['latency_max_ms']:.1f}ms")
+    print(f"Statuses:    {result['statuses']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record/replay harness for market_data_api')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    info = sub.add_parser('info', help='Summarize an archive')
+    info.add_argument('archive')
+
+    serve = sub.add_parser('serve', help='Serve recorded Polygon responses')
+    serve.add_argument('archive')
+    serve.add_argument('--port', type=int, default=5090)
+    serve.add_argument('--speed', type=float, default=1.0,
+                       help='Divide recorded upstream latency by this (0 = no delay)')
+
+    traffic = sub.add_parser('traffic', help='Replay recorded UI requests and report latency')
+    traffic.add_argument('archive')
+    traffic.add_argument('--target', default='http://127.0.0.1:5002')
+    traffic.add_argument('--speed', type=float, default=1.0,
+                         help='Compress the recorded schedule N times (0 = back to back)')
+    traffic.add_argument('--concurrency', type=int, default=32)
+    traffic.add_argument('--json', type=str, help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    setup_logging()
+    upstream, client = read_archive(args.archive)
+
+    if args.command == 'info':
+        keys = {record['key'] for record in upstream}
+        span = max([r['t'] for r in upstream + client], default=0.0)
+        print(f"{len(upstream)} upstream responses ({len(keys)} distinct), "
+              f"{len(client)} client requests over {span:.1f}s")
+    elif args.command == 'serve':
+        server = ReplayServer(upstream, port=args.port, speed=args.speed)
+        logger.info(f"Replaying {len(upstream)} responses on {server.origin} at {args.speed}x")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            logger.info(f"Served {server.hits} recorded responses, {server.misses} misses")
+            server.server_close()
+    else:
+        result = run_traffic(client, args.target, args.speed, args.concurrency)
+        print_report(result)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Automated recovery for the scheduler watchdog
+Each failed check is classified, and the failure class picks an escalation
+ladder of actions:
+
+    dead     the process is gone (pid not running)
+    hung     the process exists but stopped ticking its liveness beacon
+    stalled  the process ticks but the next execution is overdue
+    errors   too many recorded errors
+
+    actions  dump_stacks  signal the process to write all thread stacks
+                          (only if it called SchedulerMonitor.enable_stack_dumps)
+             restart      restart it through the ProcessController
+             failover     stop it and start the standby instance instead
+
+One ladder step is taken per attempt; a step can combine actions, e.g.
+["dump_stacks", "restart"], and the last step repeats. Steps run on a worker
+thread, one at a time, so a slow systemctl never delays the watchdog's
+checks; the next attempt is spaced from the end of the previous one by
+exponential backoff. Restarts are also counted across incidents: once
+flap_threshold happen within flap_window the scheduler is flapping, and
+restarts are replaced by a failover (or paused when there is no standby)
+until the window clears. Time from the first failed check to the next
+healthy one is exported as watchdog_recovery_seconds.
+
+Controllers are pluggable: systemd units, arbitrary commands, or the local
+fake in fake_scheduler.py for testing.
+"""
+import os
+import shlex
+import subprocess
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Union
+import logging
+
+from metrics import REGISTRY
+from scheduler_monitor import HealthStatus, scheduler_pid, stack_dump_path
+
+logger = logging.getLogger(__name__)
+
+FAILURE_CLASSES = ('dead', 'hung', 'stalled', 'errors')
+ACTIONS = ('dump_stacks', 'restart', 'failover')
+
+# Used when the "remediation" config block does not list actions
+DEFAULT_LADDERS = {
+    'dead': ['restart', 'restart', 'failover'],
+    'hung': [['dump_stacks', 'restart'], 'restart', 'failover'],
+    'stalled': ['dump_stacks', ['dump_stacks', 'restart'], 'failover'],
+    'errors': [],
+}
+
+RECOVERY_BUCKETS = (1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+REMEDIATIONS = REGISTRY.counter('watchdog_remediations_total',
+                                'Remediation actions by outcome',
+                                ['scheduler', 'action', 'result'])
+INCIDENTS = REGISTRY.counter('watchdog_incidents_total',
+                             'Failures that opened a remediation incident',
+                             ['scheduler', 'failure'])
+RECOVERY_SECONDS = REGISTRY.histogram('watchdog_recovery_seconds',
+                                      'First failed check to the next healthy one',
+                                      ['scheduler'], buckets=RECOVERY_BUCKETS)
+FLAPPING = REGISTRY.gauge('watchdog_flapping',
+                          '1 while restarts are paused because the scheduler keeps failing',
+                          ['scheduler'])
+
+Step = Union[str, Sequence[str]]
+
+
+class ProcessController:
+    """
+    How the watchdog restarts or replaces a scheduler.
+    restart(state_file) restarts the instance writing that state file;
+    failover(state_file) stops it, starts the standby, and returns the state
+    file the watchdog should follow from then on.
+    """
+
+    name = "controller"
+
+    @property
+    def can_failover(self) -> bool:
+        return False
+
+    def restart(self, state_file: Path):
+        raise NotImplementedError
+
+    def failover(self, state_file: Path) -> Path:
+        raise NotImplementedError(f"{self.name} has no standby configured")
+
+
+class CommandController(ProcessController):
+    """Runs shell commands; {state_file} in a command is replaced with the instance's state file"""
+
+    name = "command"
+
+    def __init__(self, restart: str, failover: Optional[str] = None,
+                 standby_state_file: Optional[str] = None, timeout: float = 60.0):
+        self.restart_command = restart
+        self.failover_command = failover
+        self.standby_state_file = Path(standby_state_file) if standby_state_file else None
+        self.timeout = timeout
+
+    @property
+    def can_failover(self) -> bool:
+        return bool(self.failover_command and self.standby_state_file)
+
+    def _run(self, command: str, state_file: Path):
+        argv = [arg.replace('{state_file}', str(state_file)) for arg in shlex.split(command)]
+        result = subprocess.run(argv, capture_output=True, text=True, timeout=self.timeout)
+        if result.returncode != 0:
+            raise RuntimeError(f"{argv[0]} exited {result.returncode}: "
+                               f"{(result.stderr or result.stdout).strip()[:200]}")
+
+    def restart(self, state_file: Path):
+        self._run(self.restart_command, state_file)
+
+    def failover(self, state_file: Path) -> Path:
+        if not self.can_failover:
+            return super().failover(state_file)
+        self._run(self.failover_command, state_file)
+        # The old primary is now the standby for the next failover
+        active, self.standby_state_file = self.standby_state_file, Path(state_file)
+        return active
+
+
+class SystemdController(CommandController):
+    """Restarts a systemd unit; failover stops it and starts the standby unit"""
+
+    name = "systemd"
+
+    def __init__(self, unit: str, standby_unit: Optional[str] = None,
+                 standby_state_file: Optional[str] = None, user: bool = False,
+                 timeout: float = 60.0):
+        self.systemctl = ['systemctl', '--user'] if user else ['systemctl']
+        self.unit = unit
+        self.standby_unit = standby_unit
+        super().__init__(self._command('restart', unit),
+                         self._failover_command() if standby_unit else None,
+                         standby_state_file, timeout)
+
+    def _command(self, verb: str, unit: str) -> str:
+        return shlex.join(self.systemctl + [verb, unit])
+
+    def _failover_command(self) -> str:
+        # Stopping first keeps two instances from ever trading at once
+        return shlex.join(['sh', '-c', f"{self._command('stop', self.unit)} && "
+                                       f"{self._command('start', self.standby_unit)}"])
+
+    def failover(self, state_file: Path) -> Path:
+        active = super().failover(state_file)
+        self.unit, self.standby_unit = self.standby_unit, self.unit
+        self.restart_command = self._command('restart', self.unit)
+        self.failover_command = self._failover_command()
+        return active
+
+
+def build_controller(spec: Dict) -> ProcessController:
+    """
+    Controller from the remediation config, e.g.
+    {"type": "systemd", "unit": "iron-condor-scheduler", "standby_unit": "...",
+     "standby_state_file": "..."} or {"type": "command", "restart": "...", "failover": "..."}
+    """
+    kind = spec.get('type', 'systemd')
+    if kind == 'systemd':
+        return SystemdController(spec['unit'], spec.get('standby_unit'),
+                                 spec.get('standby_state_file'), bool(spec.get('user', False)),
+                                 float(spec.get('timeout', 60)))
+    if kind == 'command':
+        return CommandController(spec['restart'], spec.get('failover'),
+                                 spec.get('standby_state_file'), float(spec.get('timeout', 60)))
+    raise ValueError(f"Unknown process controller type: {kind}")
+
+
+def classify_failure(status: HealthStatus, state_file: Path) -> str:
+    """Which FAILURE_CLASSES entry an unhealthy status belongs to"""
+    if not status.is_alive:
+        if scheduler_pid(state_file) is not None:
+            return 'hung'
+        return 'dead'
+    if not status.is_progressing():
+        return 'stalled'
+    return 'errors'
+
+
+class RemediationEngine:
+    """
+    Decides and runs recovery actions from the watchdog's check results.
+    observe() is called after every check and returns at once; a chosen
+    step runs on a worker thread. `notify(subject, message, fingerprint)`
+    raises an alert for each action taken.
+    """
+
+    def __init__(self, controller: ProcessController, state_file,
+                 ladders: Optional[Dict[str, List[Step]]] = None, min_failures: int = 2,
+                 backoff_initial: float = 10.0, backoff_max: float = 600.0,
+                 backoff_factor: float = 2.0, flap_window: float = 900.0,
+                 flap_threshold: int = 3, recheck_interval: float = 5.0,
+                 dump_wait: float = 0.5, notify: Callable = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.controller = controller
+        self.state_file = Path(state_file)
+        self.ladders = {**DEFAULT_LADDERS, **(ladders or {})}
+        for failure, ladder in self.ladders.items():
+            for step in ladder:
+                unknown = set(_actions(step)) - set(ACTIONS)
+                if failure not in FAILURE_CLASSES or unknown:
+                    raise ValueError(f"Bad remediation step for {failure}: {step}")
+        self.min_failures = min_failures
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.backoff_factor = backoff_factor
+        self.flap_window = flap_window
+        self.flap_threshold = flap_threshold
+        self.recheck_interval = recheck_interval
+        self.dump_wait = dump_wait
+        self.notify = notify or (lambda subject, message, fingerprint=None: None)
+        self.clock = clock
+
+        self.failing_since: Optional[float] = None
+        self.failure: Optional[str] = None
+        self.attempts = 0
+        self.next_attempt = 0.0
+        self.flapping = False
+        self.recoveries: List[float] = []
+        self._restarts = deque()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def in_incident(self) -> bool:
+        return self.failing_since is not None
+
+    @property
+    def busy(self) -> bool:
+        """Whether a step is still running"""
+        worker = self._worker
+        return worker is not None and worker.is_alive()
+
+    def observe(self, is_healthy: bool, status: Optional[HealthStatus],
+                consecutive_failures: int) -> List[str]:
+        """Track one check result; returns the actions started (e.g. ['restart'])"""
+        with self._lock:
+            now = self.clock()
+            self._prune_restarts(now)
+            if is_healthy:
+                if self.failing_since is not None:
+                    self._recovered(now)
+                return []
+            if status is None or self.busy:
+                return []
+
+            failure = classify_failure(status, self.state_file)
+            if self.failing_since is None:
+                self.failing_since = now
+                self.attempts = 0
+                self.next_attempt = 0.0
+                INCIDENTS.labels(self._name, failure).inc()
+            self.failure = failure
+
+            ladder = self.ladders.get(failure) or []
+            if not ladder or consecutive_failures < self.min_failures or now < self.next_attempt:
+                return []
+            actions = _actions(ladder[min(self.attempts, len(ladder) - 1)])
+            self.attempts += 1
+            self._worker = threading.Thread(target=self._run_step, args=(actions, status),
+                                            name='remediation', daemon=True)
+            self._worker.start()
+            return actions
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the running step (if any) finishes; False on timeout"""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+        return not self.busy
+
+    def _run_step(self, actions: List[str], status: HealthStatus):
+        for action in actions:
+            self._run(action, status)
+        with self._lock:
+            # Back off from the end of the step, so a slow restart is not retried at once
+            self.next_attempt = self.clock() + min(
+                self.backoff_max, self.backoff_initial * self.backoff_factor ** (self.attempts - 1))
+
+    def _run(self, action: str, status: HealthStatus) -> bool:
+        if action == 'restart' and self.flapping:
+            if not self.controller.can_failover:
+                self._count(action, 'skipped')
+                return False
+            action = 'failover'
+        if action == 'failover' and not self.controller.can_failover:
+            self._count(action, 'skipped')
+            return False
+
+        target = self.state_file
+        try:
+            if action == 'dump_stacks':
+                if not self._dump_stacks(status):
+                    self._count(action, 'skipped')
+                    return False
+                detail = f"Stacks written to {stack_dump_path(target)}"
+            elif action == 'restart':
+                self.controller.restart(target)
+                with self._lock:
+                    self._restarts.append(self.clock())
+                    self._check_flapping()
+                detail = f"Restarted through {self.controller.name}"
+            else:
+                self.state_file = Path(self.controller.failover(target))
+                with self._lock:
+                    self._restarts.append(self.clock())
+                detail = f"Failed over to the instance writing {self.state_file}"
+        except Exception as e:
+            self._count(action, 'error')
+            logger.error("Remediation %s failed for %s: %s", action, target, e)
+            self.notify(f"Scheduler {action} failed", f"{action} for {target} failed: {e}",
+                        f"{target}:remediation:{action}:error")
+            return False
+
+        self._count(action, 'ok')
+        logger.warning("Remediation: %s (%s, attempt %d) - %s", action, self.failure,
+                       self.attempts, detail)
+        self.notify(f"Scheduler remediation: {action}",
+                    f"Failure: {self.failure}\nAttempt: {self.attempts}\n{detail}\n"
+                    f"Time: {datetime.now().isoformat()}",
+                    f"{target}:remediation:{action}")
+        return True
+
+    def _dump_stacks(self, status: HealthStatus) -> bool:
+        """Signal the process to dump stacks; False when it cannot or did not opt in"""
+        pid = scheduler_pid(self.state_file)
+        if not status.stack_dump_signal or pid is None:
+            return False
+        os.kill(pid, status.stack_dump_signal)
+        # Let the handler write before a following restart kills the process
+        time.sleep(self.dump_wait)
+        return True
+
+    def _prune_restarts(self, now: float):
+        while self._restarts and now - self._restarts[0] > self.flap_window:
+            self._restarts.popleft()
+        if self.flapping and len(self._restarts) < self.flap_threshold:
+            self.flapping = False
+            FLAPPING.labels(self._name).set(0)
+            logger.info("Scheduler no longer flapping; automatic restarts resumed")
+
+    def _check_flapping(self):
+        if self.flapping or len(self._restarts) < self.flap_threshold:
+            return
+        self.flapping = True
+        FLAPPING.labels(self._name).set(1)
+        fallback = ("failing over instead" if self.controller.can_failover
+                    else "restarts paused")
+        self.notify("Scheduler flapping",
+                    f"{len(self._restarts)} restarts within {self.flap_window:.0f}s; {fallback} "
+                    f"until the window clears",
+                    f"{self.state_file}:remediation:flapping")
+
+    def _recovered(self, now: float):
+        elapsed = now - self.failing_since
+        self.recoveries.append(elapsed)
+        RECOVERY_SECONDS.labels(self._name).observe(elapsed)
+        if self.attempts:
+            logger.info("Scheduler recovered %.1fs after the first failed check (%d attempt(s))",
+                        elapsed, self.attempts)
+        self.failing_since = None
+        self.failure = None
+        self.attempts = 0
+
+    def _count(self, action: str, result: str):
+        REMEDIATIONS.labels(self._name, action, result).inc()
+
+    @property
+    def _name(self) -> str:
+        return self.state_file.stem
+
+
+def _actions(step: Step) -> List[str]:
+    return [step] if isinstance(step, str) else list(step)
+
+
+def build_remediation(config: Dict, state_file, notify: Callable = None,
+                      controller: ProcessController = None) -> Optional[RemediationEngine]:
+    """RemediationEngine from the watchdog config's "remediation" block, or None if absent"""
+    spec = config.get('remediation')
+    if not spec:
+        return None
+    return RemediationEngine(
+        controller or build_controller(spec.get('controller', {})),
+        state_file,
+        ladders=spec.get('actions'),
+        min_failures=int(spec.get('min_failures', 2)),
+        backoff_initial=float(spec.get('backoff_initial', 10)),
+        backoff_max=float(spec.get('backoff_max', 600)),
+        backoff_factor=float(spec.get('backoff_factor', 2)),
+        flap_window=float(spec.get('flap_window', 900)),
+        flap_threshold=int(spec.get('flap_threshold', 3)),
+        recheck_interval=float(spec.get('recheck_interval', 5)),
+        notify=notify,
+    )
@@ -4,13 +4,28 @@ Simple web dashboard for scheduler monitoring
 Run with: python scheduler_dashboard.py
 Then visit: http://localhost:5000
 """
-from flask import Flask, jsonify, render_template_string
-from scheduler_monitor import ExternalHealthChecker
-from datetime import datetime
+from flask import Flask, Response, jsonify, request
+from metrics import CONTENT_TYPE, REGISTRY
+from scheduler_monitor import (
+    ExternalHealthChecker, HealthStatus, LivenessBeacon, StateFileWatcher, process_running,
+)
+from status_history import StatusHistory, HistorySampler
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+import atexit
 import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# In-memory status time series, filled by a background sampler (see __main__)
+history = StatusHistory()
+
 HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html>
@@ -94,109 +109,442 @@ HTML_TEMPLATE = """
             margin-top: 10px;
         }
     </style>
-    <meta http-equiv="refresh" content="30">
 </head>
 <body>
     <div class="container">
         <h1>🔍 Iron Condor Scheduler Monitor</h1>
         
         <div class="status-grid">
-            <div class="status-card {{ 'healthy' if is_healthy else 'unhealthy' }}">
+            <div id="overall-card" class="status-card {{ 'healthy' if is_healthy else 'unhealthy' }}">
                 <div class="status-label">Overall Status</div>
                 <div class="status-value">
-                    <span class="status-indicator {{ 'green' if is_healthy else 'red' }}"></span>
-                    {{ 'HEALTHY' if is_healthy else 'UNHEALTHY' }}
+                    <span id="overall-indicator" class="status-indicator {{ 'green' if is_healthy else 'red' }}"></span>
+                    <span id="overall-text">{{ 'HEALTHY' if is_healthy else 'UNHEALTHY' }}</span>
                 </div>
             </div>
             
             <div class="status-card">
                 <div class="status-label">Scheduler Process</div>
                 <div class="status-value">
-                    <span class="status-indicator {{ 'green' if status.is_alive else 'red' }}"></span>
-                    {{ 'Running' if status.is_alive else 'Stopped' }}
+                    <span id="process-indicator" class="status-indicator {{ 'green' if status.is_alive else 'red' }}"></span>
+                    <span id="process-text">{{ 'Running' if status.is_alive else 'Stopped' }}</span>
                 </div>
             </div>
             
             <div class="status-card">
                 <div class="status-label">Total Executions</div>
-                <div class="status-value">{{ status.total_executions }}</div>
+                <div id="total-executions" class="status-value">{{ status.total_executions }}</div>
             </div>
             
             <div class="status-card">
                 <div class="status-label">Error Count</div>
-                <div class="status-value" style="color: {{ '#dc3545' if status.error_count > 0 else '#28a745' }}">
+                <div id="error-count" class="status-value" style="color: {{ '#dc3545' if status.error_count > 0 else '#28a745' }}">
                     {{ status.error_count }}
                 </div>
             </div>
             
             <div class="status-card">
                 <div class="status-label">Uptime</div>
-                <div class="status-value">{{ '%.1f'|format(status.uptime_seconds / 3600) }}h</div>
+                <div id="uptime" class="status-value">{{ '%.1f'|format(status.uptime_seconds / 3600) }}h</div>
             </div>
             
             <div class="status-card">
                 <div class="status-label">Last Execution</div>
-                <div class="status-value" style="font-size: 1em;">
+                <div id="last-execution" class="status-value" style="font-size: 1em;">
                     {{ status.last_execution or 'Never' }}
                 </div>
             </div>
         </div>
         
-        {% if status.last_error %}
-        <div class="error-section">
+        <div id="error-section" class="error-section" {% if not status.last_error %}style="display: none;"{% endif %}>
             <strong>⚠️ Last Error:</strong><br>
-            <code>{{ status.last_error }}</code>
+            <code id="last-error">{{ status.last_error or '' }}</code>
         </div>
-        {% endif %}
         
         <div class="timestamp">
-            Last updated: {{ now }}
+            Last updated: <span id="updated">{{ now }}</span>
         </div>
-        <div class="refresh-note">
-            Page auto-refreshes every 30 seconds
+        <div id="refresh-note" class="refresh-note">
+            Live updates
         </div>
     </div>
+    <script>
+        // Apply status pushes from /api/status/stream; fall back to reloading if unsupported
+        (function () {
+            if (!window.EventSource) {
+                document.getElementById('refresh-note').textContent = 'Page auto-refreshes every 30 seconds';
+                setTimeout(function () { location.reload(); }, 30000);
+                return;
+            }
+            var current = {};
+            function set(id, text) { document.getElementById(id).textContent = text; }
+            function render(isHealthy, s) {
+                document.getElementById('overall-card').className = 'status-card ' + (isHealthy ? 'healthy' : 'unhealthy');
+                document.getElementById('overall-indicator').className = 'status-indicator ' + (isHealthy ? 'green' : 'red');
+                set('overall-text', isHealthy ? 'HEALTHY' : 'UNHEALTHY');
+                document.getElementById('process-indicator').className = 'status-indicator ' + (s.is_alive ? 'green' : 'red');
+                set('process-text', s.is_alive ? 'Running' : 'Stopped');
+                set('total-executions', s.total_executions);
+                set('error-count', s.error_count);
+                document.getElementById('error-count').style.color = s.error_count > 0 ? '#dc3545' : '#28a745';
+                set('uptime', (s.uptime_seconds / 3600).toFixed(1) + 'h');
+                set('last-execution', s.last_execution || 'Never');
+                document.getElementById('error-section').style.display = s.last_error ? '' : 'none';
+                set('last-error', s.last_error || '');
+                set('updated', new Date().toLocaleString());
+            }
+            var source = new EventSource('/api/status/stream');
+            source.addEventListener('status', function (e) {
+                var event = JSON.parse(e.data);
+                current = event.full ? event.status : Object.assign(current, event.status);
+                render(event.is_healthy, current);
+                set('refresh-note', 'Live updates');
+            });
+            source.onerror = function () { set('refresh-note', 'Reconnecting...'); };
+        })();
+    </script>
 </body>
 </html>
 """
 
 
+# Refresh hints for /api/status pollers (seconds)
+DEFAULT_REFRESH_SECONDS = 30
+MAX_REFRESH_SECONDS = 60
+
+
+class StatusSnapshot:
+    """One health check result with its JSON responses serialized up front"""
+    
+    def __init__(self, is_healthy: bool, status: HealthStatus, file_key: Optional[tuple],
+                 valid_until: Optional[datetime], beacon: Optional[tuple] = None):
+        self.is_healthy = is_healthy
+        self.status = status
+        self.file_key = file_key
+        self.beacon = beacon
+        self.valid_until = valid_until
+        self.checked_at = time.monotonic()
+        self.taken = datetime.now()
+        self.status_json = json.dumps({
+            'is_healthy': is_healthy,
+            'status': status.to_dict(),
+            # When this answer can next change without the scheduler writing state,
+            # in UTC with an offset (valid_until itself is naive local time)
+            'freshness': {'nextChange': (valid_until.astimezone(timezone.utc).isoformat()
+                                         if valid_until else None)}
+        }).encode()
+        self.health_json = json.dumps({'status': 'ok' if is_healthy else 'error'}).encode()
+        self._html: Optional[str] = None
+    
+    def cache_headers(self) -> dict:
+        """
+        Cache-Control for pollers: the status cannot go stale before
+        valid_until, but the scheduler may write new state at any time, so
+        the hint is capped at MAX_REFRESH_SECONDS.
+        """
+        if self.valid_until is None:
+            max_age = DEFAULT_REFRESH_SECONDS
+        else:
+            remaining = (self.valid_until - datetime.now()).total_seconds()
+            max_age = int(min(max(remaining, 1), MAX_REFRESH_SECONDS))
+        return {'Cache-Control': f'private, max-age={max_age}'}
+    
+    @property
+    def html(self) -> str:
+        """Dashboard page for this snapshot, rendered at most once"""
+        if self._html is None:
+            self._html = DASHBOARD_TEMPLATE.render(
+                status=self.status,
+                is_healthy=self.is_healthy,
+                now=self.taken.strftime('%Y-%m-%d %H:%M:%S')
+            )
+        return self._html
+
+
+class StatusSnapshotCache:
+    """
+    Process-wide status snapshot shared by all routes.
+    Within `ttl` seconds the snapshot is returned without touching the disk;
+    after that it is revalidated with a single stat() and a beacon read, and
+    only re-read when the state file's inode/mtime/size or the liveness beacon
+    changed, the beacon's process exited, or the status may have gone stale.
+    Liveness never touches the state file, so a status that is not alive is
+    re-read every `ttl` (a scheduler that resumes ticking is seen at once).
+    """
+    
+    def __init__(self, checker: ExternalHealthChecker = None, ttl: float = 1.0):
+        self.checker = checker or ExternalHealthChecker()
+        self.ttl = ttl
+        self._snapshot: Optional[StatusSnapshot] = None
+        self._lock = threading.Lock()
+    
+    def _file_key(self) -> Optional[tuple]:
+        try:
+            st = self.checker.state_file.stat()
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    
+    def _beacon(self) -> Optional[tuple]:
+        return LivenessBeacon.read(self.checker.liveness_file)
+    
+    def _still_valid(self, snapshot: StatusSnapshot) -> bool:
+        if snapshot.file_key != self._file_key() or snapshot.beacon != self._beacon():
+            return False
+        if not snapshot.status.is_alive:
+            return False
+        if snapshot.beacon is not None and not process_running(*snapshot.beacon[1:]):
+            return False
+        return snapshot.valid_until is None or datetime.now() < snapshot.valid_until
+    
+    def get(self, revalidate: bool = False) -> StatusSnapshot:
+        """Current snapshot; `revalidate` skips the TTL and checks the file now"""
+        snapshot = self._snapshot
+        if (not revalidate and snapshot is not None
+                and time.monotonic() - snapshot.checked_at < self.ttl):
+            return snapshot
+        
+        with self._lock:
+            # Another request may have refreshed while we waited
+            snapshot = self._snapshot
+            if (not revalidate and snapshot is not None
+                    and time.monotonic() - snapshot.checked_at < self.ttl):
+                return snapshot
+            if snapshot is not None and self._still_valid(snapshot):
+                snapshot.checked_at = time.monotonic()
+                return snapshot
+            
+            file_key, beacon = self._file_key(), self._beacon()
+            is_healthy, status = self.checker.check()
+            valid_until = status.next_transition() if status.is_alive else None
+            self._snapshot = StatusSnapshot(is_healthy, status, file_key, valid_until, beacon)
+            return self._snapshot
+
+
+class StatusEvent:
+    """A published status change: the full status plus the fields that changed"""
+    
+    def __init__(self, version: int, snapshot: StatusSnapshot, changed: dict):
+        self.version = version
+        self.snapshot = snapshot
+        self.full = json.dumps({
+            'full': True,
+            'is_healthy': snapshot.is_healthy,
+            'status': snapshot.status.to_dict()
+        })
+        self.delta = json.dumps({
+            'full': False,
+            'is_healthy': snapshot.is_healthy,
+            'status': changed
+        })
+
+
+class StatusBroadcaster:
+    """
+    One watcher thread waits for state file changes (inotify) or the moment
+    the current status goes stale, and publishes the change. Any number of
+    stream clients block on a shared condition and each pull the latest event,
+    so per-viewer cost is one waiting thread and no extra file I/O.
+    """
+    
+    KEEPALIVE_SECONDS = 15
+    # Beacon ticks and process exits cause no file events, so re-check at least this often
+    LIVENESS_RECHECK_SECONDS = 5.0
+    
+    def __init__(self, cache: "StatusSnapshotCache"):
+        self.cache = cache
+        self.latest: Optional[StatusEvent] = None
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+    
+    def ensure_started(self):
+        with self._start_lock:
+            if self._thread is None:
+                # Watch before the first publish so no write in between is missed
+                watcher = StateFileWatcher(str(self.cache.checker.state_file))
+                self._publish(self.cache.get(revalidate=True))
+                self._thread = threading.Thread(target=self._run, args=(watcher,),
+                                                name="status-broadcaster", daemon=True)
+                self._thread.start()
+    
+    def _run(self, watcher: StateFileWatcher):
+        try:
+            while True:
+                snapshot = self.latest.snapshot
+                if not snapshot.status.is_alive:
+                    timeout = self.cache.ttl
+                else:
+                    timeout = self.LIVENESS_RECHECK_SECONDS
+                    if snapshot.valid_until is not None:
+                        remaining = (snapshot.valid_until - datetime.now()).total_seconds()
+                        timeout = min(timeout, max(0.0, remaining) + 0.005)
+                watcher.wait(timeout)
+                try:
+                    self._publish(self.cache.get(revalidate=True))
+                except Exception as e:
+                    logger.error(f"Status broadcast failed: {e}")
+        finally:
+            watcher.close()
+    
+    def _publish(self, snapshot: StatusSnapshot):
+        previous = self.latest
+        status = snapshot.status.to_dict()
+        if previous is not None:
+            if previous.snapshot is snapshot:
+                return
+            old = previous.snapshot.status.to_dict()
+            changed = {k: v for k, v in status.items() if old.get(k) != v}
+            if not changed and previous.snapshot.is_healthy == snapshot.is_healthy:
+                return
+        else:
+            changed = status
+        
+        with self._condition:
+            version = previous.version + 1 if previous else 1
+            self.latest = StatusEvent(version, snapshot, changed)
+            self._condition.notify_all()
+    
+    def wait_for(self, after_version: int, timeout: float) -> Optional[StatusEvent]:
+        """Block until an event newer than `after_version` exists, or timeout"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.latest is not None and self.latest.version > after_version,
+                timeout
+            )
+            event = self.latest
+        if event is None or event.version <= after_version:
+            return None
+        return event
+
+
+# Compiled once; rendering reuses it for every snapshot
+DASHBOARD_TEMPLATE = app.jinja_env.from_string(HTML_TEMPLATE)
+
+snapshots = StatusSnapshotCache()
+broadcaster = StatusBroadcaster(snapshots)
+
+
 @app.route('/')
 def dashboard():
     """Render the main dashboard"""
-    checker = ExternalHealthChecker()
-    is_healthy, status = checker.check()
-    
-    return render_template_string(
-        HTML_TEMPLATE,
-        status=status,
-        is_healthy=is_healthy,
-        now=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    )
+    return Response(snapshots.get().html, mimetype='text/html')
 
 
 @app.route('/api/status')
 def api_status():
     """JSON API endpoint for status"""
-    checker = ExternalHealthChecker()
-    is_healthy, status = checker.check()
-    
-    return jsonify({
-        'is_healthy': is_healthy,
-        'status': status.to_dict()
-    })
+    snapshot = snapshots.get()
+    return Response(snapshot.status_json, mimetype='application/json',
+                    headers=snapshot.cache_headers())
 
 
 @app.route('/api/health')
 def health_check():
     """Simple health check endpoint for load balancers"""
-    checker = ExternalHealthChecker()
-    is_healthy, status = checker.check()
+    snapshot = snapshots.get()
+    return Response(snapshot.health_json, status=200 if snapshot.is_healthy else 503,
+                    mimetype='application/json')
+
+
+@app.route('/api/status/stream')
+def api_status_stream():
+    """
+    Server-sent events: a full `status` event on connect, then only the
+    changed fields each time the scheduler persists a change. Comment lines
+    are sent as keep-alives while nothing changes.
+    """
+    broadcaster.ensure_started()
+    
+    def stream():
+        last_version = 0
+        yield "retry: 5000\n\n"
+        while True:
+            event = broadcaster.wait_for(last_version, StatusBroadcaster.KEEPALIVE_SECONDS)
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            # Clients that missed an intermediate event get the full status again
+            data = event.delta if last_version and event.version == last_version + 1 else event.full
+            last_version = event.version
+            yield f"event: status\nid: {event.version}\ndata: {data}\n\n"
     
-    if is_healthy:
-        return jsonify({'status': 'ok'}), 200
-    else:
-        return jsonify({'status': 'error'}), 503
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # disable proxy buffering (nginx)
+    })
+
+
+def _collect_state_metrics():
+    """Scheduler state as seen through the shared snapshot (no extra file reads)"""
+    snapshot = snapshots.get()
+    status = snapshot.status
+    labels = {'scheduler': snapshots.checker.state_file.stem}
+    
+    heartbeat_age = []
+    if status.last_execution:
+        age = (datetime.now() - datetime.fromisoformat(status.last_execution)).total_seconds()
+        heartbeat_age.append(('', labels, age))
+    liveness_age = []
+    if status.last_liveness:
+        age = (datetime.now() - datetime.fromisoformat(status.last_liveness)).total_seconds()
+        liveness_age.append(('', labels, age))
+    state_age = []
+    if snapshot.file_key is not None:
+        state_age.append(('', labels, time.time() - snapshot.file_key[1] / 1e9))
+    
+    yield ('scheduler_up', 'gauge', '1 if the scheduler passes its health check',
+           [('', labels, 1 if snapshot.is_healthy else 0)])
+    yield ('scheduler_alive', 'gauge', '1 if the scheduler state file is present and fresh',
+           [('', labels, 1 if status.is_alive else 0)])
+    yield ('scheduler_state_executions', 'gauge', 'Total executions in the state file',
+           [('', labels, status.total_executions)])
+    yield ('scheduler_state_errors', 'gauge', 'Error count in the state file',
+           [('', labels, status.error_count)])
+    yield ('scheduler_uptime_seconds', 'gauge', 'Scheduler uptime reported in the state file',
+           [('', labels, status.uptime_seconds)])
+    yield ('scheduler_last_execution_age_seconds', 'gauge', 'Seconds since the last execution',
+           heartbeat_age)
+    yield ('scheduler_liveness_age_seconds', 'gauge', 'Seconds since the last liveness tick',
+           liveness_age)
+    yield ('scheduler_state_file_age_seconds', 'gauge', 'Seconds since the state file was written',
+           state_age)
+
+
+REGISTRY.register_collector(_collect_state_metrics)
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+def _parse_time(value, default: float) -> float:
+    """Accept epoch seconds or an ISO-8601 timestamp"""
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+@app.route('/api/status/history')
+def api_status_history():
+    """Aggregated status history: /api/status/history?from=&to=&step="""
+    try:
+        now = time.time()
+        end = _parse_time(request.args.get('to'), now)
+        start = _parse_time(request.args.get('from'), end - timedelta(days=1).total_seconds())
+        step = request.args.get('step', type=float)
+    except ValueError as e:
+        return jsonify({'error': f"Invalid time parameter: {e}"}), 400
+    
+    if start >= end:
+        return jsonify({'error': "'from' must be before 'to'"}), 400
+    
+    return jsonify(history.query(start, end, step))
 
 
 if __name__ == '__main__':
@@ -204,10 +552,25 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Iron Condor Scheduler Dashboard')
     parser.add_argument('--port', type=int, default=5001,
                        help='Port to run on (default: 5001 to avoid conflicts with main API)')
+    parser.add_argument('--history-file', type=str, default='/tmp/scheduler_history.bin',
+                       help='Where to persist status history (default: /tmp/scheduler_history.bin)')
+    parser.add_argument('--sample-interval', type=float, default=30,
+                       help='Seconds between status history samples (default: 30)')
     args = parser.parse_args()
 
+    if Path(args.history_file).exists():
+        try:
+            history = StatusHistory.load(args.history_file, history.capacity)
+            print(f"Loaded {len(history)} history samples from {args.history_file}")
+        except (OSError, ValueError) as e:
+            print(f"Could not load status history: {e}")
+    sampler = HistorySampler(history, interval=args.sample_interval,
+                             persist_path=args.history_file).start()
+    atexit.register(sampler.stop)
+
     # Run on all interfaces so you can access from other machines
     print(f"Starting Iron Condor Scheduler Dashboard on port {args.port}...")
     print(f"Access at: http://localhost:{args.port}")
     print(f"API endpoints: http://localhost:{args.port}/api/status")
-    app.run(host='0.0.0.0', port=args.port, debug=False)
+    print(f"Live updates: http://localhost:{args.port}/api/status/stream")
+    app.run(host='0.0.0.0', port=args.port, debug=False, threaded=True)
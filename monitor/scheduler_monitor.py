@@ -3,28 +3,91 @@
 Iron Condor Scheduler Monitor
 Provides health checks, logging, and alerting for the scheduler
 """
+import faulthandler
 import json
 import time
 import os
+import signal
 import sys
+import select
+import struct
+import ctypes
+import ctypes.util
+import mmap
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 from typing import Optional, Dict, Any
 import threading
+import weakref
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from job_profiler import SlowJobProfiler
+from log_setup import RateLimitFilter, setup_logging
+from metrics import REGISTRY
+from status_socket import DEFAULT_SOCKET, StatusSocketServer
+
+# Configure logging (queued, so heartbeats never wait on console or disk I/O)
+setup_logging()
 logger = logging.getLogger(__name__)
+# Per-run chatter (heartbeats) is throttled per template on its own child
+# logger; warnings and errors go to `logger` and are never dropped
+run_logger = logger.getChild('runs')
+run_logger.addFilter(RateLimitFilter(rate=1.0, burst=10))
+
+# Health thresholds shared by the in-process monitor and external checkers
+EXECUTION_TIMEOUT = timedelta(minutes=5)
+STATE_STALE_AFTER = timedelta(minutes=2)
+# A process that has not ticked its liveness beacon for this long is considered dead
+LIVENESS_TIMEOUT = timedelta(seconds=60)
+# Signal that makes a scheduler with enable_stack_dumps() write all thread stacks
+STACK_DUMP_SIGNAL = signal.SIGUSR1
+
+# In-process Prometheus metrics (served by metrics.start_http_server)
+EXECUTIONS = REGISTRY.counter('scheduler_executions_total',
+                              'Successful executions recorded by heartbeat()', ['scheduler'])
+ERRORS = REGISTRY.counter('scheduler_errors_total',
+                          'Errors recorded by record_error()', ['scheduler'])
+JOB_DURATION = REGISTRY.histogram('scheduler_job_duration_seconds',
+                                  'Wall time of jobs run under track_job()', ['scheduler', 'job'])
+JOB_RUNS = REGISTRY.counter('scheduler_job_runs_total',
+                            'Jobs run under track_job() by outcome', ['scheduler', 'job', 'outcome'])
+JOB_MISFIRES = REGISTRY.counter('scheduler_job_misfires_total',
+                                'Runs dropped for missing their misfire grace time', ['scheduler', 'job'])
+JOB_SKIPPED = REGISTRY.counter('scheduler_job_skipped_total',
+                               'Runs skipped because of max_instances or coalescing',
+                               ['scheduler', 'job', 'reason'])
+JOB_QUEUE_WAIT = REGISTRY.histogram('scheduler_job_queue_wait_seconds',
+                                    'Time a submitted job waited for an executor worker',
+                                    ['scheduler', 'job'])
+JOB_START_DELAY = REGISTRY.histogram('scheduler_job_start_delay_seconds',
+                                     'Time from scheduled run time to the job starting',
+                                     ['scheduler', 'job'])
+
+_monitors: "weakref.WeakSet[SchedulerMonitor]" = weakref.WeakSet()
+
 
+def _collect_heartbeat_age():
+    """Scrape-time heartbeat age for every live SchedulerMonitor in this process"""
+    now = time.time()
+    samples = []
+    for monitor in list(_monitors):
+        if monitor.last_execution_ts is not None:
+            samples.append(('', {'scheduler': monitor.name}, now - monitor.last_execution_ts))
+    yield ('scheduler_heartbeat_age_seconds', 'gauge',
+           'Seconds since the last recorded execution', samples)
 
-@dataclass
+
+REGISTRY.register_collector(_collect_heartbeat_age)
+
+
+@dataclass(slots=True)
 class HealthStatus:
-    """Represents the health status of the scheduler"""
+    """
+    Represents the health status of the scheduler
+    Slotted (no per-instance __dict__), since one is built on every save and check.
+    """
     timestamp: str
     is_alive: bool
     last_execution: Optional[str]
@@ -33,26 +96,201 @@ class HealthStatus:
     uptime_seconds: float
     active_jobs: int
     total_executions: int
+    scheduling: Optional[Dict[str, Any]] = None  # misfire / skip / queue wait summary
+    last_liveness: Optional[str] = None      # last liveness tick (process is running)
+    progress_deadline: Optional[str] = None  # next execution expected by (job progress)
+    stack_dump_signal: Optional[int] = None  # set when the process dumps stacks on this signal
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        """Field values by name; nested values (scheduling) are shared, not copied"""
+        return {name: getattr(self, name) for name in _HEALTH_FIELDS}
     
     def is_healthy(self) -> bool:
         """Determine if the scheduler is in a healthy state"""
         if not self.is_alive:
             return False
         
-        # Check if we've had recent activity (within last 5 minutes)
-        if self.last_execution:
-            last_exec_time = datetime.fromisoformat(self.last_execution)
-            if datetime.now() - last_exec_time > timedelta(minutes=5):
-                return False
+        if not self.is_progressing():
+            return False
         
         # Too many recent errors is unhealthy
         if self.error_count > 10:
             return False
         
         return True
+    
+    def is_progressing(self) -> bool:
+        """
+        Job progress, judged apart from liveness: the next execution is not
+        overdue. Without a declared deadline, an execution is expected within
+        EXECUTION_TIMEOUT of the last one.
+        """
+        now = datetime.now()
+        if self.progress_deadline:
+            return now <= datetime.fromisoformat(self.progress_deadline)
+        if self.last_execution:
+            return now - datetime.fromisoformat(self.last_execution) <= EXECUTION_TIMEOUT
+        return True
+    
+    def next_transition(self) -> Optional[datetime]:
+        """
+        Earliest time at which this status goes stale purely through the passage
+        of time (liveness tick or state file too old, or the next execution
+        overdue). Until then, re-checking an unchanged state gives the same answer.
+        """
+        try:
+            if self.last_liveness:
+                due = [datetime.fromisoformat(self.last_liveness) + LIVENESS_TIMEOUT]
+            else:
+                due = [datetime.fromisoformat(self.timestamp) + STATE_STALE_AFTER]
+            if self.progress_deadline:
+                due.append(datetime.fromisoformat(self.progress_deadline))
+            elif self.last_execution:
+                due.append(datetime.fromisoformat(self.last_execution) + EXECUTION_TIMEOUT)
+        except (TypeError, ValueError):
+            return None
+        return min(due)
+
+
+_HEALTH_FIELDS = tuple(f.name for f in fields(HealthStatus))
+
+
+def stack_dump_path(state_file) -> Path:
+    """Where a scheduler with enable_stack_dumps() appends its thread stacks"""
+    state_file = Path(state_file)
+    return state_file.with_name(state_file.stem + '.stacks')
+
+
+def liveness_path(state_file) -> Path:
+    """
+    Where the liveness beacon for a state file lives: shared memory
+    (/dev/shm) when available, otherwise next to the state file.
+    """
+    state_file = Path(state_file).absolute()
+    shm = Path('/dev/shm')
+    if shm.is_dir():
+        return shm / (str(state_file).strip('/').replace('/', '_') + '.alive')
+    return state_file.with_name(state_file.name + '.alive')
+
+
+class LivenessBeacon:
+    """
+    Process liveness as a timestamp in a small shared memory mapping.
+    tick() is a couple of memory stores - no write() call and no state file
+    rewrite - so it can run as often as needed. Readers in other processes
+    use read(). It is a seqlock: the writer makes the sequence counter odd,
+    writes the payload, then makes it even again; a reader retries unless it
+    saw the same even counter before and after reading the payload.
+    """
+
+    SEQ = struct.Struct('<Q')
+    # wall clock time, pid, process start time (so a reused pid is not mistaken for it)
+    PAYLOAD = struct.Struct('<dQQ')
+    SIZE = SEQ.size + PAYLOAD.size
+    READ_ATTEMPTS = 100
+
+    def __init__(self, path):
+        self.path = Path(path)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, self.SIZE)
+            self._map = mmap.mmap(fd, self.SIZE)
+        finally:
+            os.close(fd)
+        self._seq = 0
+        self._pid = os.getpid()
+        self._start_time = process_start_time(self._pid)
+        self._lock = threading.Lock()
+
+    def tick(self, now: float = None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._seq += 2
+            self.SEQ.pack_into(self._map, 0, self._seq - 1)
+            self.PAYLOAD.pack_into(self._map, self.SEQ.size, now, self._pid, self._start_time)
+            self.SEQ.pack_into(self._map, 0, self._seq)
+
+    @classmethod
+    def read(cls, path) -> Optional[tuple]:
+        """(timestamp, pid, process start time) of the last tick, or None if there is no beacon"""
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return None
+        try:
+            for attempt in range(cls.READ_ATTEMPTS):
+                if attempt:
+                    # Let the writer finish its update
+                    os.sched_yield()
+                data = os.pread(fd, cls.SIZE, 0)
+                if len(data) < cls.SIZE:
+                    return None
+                (seq,) = cls.SEQ.unpack_from(data)
+                if not seq or seq % 2:
+                    continue
+                payload = cls.PAYLOAD.unpack_from(data, cls.SEQ.size)
+                # A write that started after the counter was read changes it
+                if cls.SEQ.unpack(os.pread(fd, cls.SEQ.size, 0)) == (seq,):
+                    return payload
+            return None
+        finally:
+            os.close(fd)
+
+    def close(self):
+        self._map.close()
+
+
+def _pid_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # exists but owned by someone else
+    return True
+
+
+def _proc_stat(pid: int) -> Optional[tuple]:
+    """(state, start time in clock ticks since boot) from /proc/<pid>/stat, if readable"""
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            stat = f.read()
+        # The command name may contain spaces and parentheses; fields resume after the last ')'
+        fields = stat[stat.rindex(b')') + 2:].split()
+        return fields[0].decode(), int(fields[19])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def process_start_time(pid: int) -> int:
+    """Start time of a process in clock ticks since boot (/proc/<pid>/stat), 0 if unknown"""
+    stat = _proc_stat(pid)
+    return stat[1] if stat is not None else 0
+
+
+def process_running(pid: int, start_time: int = 0) -> bool:
+    """
+    Whether the process that wrote a beacon still runs: the pid exists and,
+    when both start times are known, it started at the same moment - after
+    a crash the pid may already belong to an unrelated process.
+    """
+    if not _pid_running(pid):
+        return False
+    stat = _proc_stat(pid)
+    if stat is None:
+        return True
+    state, current = stat
+    if state == 'Z':
+        return False  # exited, not yet reaped by its parent
+    return not start_time or current == start_time
+
+
+def scheduler_pid(state_file) -> Optional[int]:
+    """Pid of the process ticking a state file's liveness beacon, if that process still runs"""
+    beacon = LivenessBeacon.read(liveness_path(state_file))
+    if beacon is None or not process_running(beacon[1], beacon[2]):
+        return None
+    return beacon[1]
 
 
 class SchedulerMonitor:
@@ -65,11 +303,62 @@ class SchedulerMonitor:
         self.error_count = 0
         self.last_error = None
         self.last_execution = None
+        self.last_execution_ts: Optional[float] = None
+        self.progress_deadline: Optional[str] = None
+        self.last_liveness_ts: Optional[float] = None
+        self.scheduling = {
+            'misfires': 0,
+            'skipped_runs': 0,
+            'last_queue_wait_seconds': None,
+            'max_queue_wait_seconds': 0.0,
+            'last_start_delay_seconds': None,
+            'max_start_delay_seconds': 0.0,
+        }
         self.lock = threading.Lock()
         
+        # Metric children are resolved once so heartbeat() only bumps a per-thread cell
+        self.name = self.state_file.stem
+        self._executions_metric = EXECUTIONS.labels(self.name)
+        self._errors_metric = ERRORS.labels(self.name)
+        _monitors.add(self)
+        
+        # Opt-in slow-job profiler; track_job() only checks this attribute while it is None
+        self._profiler: Optional[SlowJobProfiler] = None
+        
+        # Opt-in stack dumps on a signal, for the watchdog's remediation
+        self.stack_dump_signal: Optional[int] = None
+        self._stack_dump_file = None
+        
         # Load existing state if available
         self._load_state()
         
+        # Liveness is published through shared memory, not the state file,
+        # once this process starts recording (see start())
+        self._beacon: Optional[LivenessBeacon] = None
+        self._started = False
+        self._start_lock = threading.Lock()
+    
+    def start(self) -> 'SchedulerMonitor':
+        """
+        Start publishing as the scheduler process: open the liveness beacon,
+        tick it, and write the state file (uptime, loaded counters) once up
+        front. The first tick() or heartbeat() calls this, so a monitor that
+        only reads status (e.g. a --status command) never overwrites the
+        running scheduler's beacon or state.
+        """
+        with self._start_lock:
+            if self._started:
+                return self
+            try:
+                self._beacon = LivenessBeacon(liveness_path(self.state_file))
+            except OSError as e:
+                logger.warning(f"Liveness beacon unavailable, external checks use state file age: {e}")
+            self._started = True
+        self.tick()
+        with self.lock:
+            self._save_state()
+        return self
+        
     def _load_state(self):
         """Load state from disk if it exists"""
         if self.state_file.exists():
@@ -80,34 +369,193 @@ class SchedulerMonitor:
                     self.error_count = state.get('error_count', 0)
                     self.last_error = state.get('last_error')
                     self.last_execution = state.get('last_execution')
+                    self.progress_deadline = state.get('progress_deadline')
+                    if self.last_execution:
+                        self.last_execution_ts = datetime.fromisoformat(self.last_execution).timestamp()
                     logger.info(f"Loaded existing state: {state}")
             except Exception as e:
                 logger.warning(f"Could not load state: {e}")
     
     def _save_state(self):
-        """Persist current state to disk"""
+        """
+        Persist current state to disk
+        Written to a temporary file and renamed over the state file, so a
+        checker never reads a half-written file and mistakes it for a failure.
+        """
         status = self.get_status()
+        tmp = self.state_file.with_name(f".{self.state_file.name}.{os.getpid()}.tmp")
         try:
-            with open(self.state_file, 'w') as f:
+            with open(tmp, 'w') as f:
                 json.dump(status.to_dict(), f, indent=2)
+            os.replace(tmp, self.state_file)
         except Exception as e:
             logger.error(f"Could not save state: {e}")
     
+    def tick(self):
+        """
+        Liveness tick: the process is up and its scheduler is dispatching.
+        Only updates a timestamp in shared memory - no file write, and it does
+        not count as an execution. Schedule it every few seconds.
+        """
+        if not self._started:
+            self.start()
+            return
+        now = time.time()
+        self.last_liveness_ts = now
+        if self._beacon is not None:
+            self._beacon.tick(now)
+    
+    def expect_next_execution(self, when: Optional[datetime], grace: timedelta = EXECUTION_TIMEOUT,
+                              save: bool = False):
+        """
+        Declare when the next execution is due (e.g. the job's next run time),
+        so progress is judged against the schedule instead of a fixed timeout -
+        quiet periods such as nights and weekends then stay healthy.
+        Persisted with the next heartbeat/error unless `save` is set; None goes
+        back to the default.
+        """
+        if when is not None and when.tzinfo is not None:
+            when = when.astimezone().replace(tzinfo=None)
+        with self.lock:
+            self.progress_deadline = (when + grace).isoformat() if when is not None else None
+            if save:
+                self._save_state()
+    
     def heartbeat(self):
         """Record a heartbeat - call this on each successful execution"""
+        if not self._started:
+            self.start()
         with self.lock:
-            self.last_execution = datetime.now().isoformat()
+            now = datetime.now()
+            self.last_execution = now.isoformat()
+            self.last_execution_ts = now.timestamp()
+            self.tick()
             self.execution_count += 1
+            self._executions_metric.inc()
             self._save_state()
-            logger.debug(f"Heartbeat recorded: execution #{self.execution_count}")
+            run_logger.debug("Heartbeat recorded: execution #%d", self.execution_count)
     
     def record_error(self, error: str):
         """Record an error occurrence"""
         with self.lock:
             self.error_count += 1
+            self._errors_metric.inc()
             self.last_error = f"{datetime.now().isoformat()}: {error}"
             self._save_state()
-            logger.error(f"Error recorded: {error}")
+            logger.error("Error recorded: %s", error)
+    
+    @contextmanager
+    def track_job(self, job_id: str):
+        """
+        Time a block of job work into the per-job latency histogram:
+            with monitor.track_job('iron_condor_check'):
+                do_checks()
+        """
+        profiler = self._profiler
+        watch = profiler.watch(job_id) if profiler is not None else None
+        start = time.perf_counter()
+        outcome = 'success'
+        try:
+            yield
+        except BaseException:
+            outcome = 'error'
+            raise
+        finally:
+            if watch is not None:
+                profiler.finish(watch)
+            JOB_DURATION.labels(self.name, job_id).observe(time.perf_counter() - start)
+            JOB_RUNS.labels(self.name, job_id, outcome).inc()
+    
+    def enable_slow_job_profiling(self, budget: float = 30.0,
+                                  budgets: Optional[Dict[str, float]] = None,
+                                  output_dir: str = None, **options) -> SlowJobProfiler:
+        """
+        Sample the stack of any track_job() block that runs longer than its
+        budget (seconds, overridable per job id). Collapsed-stack profiles go
+        to `output_dir`, by default a <state file stem>_profiles directory
+        next to the state file. Extra options (interval, max_duration,
+        min_gap) are passed to SlowJobProfiler.
+        """
+        self.disable_slow_job_profiling()
+        if output_dir is None:
+            output_dir = self.state_file.with_name(f"{self.state_file.stem}_profiles")
+        self._profiler = SlowJobProfiler(output_dir, budget, budgets, **options)
+        logger.info(f"Slow-job profiling enabled (budget {budget}s, profiles in {output_dir})")
+        return self._profiler
+    
+    def enable_stack_dumps(self, signum: int = STACK_DUMP_SIGNAL, path: str = None):
+        """
+        Append the stacks of all threads to `path` (default: stack_dump_path())
+        whenever the process receives `signum`. Runs in the signal handler at
+        the C level, so it works while every Python thread is stuck. The signal
+        is published in the state file; the watchdog only sends it when set.
+        """
+        path = Path(path) if path else stack_dump_path(self.state_file)
+        self.disable_stack_dumps()
+        self._stack_dump_file = open(path, 'a')
+        faulthandler.register(signum, file=self._stack_dump_file, all_threads=True)
+        with self.lock:
+            self.stack_dump_signal = int(signum)
+            self._save_state()
+        logger.info("Stack dumps on signal %d go to %s", signum, path)
+    
+    def disable_stack_dumps(self):
+        if self.stack_dump_signal is None:
+            return
+        faulthandler.unregister(self.stack_dump_signal)
+        self._stack_dump_file.close()
+        with self.lock:
+            self.stack_dump_signal = None
+            self._stack_dump_file = None
+            self._save_state()
+    
+    def disable_slow_job_profiling(self):
+        profiler, self._profiler = self._profiler, None
+        if profiler is not None:
+            profiler.close()
+    
+    def record_misfire(self, job_id: str, lateness: float):
+        """A run was dropped because it started more than misfire_grace_time late"""
+        JOB_MISFIRES.labels(self.name, job_id).inc()
+        with self.lock:
+            self.scheduling['misfires'] += 1
+        logger.warning("Job %s misfired: %.1fs late", job_id, lateness)
+    
+    def record_skipped_run(self, job_id: str, reason: str, count: int = 1):
+        """Runs that never happened (reason: 'max_instances' or 'coalesced')"""
+        JOB_SKIPPED.labels(self.name, job_id, reason).inc(count)
+        with self.lock:
+            self.scheduling['skipped_runs'] += count
+        logger.warning("Job %s: %d run(s) skipped (%s)", job_id, count, reason)
+    
+    def record_job_start(self, job_id: str, queue_wait: float, start_delay: float):
+        """
+        Scheduling lag for one run: `queue_wait` from submission to a worker
+        picking it up, `start_delay` from the scheduled run time to the start.
+        Kept in memory and persisted with the next state write.
+        """
+        JOB_QUEUE_WAIT.labels(self.name, job_id).observe(queue_wait)
+        JOB_START_DELAY.labels(self.name, job_id).observe(start_delay)
+        with self.lock:
+            sched = self.scheduling
+            sched['last_queue_wait_seconds'] = round(queue_wait, 6)
+            sched['max_queue_wait_seconds'] = round(max(sched['max_queue_wait_seconds'], queue_wait), 6)
+            sched['last_start_delay_seconds'] = round(start_delay, 6)
+            sched['max_start_delay_seconds'] = round(max(sched['max_start_delay_seconds'], start_delay), 6)
+    
+    def serve_status_socket(self, path: str = DEFAULT_SOCKET) -> StatusSocketServer:
+        """
+        Answer PING/HEALTH/STATUS on a Unix socket from in-memory state, so
+        scripted health checks need neither a Python start nor a file read
+        """
+        def provider():
+            status = self.get_status()
+            is_healthy, reason = describe_health(status)
+            return is_healthy, reason, status.to_dict()
+        
+        server = StatusSocketServer(provider, path).start()
+        logger.info(f"Serving status on {path}")
+        return server
     
     def reset_errors(self):
         """Reset error counter (useful after recovering)"""
@@ -118,18 +566,29 @@ class SchedulerMonitor:
             logger.info("Error counter reset")
     
     def get_status(self) -> HealthStatus:
-        """Get current health status"""
+        """
+        Get current health status
+        is_alive means this monitor has ticked within LIVENESS_TIMEOUT, so a
+        process whose scheduler has stopped dispatching reports itself dead.
+        """
         uptime = (datetime.now() - self.start_time).total_seconds()
+        ticked = self.last_liveness_ts
         
         return HealthStatus(
             timestamp=datetime.now().isoformat(),
-            is_alive=True,
+            is_alive=(ticked is not None
+                      and time.time() - ticked <= LIVENESS_TIMEOUT.total_seconds()),
             last_execution=self.last_execution,
             error_count=self.error_count,
             last_error=self.last_error,
             uptime_seconds=uptime,
             active_jobs=1,  # You can update this based on actual job count
-            total_executions=self.execution_count
+            total_executions=self.execution_count,
+            scheduling=dict(self.scheduling),
+            last_liveness=(datetime.fromtimestamp(self.last_liveness_ts).isoformat()
+                           if self.last_liveness_ts else None),
+            progress_deadline=self.progress_deadline,
+            stack_dump_signal=self.stack_dump_signal
         )
     
     def check_health(self) -> tuple[bool, str]:
@@ -137,28 +596,53 @@ class SchedulerMonitor:
         Check if the scheduler is healthy
         Returns: (is_healthy, message)
         """
-        status = self.get_status()
-        
-        if not status.is_healthy():
-            if not status.is_alive:
-                return False, "Scheduler is not running"
-            elif status.last_execution is None:
-                return False, "No executions recorded yet"
-            elif status.error_count > 10:
-                return False, f"Too many errors: {status.error_count}"
-            else:
-                last_exec = datetime.fromisoformat(status.last_execution)
-                minutes_ago = (datetime.now() - last_exec).total_seconds() / 60
-                return False, f"No recent activity (last execution {minutes_ago:.1f} minutes ago)"
-        
-        return True, "All systems operational"
+        return describe_health(self.get_status())
+
+
+def describe_health(status: HealthStatus) -> tuple[bool, str]:
+    """(is_healthy, human readable reason) for a status"""
+    if not status.is_healthy():
+        if not status.is_alive:
+            return False, "Scheduler is not running"
+        elif status.last_execution is None:
+            return False, "No executions recorded yet"
+        elif status.error_count > 10:
+            return False, f"Too many errors: {status.error_count}"
+        elif status.progress_deadline:
+            return False, f"Next execution overdue (expected by {status.progress_deadline})"
+        else:
+            last_exec = datetime.fromisoformat(status.last_execution)
+            minutes_ago = (datetime.now() - last_exec).total_seconds() / 60
+            return False, f"No recent activity (last execution {minutes_ago:.1f} minutes ago)"
+    
+    return True, "All systems operational"
 
 
 class ExternalHealthChecker:
-    """Standalone health checker that can run independently"""
+    """
+    Standalone health checker that can run independently.
+    Judges liveness (the process is up: recent beacon tick, pid exists) and
+    progress (the next execution is not overdue) separately. Monitors
+    without a beacon fall back to the state file age for liveness.
+    """
     
     def __init__(self, state_file: str = "/tmp/scheduler_state.json"):
         self.state_file = Path(state_file)
+        self.liveness_file = liveness_path(self.state_file)
+    
+    def _is_alive(self, status: HealthStatus) -> bool:
+        """Fills in status.last_liveness from the beacon and judges process liveness"""
+        beacon = LivenessBeacon.read(self.liveness_file)
+        if beacon is None:
+            # No beacon: the state file must have been written recently
+            state_time = datetime.fromisoformat(status.timestamp)
+            return datetime.now() - state_time <= STATE_STALE_AFTER
+        
+        tick_time, pid, started = beacon
+        status.last_liveness = datetime.fromtimestamp(tick_time).isoformat()
+        if time.time() - tick_time > LIVENESS_TIMEOUT.total_seconds():
+            return False
+        return process_running(pid, started)
     
     def check(self) -> tuple[bool, HealthStatus]:
         """
@@ -183,17 +667,11 @@ class ExternalHealthChecker:
                 data = json.load(f)
             
             status = HealthStatus(**data)
-            
-            # Check if state file is stale (no update in 2 minutes)
-            state_time = datetime.fromisoformat(status.timestamp)
-            if datetime.now() - state_time > timedelta(minutes=2):
-                status.is_alive = False
-                return False, status
-            
+            status.is_alive = self._is_alive(status)
             return status.is_healthy(), status
             
         except Exception as e:
-            logger.error(f"Error checking health: {e}")
+            logger.error("Error checking health: %s", e)
             status = HealthStatus(
                 timestamp=datetime.now().isoformat(),
                 is_alive=False,
@@ -207,6 +685,147 @@ class ExternalHealthChecker:
             return False, status
 
 
+class StateFileWatcher:
+    """
+    Waits for changes to the state file without polling.
+    Uses inotify on Linux and falls back to checking the file mtime elsewhere.
+    Only complete writes count: the monitor renames a finished file into
+    place (IN_MOVED_TO), and writers that rewrite it in place are seen when
+    they close it (IN_CLOSE_WRITE), never halfway through. watch_process()
+    additionally wakes wait() the moment a given process exits (pidfd).
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_DELETE = 0x00000200
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE
+
+    FALLBACK_POLL_SECONDS = 1.0
+
+    def __init__(self, state_file: str = "/tmp/scheduler_state.json"):
+        self.state_file = Path(state_file)
+        self._name = self.state_file.name.encode()
+        self._fd: Optional[int] = None
+        self._last_mtime = self._mtime()
+        self._pid: Optional[int] = None
+        self._pidfd: Optional[int] = None
+        self.process_exited = False
+        self._init_inotify()
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd is not None
+
+    def _init_inotify(self):
+        """Watch the state file's directory so replaced/recreated files are seen"""
+        if not sys.platform.startswith('linux'):
+            return
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+            directory = str(self.state_file.parent).encode()
+            if libc.inotify_add_watch(fd, directory, self.WATCH_MASK) < 0:
+                err = ctypes.get_errno()
+                os.close(fd)
+                raise OSError(err, f"inotify_add_watch failed for {self.state_file.parent}")
+            self._fd = fd
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable, falling back to mtime checks: {e}")
+
+    def _mtime(self) -> Optional[int]:
+        try:
+            return self.state_file.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def watch_process(self, pid: Optional[int]):
+        """Also return from wait() when this process exits (None stops watching)"""
+        if pid == self._pid and (pid is None or self._pidfd is not None):
+            return
+        self._close_pidfd()
+        self._pid = pid
+        if pid is None or not hasattr(os, 'pidfd_open'):
+            return
+        try:
+            self._pidfd = os.pidfd_open(pid)
+        except OSError:
+            self._pid = None  # already gone, or pidfds unsupported; deadlines still apply
+
+    def _close_pidfd(self):
+        if self._pidfd is not None:
+            os.close(self._pidfd)
+            self._pidfd = None
+        self._pid = None
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """
+        Block for up to `timeout` seconds (None = forever) waiting for a change.
+        Returns True if the state file changed or the watched process exited
+        (then process_exited is set), False on timeout.
+        """
+        self.process_exited = False
+        if self._fd is None:
+            return self._wait_fallback(timeout)
+
+        fds = [self._fd] if self._pidfd is None else [self._fd, self._pidfd]
+        ready, _, _ = select.select(fds, [], [], timeout)
+        if not ready:
+            return False
+        changed = self._drain_events() if self._fd in ready else False
+        return self._check_exit(ready) or changed
+
+    def _check_exit(self, ready: list) -> bool:
+        if self._pidfd is None or self._pidfd not in ready:
+            return False
+        # The pidfd stays readable; watch_process() is called again after the next check
+        self._close_pidfd()
+        self.process_exited = True
+        return True
+
+    def _drain_events(self) -> bool:
+        """Read all pending inotify events and report whether any touched the state file"""
+        changed = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset + 16 <= len(data):
+                _wd, _mask, _cookie, length = struct.unpack_from('iIII', data, offset)
+                name = data[offset + 16:offset + 16 + length].rstrip(b'\0')
+                if name == self._name:
+                    changed = True
+                offset += 16 + length
+
+    def _wait_fallback(self, timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = self.FALLBACK_POLL_SECONDS
+            if deadline is not None:
+                remaining = min(remaining, deadline - time.monotonic())
+                if remaining <= 0:
+                    return False
+            if self._pidfd is not None:
+                ready, _, _ = select.select([self._pidfd], [], [], remaining)
+                if self._check_exit(ready):
+                    return True
+            else:
+                time.sleep(remaining)
+            mtime = self._mtime()
+            if mtime != self._last_mtime:
+                self._last_mtime = mtime
+                return True
+
+    def close(self):
+        self._close_pidfd()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
 def print_status(status: HealthStatus, is_healthy: bool):
     """Pretty print the status"""
     print("\n" + "="*60)
@@ -221,6 +840,11 @@ def print_status(status: HealthStatus, is_healthy: bool):
     print(f"Last Error:       {status.last_error or 'None'}")
     print(f"Uptime:           {status.uptime_seconds:.1f} seconds")
     print(f"Active Jobs:      {status.active_jobs}")
+    if status.scheduling:
+        sched = status.scheduling
+        print(f"Misfires:         {sched.get('misfires', 0)}")
+        print(f"Skipped Runs:     {sched.get('skipped_runs', 0)}")
+        print(f"Max Queue Wait:   {sched.get('max_queue_wait_seconds', 0.0):.3f} seconds")
     print("="*60 + "\n")
 
 
@@ -3,113 +3,68 @@
 Scheduler Watchdog - Continuously monitors the scheduler and sends alerts
 """
 import time
-import os
 import sys
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 from pathlib import Path
-from scheduler_monitor import ExternalHealthChecker, HealthStatus
+from typing import List
+from alert_dispatch import AlertDispatcher
+from alert_sinks import AlertSink, build_sinks
+from log_setup import BACKUP_COUNT, MAX_BYTES, setup_logging
+from metrics import REGISTRY, start_http_server
+from remediation import RemediationEngine, build_remediation
+from scheduler_monitor import (
+    ExternalHealthChecker, HealthStatus, StateFileWatcher, describe_health, scheduler_pid,
+)
+from status_socket import StatusSocketServer
 import logging
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('/tmp/watchdog.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+DEFAULT_LOG_FILE = '/tmp/watchdog.log'
+
+CHECK_DURATION = REGISTRY.histogram('watchdog_check_duration_seconds',
+                                    'Time spent in one health check', ['scheduler'])
+CHECKS = REGISTRY.counter('watchdog_checks_total',
+                          'Health checks by result', ['scheduler', 'result'])
+CONSECUTIVE_FAILURES = REGISTRY.gauge('watchdog_consecutive_failures',
+                                      'Failed checks since the last healthy one', ['scheduler'])
+
 
 class AlertManager:
     """Manages alerting when issues are detected"""
     
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, sinks: List[AlertSink] = None):
         self.config = config
-        self.last_alert_time = None
-        self.alert_cooldown = 300  # 5 minutes between alerts
+        self.dispatcher = AlertDispatcher(
+            max_queue=int(config.get('alert_queue_size', 100)),
+            max_retries=int(config.get('alert_retries', 3)),
+            dead_letter_file=config.get('dead_letter_file', '/tmp/watchdog_dead_letters.jsonl'),
+            dedupe_window=float(config.get('alert_cooldown', 300)),  # 5 minutes per fingerprint
+            batch_window=float(config.get('alert_batch_window', 5))
+        )
+        self.sinks = build_sinks(config) if sinks is None else sinks
+        for sink in self.sinks:
+            self._register_sink(sink)
         
-    def should_send_alert(self) -> bool:
-        """Check if enough time has passed to send another alert"""
-        if self.last_alert_time is None:
-            return True
-        
-        elapsed = (datetime.now() - self.last_alert_time).total_seconds()
-        return elapsed >= self.alert_cooldown
+    def _register_sink(self, sink: AlertSink):
+        """Start a delivery worker for a sink under a unique channel name"""
+        name, n = sink.name, 1
+        while name in self.dispatcher.channels:
+            n += 1
+            name = f"{sink.name}-{n}"
+        self.dispatcher.register_channel(name, sink.send,
+                                         rate_per_minute=sink.rate_per_minute,
+                                         burst=sink.burst)
     
-    def send_email_alert(self, subject: str, body: str):
-        """Send email alert via SMTP"""
-        if not self.should_send_alert():
-            logger.info("Suppressing alert due to cooldown")
+    def send_alert(self, subject: str, message: str, fingerprint: str = None):
+        """
+        Raise an alert on all configured channels; never blocks on delivery.
+        Repeats of the same fingerprint within the cooldown are suppressed.
+        """
+        if not self.dispatcher.submit(subject, message, fingerprint):
             return
         
-        try:
-            # Get email configuration from environment or config
-            smtp_host = os.getenv('SMTP_HOST', self.config.get('smtp_host', 'smtp.gmail.com'))
-            smtp_port = int(os.getenv('SMTP_PORT', self.config.get('smtp_port', 587)))
-            smtp_user = os.getenv('SMTP_USER', self.config.get('smtp_user'))
-            smtp_pass = os.getenv('SMTP_PASS', self.config.get('smtp_pass'))
-            alert_to = os.getenv('ALERT_EMAIL', self.config.get('alert_email'))
-            
-            if not all([smtp_user, smtp_pass, alert_to]):
-                logger.warning("Email configuration incomplete, skipping email alert")
-                return
-            
-            msg = MIMEMultipart()
-            msg['From'] = smtp_user
-            msg['To'] = alert_to
-            msg['Subject'] = f"[ALERT] {subject}"
-            
-            msg.attach(MIMEText(body, 'plain'))
-            
-            with smtplib.SMTP(smtp_host, smtp_port) as server:
-                server.starttls()
-                server.login(smtp_user, smtp_pass)
-                server.send_message(msg)
-            
-            self.last_alert_time = datetime.now()
-            logger.info(f"Alert email sent: {subject}")
-            
-        except Exception as e:
-            logger.error(f"Failed to send email alert: {e}")
-    
-    def send_slack_alert(self, message: str):
-        """Send Slack alert via webhook"""
-        if not self.should_send_alert():
-            logger.info("Suppressing alert due to cooldown")
-            return
-        
-        try:
-            import requests
-            
-            webhook_url = os.getenv('SLACK_WEBHOOK', self.config.get('slack_webhook'))
-            
-            if not webhook_url:
-                logger.warning("Slack webhook not configured, skipping Slack alert")
-                return
-            
-            payload = {
-                'text': f"🚨 *Scheduler Alert*\n{message}",
-                'username': 'Scheduler Watchdog'
-            }
-            
-            response = requests.post(webhook_url, json=payload)
-            response.raise_for_status()
-            
-            self.last_alert_time = datetime.now()
-            logger.info("Alert sent to Slack")
-            
-        except ImportError:
-            logger.warning("requests module not available for Slack alerts")
-        except Exception as e:
-            logger.error(f"Failed to send Slack alert: {e}")
-    
-    def send_alert(self, subject: str, message: str):
-        """Send alert through all configured channels"""
-        logger.warning(f"ALERT: {subject} - {message}")
+        logger.warning("ALERT: %s - %s", subject, message)
         
         # Log to console prominently
         print("\n" + "!"*60)
@@ -117,40 +72,124 @@ class AlertManager:
         print(f"Time: {datetime.now().isoformat()}")
         print(f"Message: {message}")
         print("!"*60 + "\n")
-        
-        # Send through configured channels
-        self.send_email_alert(subject, message)
-        self.send_slack_alert(message)
+    
+    def resolve(self, fingerprint: str):
+        """Clear the cooldown for a fingerprint once its condition has ended"""
+        self.dispatcher.resolve(fingerprint)
+    
+    def get_metrics(self) -> dict:
+        """Queue depth and delivery latency per channel"""
+        return self.dispatcher.get_metrics()
+    
+    def close(self, timeout: float = 10.0):
+        """Flush queued alerts and stop the delivery workers"""
+        self.dispatcher.close(timeout)
+        for sink in self.sinks:
+            sink.close()
 
 
 class SchedulerWatchdog:
     """Watches the scheduler and alerts on issues"""
     
-    def __init__(self, check_interval: int = 60, config: dict = None):
+    # Re-check this long after a deadline passes so the stale check is strictly over the limit
+    DEADLINE_SLACK_SECONDS = 0.005
+    
+    def __init__(self, check_interval: int = 60, config: dict = None,
+                 event_driven: bool = False, checker: ExternalHealthChecker = None,
+                 alert_manager: AlertManager = None, remediation: RemediationEngine = None):
         self.check_interval = check_interval  # seconds
-        self.checker = ExternalHealthChecker()
-        self.alert_manager = AlertManager(config or {})
+        self.event_driven = event_driven
+        self.checker = checker or ExternalHealthChecker()
+        self.alert_manager = alert_manager or AlertManager(config or {})
+        self.remediation = remediation
         self.consecutive_failures = 0
         self.max_consecutive_failures = 3
         self.running = False
+        self._metrics = None  # per-scheduler metric children, resolved on first check
         
     def run(self):
         """Run the watchdog loop"""
         self.running = True
-        logger.info(f"Starting watchdog with {self.check_interval}s check interval")
         
         try:
-            while self.running:
-                self._check_scheduler()
-                time.sleep(self.check_interval)
+            if self.event_driven:
+                self._run_event_driven()
+            else:
+                logger.info(f"Starting watchdog with {self.check_interval}s check interval")
+                while self.running:
+                    is_healthy, _ = self._check_scheduler()
+                    time.sleep(self._interval(is_healthy))
         except KeyboardInterrupt:
             logger.info("Watchdog stopped by user")
         except Exception as e:
             logger.error(f"Watchdog crashed: {e}")
             raise
     
-    def _check_scheduler(self):
-        """Perform a single health check"""
+    def _run_event_driven(self):
+        """
+        Check on every state file change, and otherwise sleep until the moment
+        the last observed status would go stale. Each heartbeat or liveness
+        tick pushes the deadline out, so a missed one is detected as soon as
+        it is due (ticks live in shared memory, so they are seen at the deadline
+        re-check rather than through file events). The scheduler process is
+        watched too, so an exit is seen the moment it happens.
+        
+        A healthy status that goes stale at its deadline, or whose process
+        exits, is a confirmed failure and alerts at once; failures seen
+        through a state file change still need max_consecutive_failures.
+        """
+        watcher = StateFileWatcher(str(self.checker.state_file))
+        mode = "inotify" if watcher.uses_inotify else "mtime fallback"
+        logger.info(f"Starting event-driven watchdog ({mode}), "
+                    f"re-checking failures every {self.check_interval}s")
+        
+        try:
+            is_healthy, status = self._check_scheduler()
+            deadline = self._next_deadline(is_healthy, status)
+            while self.running:
+                if watcher.state_file != self.checker.state_file:
+                    # Failed over: follow the standby's state file
+                    watcher.close()
+                    watcher = StateFileWatcher(str(self.checker.state_file))
+                watcher.watch_process(scheduler_pid(self.checker.state_file) if is_healthy else None)
+                timeout = max(0.0, deadline - time.monotonic())
+                changed = watcher.wait(timeout)
+                if changed or time.monotonic() >= deadline:
+                    confirmed = is_healthy and (watcher.process_exited or not changed)
+                    is_healthy, status = self._check_scheduler(confirmed=confirmed)
+                    deadline = self._next_deadline(is_healthy, status)
+        finally:
+            watcher.close()
+    
+    def _next_deadline(self, is_healthy: bool, status: HealthStatus = None) -> float:
+        """Monotonic time at which the scheduler must next be checked"""
+        now = time.monotonic()
+        if not is_healthy or status is None:
+            return now + self._interval(is_healthy)
+        
+        due = status.next_transition()
+        if due is None:
+            return now + self.check_interval
+        
+        remaining = (due - datetime.now()).total_seconds()
+        return now + max(0.0, remaining) + self.DEADLINE_SLACK_SECONDS
+    
+    def _interval(self, is_healthy: bool) -> float:
+        """Seconds to the next check; shorter while remediation waits for a recovery"""
+        if not is_healthy and self.remediation is not None:
+            return min(self.check_interval, self.remediation.recheck_interval)
+        return self.check_interval
+    
+    def _check_scheduler(self, confirmed: bool = False) -> tuple[bool, HealthStatus]:
+        """
+        Perform a single health check
+        `confirmed` marks a failure that needs no repeat checks before alerting
+        (the status went stale at its deadline, or the process exited).
+        """
+        if self.remediation is not None:
+            self._follow_failover()
+        is_healthy, status = False, None
+        start = time.perf_counter()
         try:
             is_healthy, status = self.checker.check()
             
@@ -158,27 +197,73 @@ class SchedulerWatchdog:
                 # Reset failure counter on success
                 if self.consecutive_failures > 0:
                     logger.info("Scheduler recovered!")
+                    self.alert_manager.resolve(self._fingerprint('failed'))
                     self.alert_manager.send_alert(
                         "Scheduler Recovery",
-                        f"Scheduler is now healthy after {self.consecutive_failures} failed checks"
+                        f"Scheduler is now healthy after {self.consecutive_failures} failed checks",
+                        fingerprint=self._fingerprint('recovered')
                     )
                 self.consecutive_failures = 0
-                logger.debug(f"Health check passed: {status.total_executions} total executions")
+                logger.debug("Health check passed: %d total executions", status.total_executions)
             else:
                 self.consecutive_failures += 1
-                logger.warning(f"Health check failed (attempt {self.consecutive_failures})")
+                logger.warning("Health check failed (attempt %d)", self.consecutive_failures)
                 
-                # Only alert after consecutive failures
-                if self.consecutive_failures >= self.max_consecutive_failures:
+                # Only alert after consecutive failures, unless already confirmed
+                if confirmed or self.consecutive_failures >= self.max_consecutive_failures:
                     message = self._build_alert_message(status)
+                    self.alert_manager.resolve(self._fingerprint('recovered'))
                     self.alert_manager.send_alert(
                         "Scheduler Health Check Failed",
-                        message
+                        message,
+                        fingerprint=self._fingerprint('failed')
                     )
+                    for channel, stats in self.alert_manager.get_metrics().items():
+                        logger.info("Alert channel %s: queue depth %d, avg latency %.2fs, "
+                                    "dead-lettered %d", channel, stats['queue_depth'],
+                                    stats['avg_latency_seconds'], stats['dead_lettered'])
                     
         except Exception as e:
-            logger.error(f"Error during health check: {e}")
+            logger.error("Error during health check: %s", e)
             self.consecutive_failures += 1
+        
+        self._record_check_metrics(is_healthy, time.perf_counter() - start)
+        if self.remediation is not None:
+            self._remediate(is_healthy, status)
+        return is_healthy, status
+    
+    def _remediate(self, is_healthy: bool, status: HealthStatus):
+        """Let the remediation engine act on this check (it runs actions in the background)"""
+        if self.remediation.state_file != self.checker.state_file:
+            return  # failed over since this check started; the next check follows
+        try:
+            self.remediation.observe(is_healthy, status, self.consecutive_failures)
+        except Exception as e:
+            logger.error("Error during remediation: %s", e)
+    
+    def _follow_failover(self):
+        """Watch the standby's state file once remediation has failed over to it"""
+        state_file = self.remediation.state_file
+        if state_file != self.checker.state_file:
+            logger.warning("Now watching %s", state_file)
+            self.checker = ExternalHealthChecker(str(state_file))
+            self._metrics = None
+    
+    def _record_check_metrics(self, is_healthy: bool, duration: float):
+        if self._metrics is None:
+            name = self.checker.state_file.stem
+            self._metrics = (CHECK_DURATION.labels(name),
+                             CHECKS.labels(name, 'healthy'),
+                             CHECKS.labels(name, 'unhealthy'),
+                             CONSECUTIVE_FAILURES.labels(name))
+        duration_metric, healthy, unhealthy, failures = self._metrics
+        duration_metric.observe(duration)
+        (healthy if is_healthy else unhealthy).inc()
+        failures.set(self.consecutive_failures)
+    
+    def _fingerprint(self, condition: str) -> str:
+        """Alert identity used for deduplication: which scheduler, which condition"""
+        return f"{self.checker.state_file}:{condition}"
     
     def _build_alert_message(self, status: HealthStatus) -> str:
         """Build detailed alert message"""
@@ -186,6 +271,8 @@ class SchedulerWatchdog:
             "Scheduler health check has failed!",
             "",
             f"Status: {'ALIVE' if status.is_alive else 'DEAD'}",
+            f"Last Liveness Tick: {status.last_liveness or 'Unknown'}",
+            f"Progress: {'OK' if status.is_progressing() else 'OVERDUE'}",
             f"Last Execution: {status.last_execution or 'Never'}",
             f"Total Executions: {status.total_executions}",
             f"Error Count: {status.error_count}",
@@ -196,9 +283,46 @@ class SchedulerWatchdog:
         ]
         return "\n".join(lines)
     
+    def status_provider(self):
+        """(is_healthy, reason, status dict) for the status socket, read fresh from the checker"""
+        is_healthy, status = self.checker.check()
+        return is_healthy, describe_health(status)[1], status.to_dict()
+    
     def stop(self):
         """Stop the watchdog"""
         self.running = False
+        if self.remediation is not None and not self.remediation.wait(60):
+            logger.warning("Stopping while a remediation step is still running")
+        self.alert_manager.close()
+
+
+def register_alert_metrics(alert_manager: AlertManager, registry=REGISTRY):
+    """Expose the alert pipeline and per-channel delivery stats at scrape time"""
+
+    def collect():
+        pipeline = alert_manager.dispatcher.get_pipeline_metrics()
+        yield ('watchdog_alerts_raised_total', 'counter', 'Alerts submitted to the dispatcher',
+               [('', {}, pipeline['raised'])])
+        yield ('watchdog_alerts_suppressed_total', 'counter', 'Alerts dropped by dedupe',
+               [('', {}, pipeline['suppressed'])])
+        yield ('watchdog_alert_digests_total', 'counter', 'Batched digest alerts sent',
+               [('', {}, pipeline['digests'])])
+
+        channels = alert_manager.get_metrics()
+        families = [
+            ('watchdog_alert_queue_depth', 'gauge', 'Alerts waiting per channel', 'queue_depth'),
+            ('watchdog_alerts_delivered_total', 'counter', 'Alerts delivered per channel', 'delivered'),
+            ('watchdog_alert_failed_attempts_total', 'counter', 'Failed delivery attempts', 'failed_attempts'),
+            ('watchdog_alerts_dead_lettered_total', 'counter', 'Alerts given up on', 'dead_lettered'),
+            ('watchdog_alerts_dropped_total', 'counter', 'Alerts dropped on a full queue', 'dropped'),
+            ('watchdog_alert_latency_max_seconds', 'gauge', 'Worst raise-to-delivery latency', 'max_latency_seconds'),
+            ('watchdog_alert_latency_avg_seconds', 'gauge', 'Mean raise-to-delivery latency', 'avg_latency_seconds'),
+        ]
+        for name, kind, help_text, key in families:
+            yield (name, kind, help_text,
+                   [('', {'channel': channel}, stats[key]) for channel, stats in channels.items()])
+
+    registry.register_collector(collect)
 
 
 def main():
@@ -210,9 +334,31 @@ def main():
                        help='Check interval in seconds (default: 60)')
     parser.add_argument('--config', type=str,
                        help='Path to configuration file')
+    parser.add_argument('--event-driven', action='store_true',
+                       help='Watch the state file for changes instead of polling; '
+                            '--interval then only sets the re-check rate while unhealthy')
+    parser.add_argument('--metrics-port', type=int,
+                       help='Serve Prometheus metrics on this port')
+    parser.add_argument('--status-socket', type=str,
+                       help='Answer PING/HEALTH/STATUS on this Unix socket path')
+    parser.add_argument('--log-file', type=str, default=DEFAULT_LOG_FILE,
+                       help=f'Log file (default: {DEFAULT_LOG_FILE}; empty for console only)')
+    parser.add_argument('--log-max-bytes', type=int, default=MAX_BYTES,
+                       help='Rotate the log file at this size (default: 10 MiB)')
+    parser.add_argument('--log-rotate-when', type=str,
+                       help="Rotate by time instead, e.g. 'midnight' or 'h'")
+    parser.add_argument('--log-backups', type=int, default=BACKUP_COUNT,
+                       help=f'Rotated log files to keep (default: {BACKUP_COUNT})')
+    parser.add_argument('--debug', action='store_true',
+                       help='Log every health check')
     
     args = parser.parse_args()
     
+    setup_logging(log_file=args.log_file or None,
+                  level=logging.DEBUG if args.debug else logging.INFO,
+                  max_bytes=args.log_max_bytes, backup_count=args.log_backups,
+                  when=args.log_rotate_when)
+    
     config = {}
     if args.config and Path(args.config).exists():
         import json
@@ -221,14 +367,31 @@ def main():
     
     watchdog = SchedulerWatchdog(
         check_interval=args.interval,
-        config=config
+        config=config,
+        event_driven=args.event_driven
     )
+    watchdog.remediation = build_remediation(config, watchdog.checker.state_file,
+                                             notify=watchdog.alert_manager.send_alert)
+    if watchdog.remediation is not None:
+        logger.info(f"Automatic remediation through {watchdog.remediation.controller.name}")
+    
+    if args.metrics_port:
+        register_alert_metrics(watchdog.alert_manager)
+        start_http_server(args.metrics_port)
+    
+    status_server = None
+    if args.status_socket:
+        status_server = StatusSocketServer(watchdog.status_provider, args.status_socket).start()
+        logger.info(f"Serving status on {args.status_socket}")
     
     try:
         watchdog.run()
     except KeyboardInterrupt:
         print("\nShutting down watchdog...")
+    finally:
         watchdog.stop()
+        if status_server is not None:
+            status_server.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Cross-process bar cache for multi-worker market_data_api deployments
+Each key is one file in a shared directory (default /dev/shm, i.e. RAM):
+a small header followed by the bar columns as raw arrays (epoch-ms int64,
+open/high/low/close/volume float64, then the uint8 integer-kind mask). Readers mmap the file and get NumPy
+views straight over the mapping, so a read copies nothing. Writers replace a
+file atomically (write, then rename) and readers holding the old mapping keep
+a consistent snapshot.
+
+Fetches are single-flight across processes: a worker that finds a key
+missing or expired takes an flock on the key's lock file, checks again, and
+only then calls upstream; the others block on the lock and read its result.
+No outside service is involved.
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "/dev/shm/market_data_cache"
+
+MAGIC = b'BARS'
+VERSION = 2
+# magic, version, bar count, written at (epoch seconds)
+HEADER = struct.Struct('<4sIQd')
+COLUMNS = ('t', 'open', 'high', 'low', 'close', 'volume', 'ints')
+# Column dtypes; any other column is float64
+DTYPES = {'t': '<i8', 'ints': '<u1'}
+
+# How long a worker waits for another worker's fetch before fetching itself
+LOCK_TIMEOUT = 30.0
+# Files untouched this long are removed by prune()
+MAX_AGE = 24 * 3600.0
+PRUNE_EVERY = 200
+
+
+def encode_bars(cols: Dict[str, np.ndarray], written_at: float) -> bytes:
+    count = len(cols['t'])
+    parts = [HEADER.pack(MAGIC, VERSION, count, written_at)]
+    for name in COLUMNS:
+        parts.append(np.ascontiguousarray(cols[name], dtype=DTYPES.get(name, '<f8')).tobytes())
+    return b''.join(parts)
+
+
+def decode_bars(buffer) -> Tuple[Dict[str, np.ndarray], float]:
+    """Column views over `buffer` (no copy) and the time the entry was written"""
+    magic, version, count, written_at = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a bar cache file")
+    cols = {}
+    offset = HEADER.size
+    for name in COLUMNS:
+        dtype = np.dtype(DTYPES.get(name, '<f8'))
+        cols[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+        offset += dtype.itemsize * count
+    return cols, written_at
+
+
+class SharedBarCache:
+    """
+    Bar columns shared by every worker on the host, keyed by an arbitrary string
+    get_or_fetch(key, ttl, fetch) returns cached columns younger than `ttl`,
+    otherwise exactly one process runs fetch() and stores its result.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, lock_timeout: float = LOCK_TIMEOUT):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.lock_timeout = lock_timeout
+        self.hits = 0
+        self.fetches = 0
+        self._writes = 0
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha1(key.encode()).hexdigest()[:20]
+        return self.directory / f"{digest}.bars"
+
+    def read(self, key: str, ttl: float) -> Optional[Dict[str, np.ndarray]]:
+        """Columns for key if present and younger than ttl, else None"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < HEADER.size:
+                    return None
+                # The mapping outlives the file object; the arrays keep it alive
+                mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        try:
+            cols, written_at = decode_bars(mapped)
+        except (ValueError, struct.error):
+            logger.warning(f"Ignoring unreadable cache file {path}")
+            return None
+        if time.time() - written_at >= ttl:
+            return None
+        return cols
+
+    def write(self, key: str, cols: Dict[str, np.ndarray]):
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, 'wb') as f:
+            f.write(encode_bars(cols, time.time()))
+        os.replace(tmp, path)
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            self.prune()
+
+    def get_or_fetch(self, key: str, ttl: float,
+                     fetch: Callable[[], Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        cols = self.read(key, ttl)
+        if cols is not None:
+            self.hits += 1
+            return cols
+
+        lock_path = self._path(key).with_suffix('.lock')
+        while True:
+            lock_file = open(lock_path, 'a+')
+            locked = self._lock(lock_file)
+            if not locked or _is_current(lock_file, lock_path):
+                break
+            # prune() unlinked this lock file while we waited; lock the one now there
+            lock_file.close()
+        with lock_file:
+            try:
+                # Whoever held the lock may have just fetched it
+                cols = self.read(key, ttl)
+                if cols is not None:
+                    self.hits += 1
+                    return cols
+                self.fetches += 1
+                cols = fetch()
+                self.write(key, cols)
+                return cols
+            finally:
+                if locked:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _lock(self, lock_file) -> bool:
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.001
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    logger.warning(f"Timed out waiting for {lock_file.name}; fetching anyway")
+                    return False
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
+
+    def prune(self, max_age: float = MAX_AGE):
+        """
+        Remove entries not written for max_age seconds, then the lock files of
+        keys without an entry. A lock file's mtime says nothing about whether
+        it is held, so one is only unlinked while prune holds its flock, and
+        get_or_fetch() re-checks after locking that its file is still the one
+        at the path.
+        """
+        cutoff = time.time() - max_age
+        for path in self.directory.iterdir():
+            if path.suffix == '.lock':
+                continue
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
+        for path in self.directory.glob('*.lock'):
+            if not path.with_suffix('.bars').exists():
+                self._remove_lock(path)
+
+    @staticmethod
+    def _remove_lock(path: Path):
+        """Unlink a lock file unless a worker holds it"""
+        try:
+            with open(path, 'a+') as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return
+                if _is_current(lock_file, path):
+                    path.unlink()
+        except OSError:
+            pass
+
+
+def _is_current(lock_file, path: Path) -> bool:
+    """Whether the open lock_file is still the file at path (not unlinked or replaced)"""
+    try:
+        current = path.stat()
+    except FileNotFoundError:
+        return False
+    opened = os.fstat(lock_file.fileno())
+    return (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino)
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Status history for the scheduler dashboard
+Samples HealthStatus into a fixed-size ring buffer of typed array columns
+(under 50 bytes per sample) with 5-minute and hourly rollups, so weeks of
+history fit in a few MB of memory, can be persisted to disk and are served
+as pre-aggregated series.
+"""
+import json
+import os
+import threading
+import time
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+from scheduler_monitor import ExternalHealthChecker, HealthStatus
+
+logger = logging.getLogger(__name__)
+
+# Raw samples: (column name, array typecode)
+SAMPLE_COLUMNS = (
+    ('t', 'd'),                  # epoch seconds of the sample
+    ('total_executions', 'q'),
+    ('executions', 'q'),         # executions since the previous sample
+    ('error_count', 'q'),
+    ('healthy', 'b'),            # 1 = healthy, 0 = unhealthy
+    ('check_latency_ms', 'd'),   # time taken by the health check itself
+    ('heartbeat_age', 'd'),      # seconds since last execution, -1 if never
+)
+
+# Pre-aggregated buckets; sums are divided by `samples` when queried
+ROLLUP_COLUMNS = (
+    ('t', 'd'),                  # bucket start, epoch seconds
+    ('samples', 'q'),
+    ('total_executions', 'q'),   # last value in bucket
+    ('executions', 'q'),         # sum of deltas
+    ('error_count', 'q'),        # max
+    ('healthy', 'q'),            # count of healthy samples
+    ('check_latency_ms', 'd'),   # sum
+    ('check_latency_ms_max', 'd'),
+    ('heartbeat_age', 'd'),      # max
+)
+
+# Rollup resolutions (seconds) kept alongside the raw samples
+ROLLUP_RESOLUTIONS = (300, 3600)
+
+# Most points a history query returns when no step is given
+DEFAULT_MAX_POINTS = 500
+
+
+class _Ring:
+    """Fixed-capacity ring buffer of typed array columns, oldest to newest"""
+
+    def __init__(self, layout, capacity: int):
+        self.layout = layout
+        self.capacity = capacity
+        self.columns: Dict[str, array] = {
+            name: array(code, bytes(array(code).itemsize * capacity))
+            for name, code in layout
+        }
+        self.head = 0   # next slot to write
+        self.count = 0
+
+    def slot(self, logical: int) -> int:
+        """Map 0..count-1 (oldest to newest) onto the ring"""
+        return (self.head - self.count + logical) % self.capacity
+
+    def append(self, values: tuple):
+        i = self.head
+        for (name, _), value in zip(self.layout, values):
+            self.columns[name][i] = value
+        self.head = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def last(self) -> int:
+        return (self.head - 1) % self.capacity
+
+    def bisect(self, ts: float) -> int:
+        """First logical index whose timestamp is >= ts"""
+        timestamps = self.columns['t']
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if timestamps[self.slot(mid)] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def oldest(self) -> Optional[float]:
+        return self.columns['t'][self.slot(0)] if self.count else None
+
+    def nbytes(self) -> int:
+        return sum(c.itemsize * len(c) for c in self.columns.values())
+
+
+class StatusHistory:
+    """
+    Status samples in a ring buffer, plus rollups that are updated as samples
+    arrive so long-range queries read a few hundred pre-aggregated buckets
+    instead of scanning every sample.
+    """
+
+    def __init__(self, capacity: int = 4 * 7 * 24 * 120,  # 4 weeks at 30s
+                 rollup_retention: float = 90 * 86400):
+        self.capacity = capacity
+        self.rollup_retention = rollup_retention
+        self.samples = _Ring(SAMPLE_COLUMNS, capacity)
+        self.rollups: Dict[int, _Ring] = {
+            res: _Ring(ROLLUP_COLUMNS, max(1, int(rollup_retention // res)))
+            for res in ROLLUP_RESOLUTIONS
+        }
+        self._last_execs: Optional[int] = None
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.samples.count
+
+    def nbytes(self) -> int:
+        return self.samples.nbytes() + sum(r.nbytes() for r in self.rollups.values())
+
+    def append(self, timestamp: float, total_executions: int, error_count: int,
+               healthy: bool, check_latency_ms: float, heartbeat_age: float):
+        healthy = 1 if healthy else 0
+        with self.lock:
+            # Counter resets (scheduler restarted without state) count from zero
+            if self._last_execs is None:
+                executions = 0
+            elif total_executions >= self._last_execs:
+                executions = total_executions - self._last_execs
+            else:
+                executions = total_executions
+            self._last_execs = total_executions
+
+            self.samples.append((timestamp, total_executions, executions, error_count,
+                                 healthy, check_latency_ms, heartbeat_age))
+            for res, ring in self.rollups.items():
+                self._roll_up(ring, timestamp - timestamp % res, total_executions,
+                              executions, error_count, healthy, check_latency_ms,
+                              heartbeat_age)
+
+    @staticmethod
+    def _roll_up(ring: _Ring, bucket: float, total_executions: int, executions: int,
+                 error_count: int, healthy: int, latency: float, heartbeat_age: float):
+        cols = ring.columns
+        i = ring.last()
+        if ring.count and cols['t'][i] == bucket:
+            cols['samples'][i] += 1
+            cols['total_executions'][i] = total_executions
+            cols['executions'][i] += executions
+            cols['error_count'][i] = max(cols['error_count'][i], error_count)
+            cols['healthy'][i] += healthy
+            cols['check_latency_ms'][i] += latency
+            cols['check_latency_ms_max'][i] = max(cols['check_latency_ms_max'][i], latency)
+            cols['heartbeat_age'][i] = max(cols['heartbeat_age'][i], heartbeat_age)
+        else:
+            ring.append((bucket, 1, total_executions, executions, error_count, healthy,
+                         latency, latency, heartbeat_age))
+
+    def record(self, status: HealthStatus, is_healthy: bool, check_latency_ms: float,
+               now: Optional[float] = None):
+        """Append a sample taken from a HealthStatus"""
+        now = time.time() if now is None else now
+        heartbeat_age = -1.0
+        if status.last_execution:
+            try:
+                heartbeat_age = now - datetime.fromisoformat(status.last_execution).timestamp()
+            except ValueError:
+                pass
+        self.append(now, status.total_executions, status.error_count,
+                    is_healthy, check_latency_ms, heartbeat_age)
+
+    def _source(self, start: float, step: float) -> tuple[_Ring, int]:
+        """
+        Coarsest ring that can answer a query at this step, and its bucket
+        size in seconds (0 for raw samples); caller holds the lock
+        """
+        for res in sorted(self.rollups, reverse=True):
+            ring = self.rollups[res]
+            if res > step or not ring.count:
+                continue
+            # Use a rollup only if it reaches back as far as the raw samples do
+            raw_oldest = self.samples.oldest()
+            if raw_oldest is None or ring.oldest() <= max(start, raw_oldest):
+                return ring, res
+        return self.samples, 0
+
+    def query(self, start: float, end: float, step: Optional[float] = None) -> Dict:
+        """
+        Aggregate history in [start, end) into buckets of `step` seconds.
+        Returns parallel lists, one entry per non-empty bucket.
+        """
+        if step is None or step <= 0:
+            step = max(1.0, (end - start) / DEFAULT_MAX_POINTS)
+
+        series: Dict[str, List] = {
+            't': [], 'samples': [], 'total_executions': [], 'executions': [],
+            'error_count': [], 'healthy_ratio': [], 'check_latency_ms_avg': [],
+            'check_latency_ms_max': [], 'heartbeat_age_max': [],
+        }
+
+        with self.lock:
+            ring, res = self._source(start, step)
+            rolled = res > 0
+            cols = ring.columns
+            if rolled:
+                samples_col, latency_max_col = cols['samples'], cols['check_latency_ms_max']
+                # A rollup is keyed by its bucket start, so the one holding
+                # `start` begins before it; count it in the first bucket
+                first = ring.bisect(start - start % res)
+            else:
+                samples_col, latency_max_col = None, cols['check_latency_ms']
+                first = ring.bisect(start)
+
+            bucket = None
+            for logical in range(first, ring.bisect(end)):
+                i = ring.slot(logical)
+                b = max(0, int((cols['t'][i] - start) // step))
+                if b != bucket:
+                    bucket = b
+                    series['t'].append(start + b * step)
+                    series['samples'].append(0)
+                    series['total_executions'].append(0)
+                    series['executions'].append(0)
+                    series['error_count'].append(0)
+                    series['healthy_ratio'].append(0)
+                    series['check_latency_ms_avg'].append(0.0)
+                    series['check_latency_ms_max'].append(0.0)
+                    series['heartbeat_age_max'].append(-1.0)
+
+                series['samples'][-1] += samples_col[i] if rolled else 1
+                series['total_executions'][-1] = cols['total_executions'][i]
+                series['executions'][-1] += cols['executions'][i]
+                series['error_count'][-1] = max(series['error_count'][-1], cols['error_count'][i])
+                series['healthy_ratio'][-1] += cols['healthy'][i]
+                series['check_latency_ms_avg'][-1] += cols['check_latency_ms'][i]
+                series['check_latency_ms_max'][-1] = max(series['check_latency_ms_max'][-1],
+                                                         latency_max_col[i])
+                series['heartbeat_age_max'][-1] = max(series['heartbeat_age_max'][-1],
+                                                      cols['heartbeat_age'][i])
+
+        for n, samples in enumerate(series['samples']):
+            series['healthy_ratio'][n] /= samples
+            series['check_latency_ms_avg'][n] /= samples
+
+        return {'from': start, 'to': end, 'step': step, 'series': series}
+
+    def _rings(self) -> Dict[str, _Ring]:
+        rings = {'samples': self.samples}
+        rings.update({f"rollup_{res}": ring for res, ring in self.rollups.items()})
+        return rings
+
+    def save(self, path: str):
+        """Write all rings to disk atomically (JSON header line + raw columns)"""
+        path = Path(path)
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        with self.lock:
+            rings = self._rings()
+            header = {
+                'last_execs': self._last_execs,
+                'rings': {
+                    name: {'capacity': r.capacity, 'count': r.count, 'head': r.head,
+                           'layout': [list(c) for c in r.layout]}
+                    for name, r in rings.items()
+                },
+            }
+            with open(tmp, 'wb') as f:
+                f.write(json.dumps(header).encode() + b"\n")
+                for ring in rings.values():
+                    for name, _ in ring.layout:
+                        ring.columns[name].tofile(f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, capacity: int = 4 * 7 * 24 * 120,
+             rollup_retention: float = 90 * 86400) -> "StatusHistory":
+        """
+        Load a saved history; rings whose size or layout changed start empty.
+        Raises OSError if the file can't be read and ValueError if it is
+        truncated or corrupt.
+        """
+        history = cls(capacity, rollup_retention)
+        with open(path, 'rb') as f:
+            try:
+                header = json.loads(f.readline())
+                rings = history._rings()
+                for name, meta in header['rings'].items():
+                    layout = [tuple(c) for c in meta['layout']]
+                    loaded = [array(code) for _, code in layout]
+                    for column in loaded:
+                        column.fromfile(f, meta['capacity'])
+                    ring = rings.get(name)
+                    if ring is None or ring.capacity != meta['capacity'] or tuple(layout) != ring.layout:
+                        logger.warning(f"Discarding saved {name} history (size or layout changed)")
+                        continue
+                    ring.columns = {col: data for (col, _), data in zip(layout, loaded)}
+                    ring.count, ring.head = meta['count'], meta['head']
+            except (EOFError, KeyError, TypeError) as e:
+                # array.fromfile raises EOFError on a short read
+                raise ValueError(f"Truncated or corrupt history file {path}: {e!r}") from e
+        history._last_execs = header.get('last_execs')
+        return history
+
+
+class HistorySampler:
+    """Background thread that samples scheduler status into a StatusHistory"""
+
+    def __init__(self, history: StatusHistory, checker: ExternalHealthChecker = None,
+                 interval: float = 30.0, persist_path: Optional[str] = None,
+                 persist_every: float = 300.0):
+        self.history = history
+        self.checker = checker or ExternalHealthChecker()
+        self.interval = interval
+        self.persist_path = persist_path
+        self.persist_every = persist_every
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self):
+        """Take one sample now"""
+        t0 = time.perf_counter()
+        is_healthy, status = self.checker.check()
+        latency_ms = (time.perf_counter() - t0) * 1000
+        self.history.record(status, is_healthy, latency_ms)
+
+    def _run(self):
+        last_persist = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"Status sampling failed: {e}")
+            if self.persist_path and time.monotonic() - last_persist >= self.persist_every:
+                self.persist()
+                last_persist = time.monotonic()
+            self._stop.wait(self.interval)
+
+    def persist(self):
+        try:
+            self.history.save(self.persist_path)
+        except OSError as e:
+            logger.error(f"Could not persist status history: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="status-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval)
+        if self.persist_path:
+            self.persist()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Scheduler status over a Unix domain socket
+A long-lived process (the scheduler via SchedulerMonitor.serve_status_socket()
+or the watchdog via --status-socket) answers one-line commands, so scripted
+health checks skip interpreter startup and file parsing:
+
+    > PING      < PONG
+    > HEALTH    < OK All systems operational   (or: FAIL <reason>)
+    > STATUS    < {"is_healthy": true, "status": {...}}
+    > QUIT      (closes the connection)
+
+Several commands can be sent on one connection. From a shell:
+
+    echo health | nc -U /tmp/scheduler_status.sock
+    python3 -S status_socket.py health      # exit code 0 healthy, 1 unhealthy, 2 unreachable
+
+This module keeps its imports light so the client mode starts quickly.
+"""
+import os
+import selectors
+import socket
+import sys
+import threading
+import time
+
+DEFAULT_SOCKET = "/tmp/scheduler_status.sock"
+MAX_LINE = 1024
+
+
+class StatusSocketServer:
+    """
+    Single-threaded selector loop serving the line protocol.
+    `provider()` returns (is_healthy, reason, status_dict); its result and the
+    encoded replies are reused for `ttl` seconds, so probe storms cost one
+    status evaluation per ttl.
+    """
+
+    def __init__(self, provider, path: str = DEFAULT_SOCKET, mode: int = 0o660,
+                 ttl: float = 0.25):
+        self.provider = provider
+        self.path = path
+        self.mode = mode
+        self.ttl = ttl
+        self.requests = 0
+        self._replies = {}
+        self._replies_expire = 0.0
+        self._selector = selectors.DefaultSelector()
+        self._sock = None
+        self._running = False
+        self._thread = None
+        # Wakes the loop for shutdown
+        self._wake_r, self._wake_w = socket.socketpair()
+
+    def start(self) -> 'StatusSocketServer':
+        self._remove_stale_socket()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.path)
+        os.chmod(self.path, self.mode)
+        sock.listen(128)
+        sock.setblocking(False)
+        self._sock = sock
+        self._selector.register(sock, selectors.EVENT_READ, self._accept)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="status-socket", daemon=True)
+        self._thread.start()
+        return self
+
+    def _remove_stale_socket(self):
+        """Unlink a socket left by a dead process; refuse to steal a live one"""
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.unlink(self.path)
+            return
+        finally:
+            probe.close()
+        raise OSError(f"Status socket {self.path} is already being served")
+
+    def _run(self):
+        while self._running:
+            for key, events in self._selector.select():
+                if key.data is None:
+                    return
+                key.data(key.fileobj, events)
+
+    def _accept(self, sock, events):
+        try:
+            conn, _ = sock.accept()
+        except BlockingIOError:
+            return
+        conn.setblocking(False)
+        self._selector.register(conn, selectors.EVENT_READ, _Connection(self, conn).on_event)
+
+    def respond(self, line: bytes) -> bytes:
+        command = line.strip().upper()
+        self.requests += 1
+        if command == b'PING':
+            return b'PONG\n'
+        if command in (b'HEALTH', b'STATUS'):
+            now = time.monotonic()
+            if now >= self._replies_expire:
+                self._replies = self._render()
+                self._replies_expire = now + self.ttl
+            return self._replies[command]
+        return b'ERR unknown command\n'
+
+    def _render(self) -> dict:
+        import json
+        is_healthy, reason, status = self.provider()
+        return {
+            b'HEALTH': (b'OK ' if is_healthy else b'FAIL ') + reason.encode() + b'\n',
+            b'STATUS': json.dumps({'is_healthy': is_healthy, 'status': status}).encode() + b'\n',
+        }
+
+    def close(self):
+        if self._selector.get_map() is None:
+            return  # already closed
+        self._running = False
+        try:
+            self._wake_w.send(b'x')
+        except OSError:
+            pass
+        if self._thread is not None:
+            self._thread.join(2.0)
+        for key in list(self._selector.get_map().values()):
+            key.fileobj.close()
+        self._selector.close()
+        self._wake_w.close()
+        if self._sock is not None:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+class _Connection:
+    """Buffers one client's input lines and pending output"""
+
+    def __init__(self, server: StatusSocketServer, conn: socket.socket):
+        self.server = server
+        self.conn = conn
+        self.inbuf = b''
+        self.outbuf = b''
+
+    def on_event(self, conn, events):
+        if events & selectors.EVENT_READ:
+            try:
+                data = conn.recv(4096)
+            except (BlockingIOError, InterruptedError):
+                data = None
+            except OSError:
+                data = b''
+            if data == b'':
+                return self.close()
+            if data:
+                self.inbuf += data
+                while b'\n' in self.inbuf:
+                    line, self.inbuf = self.inbuf.split(b'\n', 1)
+                    if line.strip().upper() == b'QUIT':
+                        self.flush()
+                        return self.close()
+                    try:
+                        self.outbuf += self.server.respond(line)
+                    except Exception as e:
+                        self.outbuf += f"ERR {e}\n".encode()
+                if len(self.inbuf) > MAX_LINE:
+                    return self.close()
+        self.flush()
+
+    def flush(self):
+        if self.outbuf:
+            try:
+                sent = self.conn.send(self.outbuf)
+                self.outbuf = self.outbuf[sent:]
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError:
+                return self.close()
+        mask = selectors.EVENT_READ | (selectors.EVENT_WRITE if self.outbuf else 0)
+        try:
+            self.server._selector.modify(self.conn, mask, self.on_event)
+        except (KeyError, ValueError):
+            pass
+
+    def close(self):
+        try:
+            self.server._selector.unregister(self.conn)
+        except (KeyError, ValueError):
+            pass
+        self.conn.close()
+
+
+class StatusClient:
+    """Persistent connection for issuing many commands (e.g. a load balancer agent)"""
+
+    def __init__(self, path: str = DEFAULT_SOCKET, timeout: float = 1.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self._file = self.sock.makefile('rb')
+
+    def query(self, command: str) -> str:
+        self.sock.sendall(command.encode() + b'\n')
+        return self._file.readline().decode().rstrip('\n')
+
+    def close(self):
+        self._file.close()
+        self.sock.close()
+
+
+def query(command: str = 'HEALTH', path: str = DEFAULT_SOCKET, timeout: float = 1.0) -> str:
+    """One-shot query"""
+    client = StatusClient(path, timeout)
+    try:
+        return client.query(command)
+    finally:
+        client.close()
+
+
+def main(argv=None) -> int:
+    """Client mode: print the reply; exit 0 healthy, 1 unhealthy, 2 unreachable"""
+    args = list(sys.argv[1:] if argv is None else argv)
+    path = DEFAULT_SOCKET
+    if len(args) >= 2 and args[0] in ('-s', '--socket'):
+        path = args[1]
+        args = args[2:]
+    command = (args[0] if args else 'health').upper()
+
+    try:
+        reply = query(command, path)
+    except OSError as e:
+        sys.stdout.write(f"UNREACHABLE {e}\n")
+        return 2
+    sys.stdout.write(reply + "\n")
+    if command == 'HEALTH':
+        return 0 if reply.startswith('OK') else 1
+    return 0 if not reply.startswith('ERR') else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import json
+import threading
+import time
+
+import pytest
+
+from alert_dispatch import Alert, AlertDispatcher, TokenBucket, build_digest
+
+
+def until(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return condition()
+
+
+@pytest.fixture
+def dispatchers():
+    created = []
+
+    def make(**kwargs):
+        kwargs.setdefault('batch_window', 0)
+        kwargs.setdefault('dedupe_window', 0)
+        kwargs.setdefault('dead_letter_file', None)
+        kwargs.setdefault('backoff_base', 0.01)
+        dispatcher = AlertDispatcher(**kwargs)
+        created.append(dispatcher)
+        return dispatcher
+
+    yield make
+    for dispatcher in created:
+        dispatcher.close(timeout=1)
+
+
+def test_submit_does_not_wait_for_delivery(dispatchers):
+    release = threading.Event()
+    sent = []
+    dispatcher = dispatchers()
+    dispatcher.register_channel('slow', lambda alert: (release.wait(), sent.append(alert)))
+
+    start = time.perf_counter()
+    for n in range(10):
+        assert dispatcher.submit(f"alert {n}", "body")
+    assert time.perf_counter() - start < 0.5
+    release.set()
+    assert until(lambda: len(sent) == 10)
+    assert [a.subject for a in sent] == [f"alert {n}" for n in range(10)]
+
+
+def test_failed_sends_are_retried(dispatchers):
+    calls = []
+
+    def flaky(alert):
+        calls.append(alert.attempts)
+        if len(calls) < 3:
+            raise ConnectionError("down")
+
+    dispatcher = dispatchers()
+    dispatcher.register_channel('flaky', flaky)
+    dispatcher.submit("subject", "body")
+    assert until(lambda: dispatcher.get_metrics()['flaky']['delivered'] == 1)
+    assert calls == [1, 2, 3]
+    assert dispatcher.get_metrics()['flaky']['failed_attempts'] == 2
+
+
+def test_dead_letter_after_max_retries(dispatchers, tmp_path):
+    dead_letters = tmp_path / 'dead.jsonl'
+    dispatcher = dispatchers(max_retries=2, dead_letter_file=str(dead_letters))
+
+    def broken(alert):
+        raise ConnectionError("refused")
+
+    dispatcher.register_channel('broken', broken)
+    dispatcher.submit("lost", "body")
+    assert until(lambda: dispatcher.get_metrics()['broken']['dead_lettered'] == 1)
+    record = json.loads(dead_letters.read_text())
+    assert (record['channel'], record['subject'], record['attempts']) == ('broken', 'lost', 3)
+    assert record['reason'] == 'refused'
+
+
+def test_full_queue_drops_to_dead_letter(dispatchers):
+    release = threading.Event()
+    dispatcher = dispatchers(max_queue=1)
+    dispatcher.register_channel('stuck', lambda alert: release.wait())
+    try:
+        dispatcher.submit("alert 0", "body")
+        assert until(lambda: dispatcher.channels['stuck'].queue.qsize() == 0)
+        for n in range(1, 4):
+            dispatcher.submit(f"alert {n}", "body")
+        # One in the worker, one queued, the rest dropped
+        assert dispatcher.get_metrics()['stuck']['dropped'] == 2
+        assert dispatcher.get_metrics()['stuck']['dead_lettered'] == 2
+    finally:
+        release.set()
+
+
+def test_close_drains_queued_alerts(dispatchers):
+    sent = []
+    dispatcher = dispatchers()
+    dispatcher.register_channel('slow', lambda alert: (time.sleep(0.01), sent.append(alert)))
+    for n in range(20):
+        dispatcher.submit(f"alert {n}", "body")
+    dispatcher.close(timeout=5)
+    assert len(sent) == 20
+
+
+def test_every_channel_gets_its_own_copy(dispatchers):
+    received = {'a': [], 'b': []}
+    dispatcher = dispatchers()
+    dispatcher.register_channel('a', received['a'].append)
+    dispatcher.register_channel('b', received['b'].append)
+    dispatcher.submit("subject", "body")
+    assert until(lambda: len(received['a']) == len(received['b']) == 1)
+    assert received['a'][0] is not received['b'][0]
+
+
+def test_duplicates_suppressed_until_resolved(dispatchers):
+    sent = []
+    dispatcher = dispatchers(dedupe_window=60)
+    dispatcher.register_channel('log', sent.append)
+    assert dispatcher.submit("down", "1", fingerprint="sched")
+    assert not dispatcher.submit("down again", "2", fingerprint="sched")
+    assert dispatcher.submit("other", "3")
+    dispatcher.resolve("sched")
+    assert dispatcher.submit("down", "4", fingerprint="sched")
+    assert until(lambda: len(sent) == 3)
+    metrics = dispatcher.get_pipeline_metrics()
+    assert (metrics['raised'], metrics['suppressed']) == (4, 1)
+
+
+def test_burst_is_batched_into_one_digest(dispatchers):
+    sent = []
+    dispatcher = dispatchers(batch_window=0.2)
+    dispatcher.register_channel('log', sent.append)
+    for n in range(5):
+        dispatcher.submit(f"alert {n}", f"body {n}")
+    assert until(lambda: len(sent) == 1)
+    time.sleep(0.3)
+    assert len(sent) == 1
+    digest = sent[0]
+    assert digest.count == 5 and digest.fingerprint == 'digest'
+    assert digest.subject.startswith("5 alerts: alert 0, alert 1")
+    assert all(f"body {n}" in digest.message for n in range(5))
+    assert dispatcher.get_pipeline_metrics()['digests'] == 1
+
+
+def test_single_alert_is_not_wrapped():
+    alert = Alert(subject="one", message="body")
+    assert build_digest([alert]) is alert
+
+
+def test_token_bucket_allows_burst_then_rate():
+    bucket = TokenBucket(rate=10.0, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_rate_limited_channel_delays_delivery(dispatchers):
+    sent = []
+    dispatcher = dispatchers()
+    dispatcher.register_channel('limited', lambda alert: sent.append(time.monotonic()),
+                                rate_per_minute=600, burst=1)
+    for n in range(3):
+        dispatcher.submit(f"alert {n}", "body")
+    assert until(lambda: len(sent) == 3)
+    # 10 per second after a burst of one
+    assert sent[2] - sent[0] >= 0.15
+    assert dispatcher.get_metrics()['limited']['rate_limited'] == 2
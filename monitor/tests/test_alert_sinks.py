@@ -0,0 +1,157 @@
+import json
+import smtplib
+import socket
+from email.message import EmailMessage
+
+import pytest
+
+import alert_sinks
+from alert_dispatch import Alert
+from alert_sinks import (
+    AlertSink, FileSink, PersistentSMTP, SlackWebhookSink, WebhookSink,
+)
+from fake_receivers import FakeHTTPReceiver
+from scheduler_watchdog import AlertManager
+
+
+class FakeSMTP:
+    """smtplib.SMTP stand-in whose send_message fails with queued errors"""
+
+    instances = []
+
+    def __init__(self, host, port, timeout=None):
+        self.errors = FakeSMTP.errors_for_next.pop(0) if FakeSMTP.errors_for_next else []
+        self.sent = []
+        self.closed = False
+        FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def noop(self):
+        return (250, b'OK')
+
+    def send_message(self, msg):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append(msg['Subject'])
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    FakeSMTP.instances = []
+    FakeSMTP.errors_for_next = []
+    monkeypatch.setattr(alert_sinks.smtplib, 'SMTP', FakeSMTP)
+    return PersistentSMTP('localhost', 25, starttls=False)
+
+
+def message(subject='alert'):
+    msg = EmailMessage()
+    msg['Subject'] = subject
+    return msg
+
+
+def test_session_is_reused(smtp):
+    smtp.send_message(message('one'))
+    smtp.send_message(message('two'))
+    assert len(FakeSMTP.instances) == 1
+    assert FakeSMTP.instances[0].sent == ['one', 'two']
+
+
+@pytest.mark.parametrize('error', [smtplib.SMTPServerDisconnected('gone'),
+                                   ConnectionResetError('reset'), socket.timeout('slow')])
+def test_dropped_connection_is_retried_once(smtp, error):
+    FakeSMTP.errors_for_next = [[error]]
+    smtp.send_message(message())
+    first, second = FakeSMTP.instances
+    assert first.closed and first.sent == []
+    assert second.sent == ['alert']
+
+
+def test_gives_up_after_reconnecting_once(smtp):
+    FakeSMTP.errors_for_next = [[ConnectionResetError()], [ConnectionResetError()]]
+    with pytest.raises(ConnectionResetError):
+        smtp.send_message(message())
+    assert len(FakeSMTP.instances) == 2
+
+
+@pytest.mark.parametrize('error', [
+    smtplib.SMTPRecipientsRefused({'oncall@example.com': (550, b'no such user')}),
+    smtplib.SMTPDataError(554, b'rejected'),
+    smtplib.SMTPAuthenticationError(535, b'bad credentials'),
+])
+def test_permanent_errors_are_not_resent(smtp, error):
+    FakeSMTP.errors_for_next = [[error]]
+    with pytest.raises(type(error)):
+        smtp.send_message(message())
+    assert len(FakeSMTP.instances) == 1
+    assert not FakeSMTP.instances[0].closed
+
+
+@pytest.fixture
+def receiver():
+    server = FakeHTTPReceiver().start()
+    yield server
+    server.stop()
+
+
+def test_webhook_posts_alert_json(receiver):
+    alert = Alert('disk full', 'volume at 99%', fingerprint='disk')
+    sink = WebhookSink(receiver.url, headers={'Authorization': 'Bearer t'})
+    sink.send(alert)
+    sink.close()
+    received, = receiver.received
+    assert received.subject == 'disk full'
+    assert received.body == 'volume at 99%'
+    assert received.created == alert.created
+    assert received.headers['Authorization'] == 'Bearer t'
+
+
+def test_webhook_raises_on_error_status():
+    server = FakeHTTPReceiver(status_code=500).start()
+    try:
+        sink = WebhookSink(server.url)
+        with pytest.raises(Exception, match='500'):
+            sink.send(Alert('down', 'scheduler down'))
+    finally:
+        server.stop()
+
+
+def test_slack_payload(receiver):
+    SlackWebhookSink(receiver.url).send(Alert('down', 'scheduler down'))
+    received, = receiver.received
+    assert received.body == "🚨 *Scheduler Alert*\nscheduler down"
+
+
+def test_file_sink_appends_json_lines(tmp_path):
+    path = tmp_path / 'alerts.jsonl'
+    sink = FileSink(str(path))
+    sink.send(Alert('one', 'first', fingerprint='a'))
+    sink.send(Alert('two', 'second', fingerprint='b'))
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(r['subject'], r['message'], r['fingerprint']) for r in rows] == [
+        ('one', 'first', 'a'), ('two', 'second', 'b')]
+
+
+def test_alert_sink_requires_send():
+    with pytest.raises(TypeError):
+        AlertSink()
+
+
+def test_alert_manager_gives_each_sink_its_own_channel(tmp_path):
+    sinks = [FileSink(str(tmp_path / 'a')), FileSink(str(tmp_path / 'b')),
+             WebhookSink('http://127.0.0.1:9/', name='pager')]
+    manager = AlertManager({'dead_letter_file': None}, sinks=sinks)
+    try:
+        assert sorted(manager.dispatcher.channels) == ['file', 'file-2', 'pager']
+    finally:
+        manager.close()
@@ -0,0 +1,63 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from bar_series import BarSeries
+from shared_cache import decode_bars, encode_bars
+
+# Integer and float values as Polygon sends them, including whole-number floats
+RESULTS = [
+    {'t': 1714570200000, 'o': 450, 'h': 451.5, 'l': 449.0, 'c': 451, 'v': 123456780.0},
+    {'t': 1714570260000, 'o': 451.25, 'h': 452, 'l': 451.0, 'c': 451.75, 'v': 98765},
+    {'t': 1714570320123, 'o': 0.0, 'h': 1e-05, 'l': 0, 'c': 2.5e20, 'v': 0},
+]
+
+
+def transform(bar):
+    """What the API returned before bars were kept as columns"""
+    stamp = datetime.fromtimestamp(bar['t'] / 1000, tz=timezone.utc).replace(tzinfo=None)
+    return {
+        'timestamp': stamp.isoformat() + 'Z',
+        'open': bar['o'], 'high': bar['h'], 'low': bar['l'],
+        'close': bar['c'], 'volume': bar['v'],
+    }
+
+
+EXPECTED = json.dumps([transform(bar) for bar in RESULTS])
+
+
+def test_json_matches_polygon_values():
+    assert json.dumps(BarSeries.from_polygon(RESULTS).bars()) == EXPECTED
+
+
+def test_json_survives_the_shared_cache():
+    cols, _ = decode_bars(encode_bars(BarSeries.from_polygon(RESULTS).columns(), 0.0))
+    assert json.dumps(BarSeries.from_columns(cols)[:]) == EXPECTED
+
+
+def test_derived_series_keep_the_int_mask():
+    series = BarSeries.from_polygon(RESULTS)
+    expected = json.loads(EXPECTED)
+    assert json.loads(json.dumps(series.window(1).bars())) == expected[1:]
+    assert json.loads(json.dumps(series.after(RESULTS[2]['t']).bars())) == expected[2:]
+    assert json.dumps(BarSeries.concat([series.window(0, 1), series.window(1)]).bars()) == EXPECTED
+    assert json.dumps(series.where(series.t != RESULTS[1]['t']).bars()) == json.dumps(
+        [transform(RESULTS[0]), transform(RESULTS[2])])
+
+
+def test_sequence_access():
+    series = BarSeries.from_polygon(RESULTS)
+    expected = [transform(bar) for bar in RESULTS]
+    assert len(series) == 3
+    assert series[-1] == expected[-1]
+    assert series[::2] == expected[::2]
+    assert list(series) == expected
+    with pytest.raises(IndexError):
+        series[3]
+
+
+def test_empty_series():
+    empty = BarSeries.empty()
+    assert len(empty) == 0 and empty.bars() == []
+    assert len(BarSeries.concat([empty, empty])) == 0
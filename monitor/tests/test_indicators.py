@@ -0,0 +1,100 @@
+import math
+
+import numpy as np
+import pytest
+
+import indicators
+from indicators import INDICATORS, parse_indicators
+
+SPECS = ['sma:20', 'ema:12', 'rsi:14', 'bb:20:2', 'bb:5:1.5', 'vwap']
+
+
+def make_columns(n: int = 400, seed: int = 3):
+    """n 5-minute bars over several sessions (in exchange time) with a random walk close"""
+    rng = np.random.default_rng(seed)
+    day_ms = 86_400_000
+    # 13:30 UTC is 9:30 ET (EDT); 78 bars per session, one session per day
+    session_start = 1_714_570_200_000
+    t = np.array([session_start + (i // 78) * day_ms + (i % 78) * 300_000 for i in range(n)],
+                 dtype=np.int64)
+    close = 100.0 + np.cumsum(rng.normal(0, 0.5, n))
+    high = close + rng.uniform(0, 0.5, n)
+    low = close - rng.uniform(0, 0.5, n)
+    return {'t': t, 'open': close.copy(), 'high': high, 'low': low, 'close': close,
+            'volume': rng.integers(100, 10_000, n).astype(float)}
+
+
+def head(cols, k):
+    return {name: column[:k] for name, column in cols.items()}
+
+
+@pytest.mark.parametrize('spec', SPECS)
+@pytest.mark.parametrize('split', [0, 1, 10, 13, 19, 20, 21, 78, 250])
+def test_step_matches_compute(spec, split):
+    """compute() over a prefix then step() per bar gives the full compute() values"""
+    cols = make_columns()
+    full = parse_indicators(spec)[0].compute(cols)
+
+    indicator = parse_indicators(spec)[0]
+    indicator.compute(head(cols, split))
+    stepped = {name: [] for name in indicator.outputs}
+    for i in range(split, len(cols['t'])):
+        values = indicator.step(int(cols['t'][i]), float(cols['high'][i]), float(cols['low'][i]),
+                                float(cols['close'][i]), float(cols['volume'][i]))
+        for name, value in zip(indicator.outputs, values):
+            stepped[name].append(value)
+
+    for name in indicator.outputs:
+        np.testing.assert_allclose(stepped[name], full[name][split:], rtol=1e-9, atol=1e-6,
+                                   equal_nan=True, err_msg=name)
+
+
+@pytest.mark.parametrize('spec', SPECS)
+def test_compute_without_scipy(spec, monkeypatch):
+    pytest.importorskip('scipy.signal')
+    cols = make_columns()
+    expected = parse_indicators(spec)[0].compute(cols)
+    monkeypatch.setattr(indicators, '_lfilter', None)
+    actual = parse_indicators(spec)[0].compute(cols)
+    for name, values in expected.items():
+        np.testing.assert_allclose(actual[name], values, rtol=1e-12, equal_nan=True)
+
+
+def test_copy_keeps_state_apart():
+    cols = make_columns(100)
+    original = parse_indicators('ema:10')[0]
+    original.compute(cols)
+    clone = original.copy()
+    clone.step(int(cols['t'][-1]) + 300_000, 0.0, 0.0, 0.0, 0.0)
+    assert original.value != clone.value
+    assert original.fresh().count == 0
+
+
+def test_vwap_resets_each_session():
+    cols = make_columns(160)
+    vwap = parse_indicators('vwap')[0].compute(cols)['vwap']
+    typical = (cols['high'] + cols['low'] + cols['close']) / 3.0
+    # First bar of the second session is its own typical price
+    assert vwap[78] == pytest.approx(typical[78])
+
+
+def test_parse_indicators():
+    parsed = parse_indicators(' SMA:20, rsi ,bb:20:2.5,sma:20,vwap')
+    assert [type(i) for i in parsed] == [INDICATORS['sma'], INDICATORS['rsi'],
+                                         INDICATORS['bb'], INDICATORS['vwap']]
+    assert parsed[2].outputs == ('bb20_2.5_mid', 'bb20_2.5_upper', 'bb20_2.5_lower')
+    assert parse_indicators('') == []
+
+
+@pytest.mark.parametrize('spec', ['macd', 'sma:x', 'sma:0', 'sma:1001', 'vwap:5', 'sma:20:3',
+                                  'rsi:14:1', 'bb:20:2:1', 'bb:20:nan', 'bb:20:inf', 'bb:20:-inf'])
+def test_parse_indicators_rejects(spec):
+    with pytest.raises(ValueError):
+        parse_indicators(spec)
+
+
+def test_rsi_flat_series_is_neutral():
+    cols = make_columns(40)
+    cols['close'] = np.full(40, 100.0)
+    rsi = parse_indicators('rsi:14')[0].compute(cols)['rsi14']
+    assert math.isnan(rsi[13]) and rsi[14] == 50.0
@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+
+import pytest
+
+from scheduler_monitor import (
+    LivenessBeacon, liveness_path, process_running, process_start_time, scheduler_pid,
+)
+
+
+@pytest.fixture
+def beacon(tmp_path):
+    beacon = LivenessBeacon(tmp_path / 'state.alive')
+    yield beacon
+    beacon.close()
+
+
+def test_read_returns_last_tick(beacon):
+    beacon.tick(1234.5)
+    beacon.tick(1240.25)
+    assert LivenessBeacon.read(beacon.path) == (1240.25, os.getpid(), process_start_time(os.getpid()))
+
+
+def test_no_beacon_until_first_tick(tmp_path, beacon):
+    assert LivenessBeacon.read(tmp_path / 'missing.alive') is None
+    assert LivenessBeacon.read(beacon.path) is None
+
+
+def test_read_gives_up_while_a_write_is_in_progress(beacon):
+    beacon.tick(1.0)
+    # Counter left odd, as if the writer stopped between its two stores
+    LivenessBeacon.SEQ.pack_into(beacon._map, 0, 3)
+    assert LivenessBeacon.read(beacon.path) is None
+    LivenessBeacon.SEQ.pack_into(beacon._map, 0, 4)
+    assert LivenessBeacon.read(beacon.path) == (1.0, beacon._pid, beacon._start_time)
+
+
+def _tick_forever(path, started):
+    beacon = LivenessBeacon(path)
+    i = 0
+    started.set()
+    while True:
+        # Every field carries the same value, so a torn read shows as a mismatch
+        i += 1
+        beacon._pid = beacon._start_time = i
+        beacon.tick(float(i))
+
+
+def test_concurrent_reads_never_tear(beacon):
+    ctx = multiprocessing.get_context('fork')
+    started = ctx.Event()
+    writer = ctx.Process(target=_tick_forever, args=(beacon.path, started), daemon=True)
+    writer.start()
+    try:
+        assert started.wait(10)
+        seen, last = 0, 0
+        while seen < 20000:
+            payload = LivenessBeacon.read(beacon.path)
+            if payload is None:
+                continue
+            timestamp, pid, start_time = payload
+            assert timestamp == pid == start_time
+            assert timestamp >= last
+            last = timestamp
+            seen += 1
+        assert last > 1
+    finally:
+        writer.kill()
+        writer.join()
+
+
+def test_process_running_checks_start_time():
+    pid = os.getpid()
+    start_time = process_start_time(pid)
+    assert start_time
+    assert process_running(pid, start_time)
+    assert process_running(pid)
+    assert not process_running(pid, start_time + 1)
+
+
+def test_scheduler_pid_follows_the_beacon(tmp_path):
+    state_file = tmp_path / 'scheduler_state.json'
+    path = liveness_path(state_file)
+    try:
+        assert scheduler_pid(state_file) is None
+        beacon = LivenessBeacon(path)
+        beacon.tick()
+        assert scheduler_pid(state_file) == os.getpid()
+        beacon._start_time += 1  # a reused pid
+        beacon.tick()
+        assert scheduler_pid(state_file) is None
+        beacon.close()
+    finally:
+        path.unlink(missing_ok=True)
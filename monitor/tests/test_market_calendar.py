@@ -0,0 +1,91 @@
+from datetime import date, datetime, timezone
+
+import pytest
+
+from market_calendar import (EXCHANGE_TZ, early_closes, freshness, holidays, is_trading_day,
+                             market_phase, next_open, session_hours)
+
+
+def et(*args) -> datetime:
+    return datetime(*args, tzinfo=EXCHANGE_TZ)
+
+
+def test_holidays_2025():
+    assert holidays(2025) == {
+        date(2025, 1, 1), date(2025, 1, 20), date(2025, 2, 17), date(2025, 4, 18),
+        date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4), date(2025, 9, 1),
+        date(2025, 11, 27), date(2025, 12, 25),
+    }
+
+
+@pytest.mark.parametrize('day, trading', [
+    (date(2021, 12, 31), True),   # New Year's Day on a Saturday is not observed on Friday
+    (date(2023, 1, 2), False),    # ... but on a Sunday it is observed on Monday
+    (date(2021, 6, 18), True),    # Juneteenth only from 2022
+    (date(2022, 6, 20), False),   # 2022's fell on a Sunday
+    (date(2026, 7, 3), False),    # Independence Day on a Saturday, observed Friday
+    (date(2027, 12, 24), False),  # Christmas on a Saturday, observed Friday
+    (date(2025, 3, 8), False),    # Saturday
+    (date(2025, 3, 10), True),
+])
+def test_is_trading_day(day, trading):
+    assert is_trading_day(day) is trading
+
+
+def test_early_closes_skip_holidays():
+    assert early_closes(2025) == {date(2025, 7, 3), date(2025, 11, 28), date(2025, 12, 24)}
+    # July 3 2026 is the observed holiday, Christmas Eve 2027 likewise
+    assert date(2026, 7, 3) not in early_closes(2026)
+    assert date(2027, 12, 24) not in early_closes(2027)
+
+
+def test_session_hours():
+    assert session_hours(date(2025, 3, 10)) == (et(2025, 3, 10, 9, 30), et(2025, 3, 10, 16))
+    assert session_hours(date(2025, 11, 28)) == (et(2025, 11, 28, 9, 30), et(2025, 11, 28, 13))
+    assert session_hours(date(2025, 11, 28), extended=True) == (et(2025, 11, 28, 4),
+                                                                et(2025, 11, 28, 17))
+    assert session_hours(date(2025, 12, 25)) is None
+
+
+@pytest.mark.parametrize('now, phase', [
+    (et(2025, 3, 10, 3, 59), 'closed'),
+    (et(2025, 3, 10, 4, 0), 'pre'),
+    (et(2025, 3, 10, 9, 29), 'pre'),
+    (et(2025, 3, 10, 9, 30), 'regular'),
+    (et(2025, 3, 10, 16, 0), 'post'),
+    (et(2025, 3, 10, 20, 0), 'closed'),
+    (et(2025, 11, 28, 13, 0), 'post'),
+    (et(2025, 3, 8, 12, 0), 'closed'),
+    # 13:30 UTC is 9:30 ET on the first Monday of daylight saving time
+    (datetime(2025, 3, 10, 13, 30, tzinfo=timezone.utc), 'regular'),
+])
+def test_market_phase(now, phase):
+    assert market_phase(now) == phase
+
+
+def test_next_open_skips_weekend_and_holiday():
+    # Friday before Good Friday 2025, after the close -> the following Monday
+    assert next_open(et(2025, 4, 17, 16, 30)) == et(2025, 4, 21, 9, 30)
+    assert next_open(et(2025, 4, 17, 16, 30), extended=True) == et(2025, 4, 17, 16, 30)
+    assert next_open(et(2025, 4, 17, 20, 0), extended=True) == et(2025, 4, 21, 4)
+
+
+def test_freshness_while_closed():
+    hint = freshness(300, now=et(2025, 3, 8, 12, 0))
+    assert hint['phase'] == 'closed'
+    assert hint['marketClosedUntil'] == '2025-03-10T08:00:00+00:00'
+    assert hint['nextBarClose'] is None
+    assert hint['refreshAfter'] == 40 * 3600
+
+
+def test_freshness_in_session():
+    hint = freshness(300, now=et(2025, 3, 10, 10, 1, 30))
+    assert hint['phase'] == 'regular'
+    assert hint['nextBarClose'] == '2025-03-10T14:05:00+00:00'
+    assert hint['refreshAfter'] == 210 + 5
+
+
+def test_freshness_last_bar_ends_at_the_close():
+    # A 3h bar would close at 00:00 UTC, after the 17:00 ET early extended close
+    hint = freshness(3 * 3600, now=et(2025, 11, 28, 16, 30))
+    assert hint['nextBarClose'] == '2025-11-28T22:00:00+00:00'
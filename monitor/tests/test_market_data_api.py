@@ -0,0 +1,265 @@
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+import market_data_api
+from bar_series import BarSeries
+from market_data_api import BarCache, _fetch_bars, _fetch_chunks, _fetch_range, fetch_polygon_data
+from shared_cache import SharedBarCache
+
+START = datetime(2024, 1, 2)
+END = datetime(2024, 1, 31)  # three 14-day minute chunks
+
+
+def bar(day, minute=0):
+    """Polygon aggregate at 15:00 UTC plus `minute` on a YYYY-MM-DD day"""
+    t = datetime.strptime(day, "%Y-%m-%d").replace(hour=15, tzinfo=timezone.utc)
+    ms = int(t.timestamp() * 1000) + minute * 60000
+    return {"t": ms, "o": 1, "h": 2, "l": 0.5, "c": 1.5, "v": 100}
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append((url, params))
+        return FakeResponse(self.pages.pop(0))
+
+
+@pytest.fixture
+def session(monkeypatch):
+    def install(pages):
+        fake = FakeSession(pages)
+        monkeypatch.setattr(market_data_api, "_session", lambda: fake)
+        return fake
+    return install
+
+
+@pytest.fixture
+def chunks(monkeypatch):
+    """Replace _fetch_range with per-chunk results; an Exception value makes that chunk fail"""
+    calls = []
+    lock = threading.Lock()
+
+    def install(by_start):
+        def fake(symbol, start_str, end_str, multiplier, timespan):
+            with lock:
+                calls.append(start_str)
+            result = by_start[start_str]
+            if isinstance(result, Exception):
+                raise result
+            return result
+        monkeypatch.setattr(market_data_api, "_fetch_range", fake)
+        return calls
+    return install
+
+
+def test_follows_next_url_without_resending_query(session):
+    fake = session([
+        {"status": "OK", "results": [bar("2024-01-02")], "next_url": "https://polygon/page2"},
+        {"status": "OK", "results": [bar("2024-01-02", 5)]},
+    ])
+    results = _fetch_range("SPY", "2024-01-02", "2024-01-02", 5, "minute")
+    assert [r["t"] for r in results] == [bar("2024-01-02")["t"], bar("2024-01-02", 5)["t"]]
+    (first_url, first_params), (second_url, second_params) = fake.calls
+    assert first_url.endswith("/aggs/ticker/SPY/range/5/minute/2024-01-02/2024-01-02")
+    assert first_params["limit"] == 50000
+    assert second_url == "https://polygon/page2"
+    assert set(second_params) == {"apiKey"}
+
+
+def test_stops_following_after_max_pages(session, monkeypatch):
+    monkeypatch.setattr(market_data_api, "MAX_PAGES", 3)
+    fake = session([
+        {"status": "OK", "results": [bar("2024-01-02", i)], "next_url": f"https://polygon/{i}"}
+        for i in range(5)
+    ])
+    assert len(_fetch_range("SPY", "2024-01-02", "2024-01-02", 5, "minute")) == 3
+    assert len(fake.calls) == 3
+
+
+def test_error_status_raises(session):
+    session([{"status": "ERROR"}])
+    with pytest.raises(RuntimeError):
+        _fetch_range("SPY", "2024-01-02", "2024-01-02", 5, "minute")
+
+
+def test_chunks_are_stitched_in_order_without_repeats(chunks):
+    chunks({
+        "2024-01-02": [bar("2024-01-02"), bar("2024-01-15")],
+        # Overlaps the previous chunk's last bar and repeats one of its own
+        "2024-01-16": [bar("2024-01-15"), bar("2024-01-16"), bar("2024-01-16"), bar("2024-01-29")],
+        "2024-01-30": [bar("2024-01-29"), bar("2024-01-30")],
+    })
+    bars, gaps = _fetch_chunks("SPY", START, END, 5, "minute")
+    assert gaps == []
+    assert list(bars.t) == [bar(day)["t"] for day in
+                            ("2024-01-02", "2024-01-15", "2024-01-16", "2024-01-29", "2024-01-30")]
+
+
+def test_failed_chunk_leaves_a_gap(chunks):
+    chunks({
+        "2024-01-02": [bar("2024-01-02")],
+        "2024-01-16": RuntimeError("Polygon API error: ERROR"),
+        "2024-01-30": [bar("2024-01-30")],
+    })
+    bars, gaps = _fetch_chunks("SPY", START, END, 5, "minute")
+    assert gaps == [("2024-01-16", "2024-01-29")]
+    assert list(bars.t) == [bar("2024-01-02")["t"], bar("2024-01-30")["t"]]
+    assert len(fetch_polygon_data("SPY", START, END, 5, "minute")) == 2
+
+
+def test_incomplete_fetch_is_not_shared(chunks, monkeypatch, tmp_path):
+    cache = SharedBarCache(str(tmp_path))
+    monkeypatch.setattr(market_data_api, "_shared_cache", cache)
+    results = {
+        "2024-01-02": [bar("2024-01-02")],
+        "2024-01-16": ConnectionError("reset"),
+        "2024-01-30": [bar("2024-01-30")],
+    }
+    calls = chunks(results)
+
+    bars, complete = _fetch_bars("SPY", START, END, 5, "minute")
+    assert not complete and len(bars) == 2
+
+    results["2024-01-16"] = [bar("2024-01-16")]
+    bars, complete = _fetch_bars("SPY", START, END, 5, "minute")
+    assert complete and len(bars) == 3
+
+    calls.clear()
+    bars, complete = _fetch_bars("SPY", START, END, 5, "minute")
+    assert complete and len(bars) == 3
+    assert calls == []
+
+
+def test_bar_cache_refetches_after_incomplete_load(chunks, monkeypatch):
+    monkeypatch.setattr(market_data_api, "get_date_range", lambda timeframe: (START, END, 5, "minute"))
+    results = {
+        "2024-01-02": [bar("2024-01-02")],
+        "2024-01-16": ConnectionError("reset"),
+        "2024-01-30": [bar("2024-01-30")],
+    }
+    calls = chunks(results)
+    cache = BarCache(ttl=60)
+
+    bars, _ = cache.get("SPY", "1m")
+    assert len(bars) == 2
+
+    results["2024-01-16"] = [bar("2024-01-16")]
+    bars, _ = cache.get("SPY", "1m")
+    assert len(bars) == 3
+
+    calls.clear()
+    bars, _ = cache.get("SPY", "1m")
+    assert len(bars) == 3
+    assert calls == []
+
+
+def test_bar_cache_keeps_bars_when_top_up_fails(chunks, monkeypatch):
+    monkeypatch.setattr(market_data_api, "get_date_range", lambda timeframe: (START, END, 5, "minute"))
+    results = {
+        "2024-01-02": [bar("2024-01-02")],
+        "2024-01-16": [bar("2024-01-16")],
+        "2024-01-30": [bar("2024-01-30")],
+    }
+    chunks(results)
+    cache = BarCache(ttl=0.05)
+    assert len(cache.get("SPY", "1m")[0]) == 3
+
+    # The top-up starts at the last bar's session, inside the final chunk
+    results["2024-01-30"] = ConnectionError("reset")
+    time.sleep(0.06)
+    bars, _ = cache.get("SPY", "1m")
+    assert len(bars) == 3
+
+    results["2024-01-30"] = [bar("2024-01-30"), bar("2024-01-30", 5)]
+    bars, _ = cache.get("SPY", "1m")
+    assert list(bars.t)[-1] == bar("2024-01-30", 5)["t"]
+
+
+class FakeBarCache:
+    """Stands in for _bar_cache: bars per symbol, or an exception to raise"""
+
+    def __init__(self, by_symbol):
+        self.by_symbol = by_symbol
+
+    def get(self, symbol, timeframe, indicators=()):
+        bars = self.by_symbol[symbol]
+        if isinstance(bars, Exception):
+            raise bars
+        values = {}
+        for indicator in indicators:
+            for name in indicator.outputs:
+                series = bars.close.copy()
+                series[0] = np.nan
+                values[name] = series
+        return bars, values
+
+
+def series(*days):
+    return BarSeries.from_polygon([bar(day) for day in days])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def install(by_symbol):
+        monkeypatch.setattr(market_data_api, "_bar_cache", FakeBarCache(by_symbol))
+        return market_data_api.app.test_client()
+    return install
+
+
+def test_streamed_document_matches_buffered(client, monkeypatch):
+    monkeypatch.setattr(market_data_api, "STREAM_BARS_PER_CHUNK", 2)
+    app = client({
+        "SPY": series("2024-01-02", "2024-01-03", "2024-01-04"),
+        "QQQ": series("2024-01-02"),
+    })
+    query = "/api/market/symbols?symbols=SPY,QQQ&timeFrame=5d&indicators=sma:2"
+    streamed = app.get(query)
+    buffered = app.get(query + "&stream=false")
+    assert streamed.status_code == buffered.status_code == 200
+    assert streamed.is_streamed
+    assert "Cache-Control" in streamed.headers
+    assert json.loads(streamed.data) == json.loads(buffered.data)
+    spy = json.loads(streamed.data)["data"]["SPY"]
+    assert len(spy["bars"]) == 3
+    assert spy["indicators"]["sma2"] == [None, 1.5, 1.5]
+
+
+def test_later_symbol_failure_is_reported_in_its_section(client):
+    app = client({"SPY": series("2024-01-02"), "QQQ": RuntimeError("upstream down")})
+    response = app.get("/api/market/symbols?symbols=SPY,QQQ&timeFrame=5d")
+    assert response.status_code == 200
+    data = json.loads(response.data)["data"]
+    assert len(data["SPY"]["bars"]) == 1
+    assert data["QQQ"] == {"symbol": "QQQ", "timeFrame": "5d", "bars": [], "error": "upstream down"}
+
+
+def test_first_symbol_failure_is_a_500(client):
+    app = client({"SPY": RuntimeError("upstream down"), "QQQ": series("2024-01-02")})
+    response = app.get("/api/market/symbols?symbols=SPY,QQQ&timeFrame=5d")
+    assert response.status_code == 500
+    assert response.get_json() == {"error": "upstream down"}
+
+
+def test_bad_requests(client):
+    app = client({})
+    assert app.get("/api/market/symbols").status_code == 400
+    assert app.get("/api/market/symbols?symbols=SPY&indicators=nope").status_code == 400
@@ -0,0 +1,101 @@
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from metrics import CONTENT_TYPE, Registry, start_http_server
+
+
+@pytest.fixture
+def registry():
+    return Registry()
+
+
+def test_counter_sums_every_thread(registry):
+    counter = registry.counter('jobs_total', 'Jobs')
+    barrier = threading.Barrier(8)
+
+    def work():
+        barrier.wait()
+        for _ in range(10000):
+            counter.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Cells of finished threads still count
+    counter.inc(0.5)
+    assert counter.value() == 80000.5
+
+
+def test_labels_resolve_to_one_child(registry):
+    family = registry.counter('checks_total', 'Checks', ['scheduler', 'result'])
+    family.labels('main', 'ok').inc()
+    family.labels(scheduler='main', result='ok').inc(2)
+    assert family.labels('main', 'ok').value() == 3
+    assert registry.counter('checks_total', 'Checks', ['scheduler', 'result']) is family
+    with pytest.raises(AttributeError):
+        family.inc()
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = registry.histogram('duration_seconds', 'Duration', buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value)
+    samples = {(name, labels.get('le')): value
+               for name, labels, value in registry._families['duration_seconds'].collect()}
+    assert samples == {
+        ('duration_seconds_bucket', '0.1'): 2,
+        ('duration_seconds_bucket', '1'): 3,
+        ('duration_seconds_bucket', '+Inf'): 4,
+        ('duration_seconds_count', None): 4,
+        ('duration_seconds_sum', None): 5.65,
+    }
+
+
+def test_gauge_value_or_callback(registry):
+    gauge = registry.gauge('queue_depth', 'Depth')
+    gauge.set(7)
+    assert gauge.value() == 7
+    assert registry.gauge('uptime_seconds', 'Uptime', func=lambda: 12.5).value() == 12.5
+
+
+def test_render_text_format(registry):
+    registry.counter('errors_total', 'Errors', ['job']).labels('say "hi"\n').inc(3)
+    registry.gauge('ratio', 'Ratio').set(0.25)
+    registry.register_collector(lambda: [('scheduler_up', 'gauge', 'Up', [('', {}, 1.0)])])
+
+    def broken():
+        raise RuntimeError('state unreadable')
+    registry.register_collector(broken)
+
+    assert registry.render().splitlines() == [
+        '# HELP errors_total Errors',
+        '# TYPE errors_total counter',
+        'errors_total{job="say \\"hi\\"\\n"} 3',
+        '# HELP ratio Ratio',
+        '# TYPE ratio gauge',
+        'ratio 0.25',
+        '# HELP scheduler_up Up',
+        '# TYPE scheduler_up gauge',
+        'scheduler_up 1',
+    ]
+
+
+def test_http_server_serves_metrics(registry):
+    registry.counter('hits_total', 'Hits').inc()
+    server = start_http_server(0, registry, host='127.0.0.1')
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(base + '/metrics', timeout=5) as reply:
+            assert reply.headers['Content-Type'] == CONTENT_TYPE
+            assert 'hits_total 1' in reply.read().decode()
+        with pytest.raises(urllib.error.HTTPError) as missing:
+            urllib.request.urlopen(base + '/', timeout=5)
+        assert missing.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,116 @@
+import gzip
+import json
+import shutil
+import urllib.error
+import urllib.request
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from polygon_replay import ArchiveRecorder, ReplayServer, read_archive, request_key, run_traffic
+
+AGGS = "https://api.polygon.io/v2/aggs/ticker/SPY/range/5/minute/2024-01-02/2024-01-02"
+
+
+def response(url, body, status=200, elapsed=0.05):
+    return SimpleNamespace(url=url, request=SimpleNamespace(url=url), status_code=status,
+                           text=body, elapsed=timedelta(seconds=elapsed))
+
+
+def test_request_key_drops_credentials_and_sorts_query():
+    assert request_key(AGGS + "?sort=asc&apiKey=secret&adjusted=true") == \
+        "/v2/aggs/ticker/SPY/range/5/minute/2024-01-02/2024-01-02?adjusted=true&sort=asc"
+    assert request_key("/api/market/indices?APIKEY=x") == "/api/market/indices"
+
+
+def test_recorded_archive_reads_back(tmp_path):
+    path = str(tmp_path / 'archive.jsonl.gz')
+    recorder = ArchiveRecorder(path)
+    recorder.record_client("/api/market/symbols?symbols=SPY")
+    recorder.upstream_hook(response(AGGS + "?apiKey=secret", '{"status":"OK"}'))
+    recorder.close()
+
+    upstream, client = read_archive(path)
+    assert [r['path'] for r in client] == ["/api/market/symbols?symbols=SPY"]
+    record, = upstream
+    assert record['key'] == request_key(AGGS) and record['origin'] == "https://api.polygon.io"
+    assert record['body'] == '{"status":"OK"}' and record['elapsed'] == 0.05
+    with gzip.open(path, 'rt') as f:
+        assert 'secret' not in f.read()
+
+
+def test_appended_sessions_continue_the_timeline(tmp_path):
+    path = str(tmp_path / 'archive.jsonl.gz')
+    for _ in range(2):
+        recorder = ArchiveRecorder(path)
+        recorder.record_client("/a")
+        recorder.record_client("/b")
+        recorder.close()
+    _, client = read_archive(path)
+    times = [r['t'] for r in client]
+    assert len(times) == 4
+    assert times == sorted(times)
+
+
+def test_unterminated_archive_keeps_earlier_records(tmp_path):
+    path = str(tmp_path / 'archive.jsonl.gz')
+    recorder = ArchiveRecorder(path)
+    for i in range(10):
+        recorder.record_client(f"/r{i}")
+    recorder._file.flush()
+    # What a killed recorder leaves: no gzip trailer
+    killed = str(tmp_path / 'killed.jsonl.gz')
+    shutil.copy(path, killed)
+    recorder.close()
+
+    _, client = read_archive(killed)
+    assert [r['path'] for r in client] == [f"/r{i}" for i in range(10)]
+
+
+def test_truncated_last_line_is_dropped(tmp_path):
+    path = str(tmp_path / 'archive.jsonl.gz')
+    with gzip.open(path, 'wt') as f:
+        f.write('{"kind":"start","wall":0}\n{"kind":"client","t":1.0,"path":"/a"}\n{"kind":"cli')
+    _, client = read_archive(path)
+    assert [r['path'] for r in client] == ["/a"]
+
+
+@pytest.fixture
+def server():
+    upstream = [
+        {'key': request_key(AGGS), 'origin': "https://api.polygon.io", 'status': 200,
+         'elapsed': 0.0, 'body': json.dumps({'n': 1, 'next_url': AGGS + "?cursor=2"})},
+        {'key': request_key(AGGS), 'origin': "https://api.polygon.io", 'status': 200,
+         'elapsed': 0.0, 'body': json.dumps({'n': 2})},
+    ]
+    server = ReplayServer(upstream, port=0, speed=0).start()
+    yield server
+    server.stop()
+
+
+def fetch(url):
+    with urllib.request.urlopen(url, timeout=5) as reply:
+        return json.loads(reply.read())
+
+
+def test_replay_serves_recordings_in_order(server):
+    url = server.origin + "/v2/aggs/ticker/SPY/range/5/minute/2024-01-02/2024-01-02?apiKey=other"
+    first = fetch(url)
+    # Pagination links point back at the replay server
+    assert first == {'n': 1, 'next_url': server.origin + "/v2/aggs/ticker/SPY/range/5/minute/"
+                     "2024-01-02/2024-01-02?cursor=2"}
+    assert fetch(url)['n'] == 2
+    assert fetch(url)['n'] == 2  # the last recording repeats
+    with pytest.raises(urllib.error.HTTPError) as missing:
+        fetch(server.origin + "/v2/unknown")
+    assert missing.value.code == 404
+    assert (server.hits, server.misses) == (3, 1)
+
+
+def test_traffic_reports_statuses(server):
+    path = "/v2/aggs/ticker/SPY/range/5/minute/2024-01-02/2024-01-02"
+    client = [{'t': i * 0.01, 'path': path} for i in range(4)] + [{'t': 0.05, 'path': "/v2/unknown"}]
+    result = run_traffic(client, server.origin, speed=0)
+    assert result['requests'] == 5
+    assert result['statuses'] == {'200': 4, '404': 1}
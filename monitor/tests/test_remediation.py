@@ -0,0 +1,170 @@
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from remediation import ProcessController, RemediationEngine, classify_failure
+from scheduler_monitor import HealthStatus, LivenessBeacon, liveness_path, process_start_time
+
+
+class RecordingController(ProcessController):
+    name = "recording"
+
+    def __init__(self, standby=None):
+        self.standby = standby
+        self.calls = []
+
+    @property
+    def can_failover(self) -> bool:
+        return self.standby is not None
+
+    def restart(self, state_file: Path):
+        self.calls.append(('restart', state_file))
+
+    def failover(self, state_file: Path) -> Path:
+        self.calls.append(('failover', state_file))
+        return self.standby
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def status(alive=True, overdue=False, errors=0) -> HealthStatus:
+    now = datetime.now()
+    return HealthStatus(
+        timestamp=now.isoformat(), is_alive=alive, last_execution=now.isoformat(),
+        error_count=errors, last_error=None, uptime_seconds=0, active_jobs=1,
+        total_executions=1,
+        progress_deadline=(now + timedelta(minutes=-1 if overdue else 1)).isoformat(),
+    )
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    path = tmp_path / 'scheduler_state.json'
+    yield path
+    try:
+        liveness_path(path).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def write_beacon(state_file, pid, start_time):
+    beacon = LivenessBeacon(liveness_path(state_file))
+    beacon._pid, beacon._start_time = pid, start_time
+    beacon.tick()
+    beacon.close()
+
+
+def test_classify_failure(state_file):
+    assert classify_failure(status(alive=True, overdue=True), state_file) == 'stalled'
+    assert classify_failure(status(alive=True, errors=11), state_file) == 'errors'
+    # Not alive and no beacon: the process is gone
+    assert classify_failure(status(alive=False), state_file) == 'dead'
+    # Not alive but the beacon's process still runs: stuck
+    write_beacon(state_file, os.getpid(), process_start_time(os.getpid()))
+    assert classify_failure(status(alive=False), state_file) == 'hung'
+
+
+def test_classify_reused_pid_as_dead(state_file):
+    # Same pid, different start time: the scheduler died and the pid was reused
+    write_beacon(state_file, os.getpid(), process_start_time(os.getpid()) + 1)
+    assert classify_failure(status(alive=False), state_file) == 'dead'
+
+
+def make_engine(state_file, clock, controller=None, **kwargs):
+    kwargs.setdefault('backoff_initial', 10.0)
+    kwargs.setdefault('flap_threshold', 100)
+    return RemediationEngine(controller or RecordingController(), state_file, clock=clock,
+                             dump_wait=0, **kwargs)
+
+
+def observe(engine, healthy, st, failures):
+    actions = engine.observe(healthy, st, failures)
+    assert engine.wait(5)
+    return actions
+
+
+def test_ladder_escalates_with_backoff(state_file):
+    clock = Clock()
+    controller = RecordingController()
+    engine = make_engine(state_file, clock, controller)
+    dead = status(alive=False)
+
+    # Below min_failures nothing is done yet, but the incident has started
+    assert observe(engine, False, dead, 1) == []
+    assert engine.in_incident and engine.failure == 'dead'
+
+    assert observe(engine, False, dead, 2) == ['restart']
+    # Backoff: 10s after the first step, then 20s after the second
+    clock.now += 9
+    assert observe(engine, False, dead, 3) == []
+    clock.now += 1
+    assert observe(engine, False, dead, 4) == ['restart']
+    clock.now += 19
+    assert observe(engine, False, dead, 5) == []
+    clock.now += 1
+    # Last step (failover) is skipped without a standby, and repeats
+    assert observe(engine, False, dead, 6) == ['failover']
+    clock.now += 40
+    assert observe(engine, False, dead, 7) == ['failover']
+    assert [call for call, _ in controller.calls] == ['restart', 'restart']
+
+    clock.now += 5
+    assert observe(engine, True, None, 0) == []
+    assert not engine.in_incident
+    assert engine.recoveries == [pytest.approx(75.0)]
+
+
+def test_combined_step_and_custom_ladder(state_file):
+    clock = Clock()
+    controller = RecordingController()
+    engine = make_engine(state_file, clock, controller,
+                         ladders={'stalled': [['dump_stacks', 'restart']]})
+    # dump_stacks is skipped (no stack dump signal) but the restart still runs
+    assert observe(engine, False, status(overdue=True), 2) == ['dump_stacks', 'restart']
+    assert controller.calls == [('restart', state_file)]
+
+
+def test_errors_have_no_default_action(state_file):
+    engine = make_engine(state_file, Clock())
+    assert observe(engine, False, status(errors=11), 5) == []
+    assert engine.failure == 'errors'
+
+
+def test_bad_ladder_rejected(state_file):
+    with pytest.raises(ValueError):
+        make_engine(state_file, Clock(), ladders={'dead': ['reboot']})
+    with pytest.raises(ValueError):
+        make_engine(state_file, Clock(), ladders={'unknown': ['restart']})
+
+
+def test_flapping_turns_restarts_into_failover(state_file, tmp_path):
+    clock = Clock()
+    standby = tmp_path / 'standby_state.json'
+    controller = RecordingController(standby=standby)
+    engine = make_engine(state_file, clock, controller, flap_threshold=2, flap_window=100,
+                         backoff_initial=1, ladders={'dead': ['restart']})
+    dead = status(alive=False)
+
+    assert observe(engine, False, dead, 2) == ['restart']
+    assert observe(engine, True, None, 0) == []
+    clock.now += 10
+    assert observe(engine, False, dead, 2) == ['restart']
+    assert engine.flapping
+    clock.now += 10
+    # Still 'restart' on the ladder, carried out as a failover
+    assert observe(engine, False, dead, 3) == ['restart']
+    assert [call for call, _ in controller.calls] == ['restart', 'restart', 'failover']
+    assert engine.state_file == standby
+
+    # Restarts age out of the window and flapping ends
+    clock.now += 200
+    observe(engine, True, None, 0)
+    assert not engine.flapping
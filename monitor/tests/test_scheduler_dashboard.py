@@ -0,0 +1,163 @@
+import json
+import threading
+import time
+
+import pytest
+
+import scheduler_dashboard
+from scheduler_dashboard import StatusBroadcaster, StatusSnapshotCache
+from scheduler_monitor import ExternalHealthChecker, SchedulerMonitor, liveness_path
+
+
+class CountingChecker(ExternalHealthChecker):
+    def __init__(self, state_file):
+        super().__init__(state_file)
+        self.calls = 0
+
+    def check(self):
+        self.calls += 1
+        return super().check()
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    path = tmp_path / 'scheduler_state.json'
+    yield path
+    liveness_path(path).unlink(missing_ok=True)
+
+
+@pytest.fixture
+def monitor(state_file):
+    return SchedulerMonitor(str(state_file)).start()
+
+
+def test_snapshot_is_shared_within_ttl(monitor, state_file):
+    checker = CountingChecker(state_file)
+    cache = StatusSnapshotCache(checker, ttl=60)
+    first = cache.get()
+    assert first.status.is_alive
+    assert cache.get() is first
+    assert checker.calls == 1
+
+
+def test_unchanged_state_is_revalidated_without_rereading(monitor, state_file):
+    checker = CountingChecker(state_file)
+    cache = StatusSnapshotCache(checker, ttl=60)
+    first = cache.get()
+    assert cache.get(revalidate=True) is first
+    assert checker.calls == 1
+
+
+def test_new_state_is_read(monitor, state_file):
+    checker = CountingChecker(state_file)
+    cache = StatusSnapshotCache(checker, ttl=60)
+    cache.get()
+    monitor.heartbeat()
+    snapshot = cache.get(revalidate=True)
+    assert snapshot.status.total_executions == 1
+    assert json.loads(snapshot.status_json)['status']['total_executions'] == 1
+    assert checker.calls == 2
+
+
+def test_dead_scheduler_is_rechecked(state_file):
+    checker = CountingChecker(state_file)
+    cache = StatusSnapshotCache(checker, ttl=60)
+    assert not cache.get().status.is_alive
+    cache.get(revalidate=True)
+    assert checker.calls == 2
+
+
+def test_routes_serve_the_snapshot(monitor, state_file, monkeypatch):
+    cache = StatusSnapshotCache(ExternalHealthChecker(state_file), ttl=60)
+    monkeypatch.setattr(scheduler_dashboard, 'snapshots', cache)
+    client = scheduler_dashboard.app.test_client()
+    snapshot = cache.get()
+
+    status = client.get('/api/status')
+    assert status.data == snapshot.status_json
+    assert status.headers['Cache-Control'].startswith('private, max-age=')
+    health = client.get('/api/health')
+    assert health.status_code == (200 if snapshot.is_healthy else 503)
+    assert b'Iron Condor' in client.get('/').data
+
+
+def test_health_is_503_without_state(state_file, monkeypatch):
+    monkeypatch.setattr(scheduler_dashboard, 'snapshots',
+                        StatusSnapshotCache(ExternalHealthChecker(state_file)))
+    response = scheduler_dashboard.app.test_client().get('/api/health')
+    assert response.status_code == 503
+    assert response.get_json() == {'status': 'error'}
+
+
+def test_broadcaster_publishes_changed_fields(monitor, state_file):
+    cache = StatusSnapshotCache(ExternalHealthChecker(state_file), ttl=60)
+    broadcaster = StatusBroadcaster(cache)
+    broadcaster._publish(cache.get(revalidate=True))
+    first = broadcaster.latest
+    assert first.version == 1
+    assert json.loads(first.full)['status']['total_executions'] == 0
+
+    broadcaster._publish(cache.get(revalidate=True))
+    assert broadcaster.latest is first
+
+    monitor.heartbeat()
+    broadcaster._publish(cache.get(revalidate=True))
+    event = broadcaster.latest
+    assert event.version == 2
+    delta = json.loads(event.delta)
+    assert delta['full'] is False
+    assert delta['status']['total_executions'] == 1
+    assert 'error_count' not in delta['status']
+
+
+def test_wait_for_wakes_on_publish(monitor, state_file):
+    cache = StatusSnapshotCache(ExternalHealthChecker(state_file), ttl=60)
+    broadcaster = StatusBroadcaster(cache)
+    broadcaster._publish(cache.get(revalidate=True))
+    assert broadcaster.wait_for(0, 0).version == 1
+    assert broadcaster.wait_for(1, 0.01) is None
+
+    def publish():
+        time.sleep(0.05)
+        monitor.heartbeat()
+        broadcaster._publish(cache.get(revalidate=True))
+    thread = threading.Thread(target=publish)
+    thread.start()
+    assert broadcaster.wait_for(1, 5).version == 2
+    thread.join()
+
+
+def read_event(chunks):
+    """Next SSE status event as (id, data), skipping keep-alives"""
+    for chunk in chunks:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if chunk.startswith('event: status'):
+            lines = dict(line.split(': ', 1) for line in chunk.strip().splitlines())
+            return int(lines['id']), json.loads(lines['data'])
+
+
+def test_stream_sends_full_status_then_deltas(monitor, state_file, monkeypatch):
+    cache = StatusSnapshotCache(ExternalHealthChecker(state_file), ttl=0.5)
+    monkeypatch.setattr(scheduler_dashboard, 'snapshots', cache)
+    monkeypatch.setattr(scheduler_dashboard, 'broadcaster', StatusBroadcaster(cache))
+    response = scheduler_dashboard.app.test_client().get('/api/status/stream', buffered=False)
+    try:
+        assert response.mimetype == 'text/event-stream'
+        chunks = iter(response.response)
+        assert next(chunks) in ('retry: 5000\n\n', b'retry: 5000\n\n')
+        version, data = read_event(chunks)
+        assert version == 1 and data['full'] is True
+
+        started = time.monotonic()
+        monitor.heartbeat()
+        # A liveness-only recheck may publish first; a client that misses it
+        # gets the full status again instead of a delta
+        while True:
+            version, data = read_event(chunks)
+            if data['status'].get('total_executions') == 1:
+                break
+        assert version >= 2
+        # Woken by the file write, not the periodic liveness recheck
+        assert time.monotonic() - started < StatusBroadcaster.LIVENESS_RECHECK_SECONDS / 2
+    finally:
+        response.close()
@@ -0,0 +1,179 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from scheduler_monitor import ExternalHealthChecker, HealthStatus, StateFileWatcher
+from scheduler_watchdog import SchedulerWatchdog
+
+
+class RecordingAlerts:
+    """AlertManager stand-in that keeps what would have been sent"""
+
+    def __init__(self):
+        self.alerts = []
+        self.resolved = []
+        self.sent = threading.Event()
+
+    def send_alert(self, subject, message, fingerprint=None):
+        self.alerts.append((subject, fingerprint))
+        self.sent.set()
+
+    def resolve(self, fingerprint):
+        self.resolved.append(fingerprint)
+
+    def get_metrics(self):
+        return {}
+
+    def close(self, timeout=10.0):
+        pass
+
+
+class CountingChecker(ExternalHealthChecker):
+    def __init__(self, state_file):
+        super().__init__(state_file)
+        self.calls = 0
+
+    def check(self):
+        self.calls += 1
+        return super().check()
+
+
+def status(**overrides):
+    now = datetime.now()
+    fields = dict(timestamp=now.isoformat(), is_alive=True, last_execution=now.isoformat(),
+                  error_count=0, last_error=None, uptime_seconds=1.0, active_jobs=1,
+                  total_executions=1)
+    fields.update(overrides)
+    return HealthStatus(**fields)
+
+
+def write_state(path, **overrides):
+    """Replace the state file the way SchedulerMonitor does (rename into place)"""
+    tmp = path.with_name('.' + path.name + '.tmp')
+    tmp.write_text(json.dumps(status(**overrides).to_dict()))
+    os.replace(tmp, path)
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return tmp_path / 'scheduler_state.json'
+
+
+def until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class ScriptedChecker:
+    """Returns the queued (is_healthy, status) results in order"""
+
+    def __init__(self, state_file, results):
+        self.state_file = state_file
+        self.results = list(results)
+
+    def check(self):
+        return self.results.pop(0)
+
+
+def test_polling_alerts_after_consecutive_failures_then_recovers(state_file):
+    bad = (False, status(is_alive=False))
+    checker = ScriptedChecker(state_file, [bad, bad, bad, (True, status())])
+    alerts = RecordingAlerts()
+    watchdog = SchedulerWatchdog(checker=checker, alert_manager=alerts)
+    watchdog._check_scheduler()
+    watchdog._check_scheduler()
+    assert alerts.alerts == []
+    watchdog._check_scheduler()
+    assert alerts.alerts == [("Scheduler Health Check Failed", f"{state_file}:failed")]
+    watchdog._check_scheduler()
+    assert alerts.alerts[-1] == ("Scheduler Recovery", f"{state_file}:recovered")
+    assert f"{state_file}:failed" in alerts.resolved
+    assert watchdog.consecutive_failures == 0
+
+
+def test_confirmed_failure_alerts_at_once(state_file):
+    checker = ScriptedChecker(state_file, [(False, status(is_alive=False))])
+    alerts = RecordingAlerts()
+    SchedulerWatchdog(checker=checker, alert_manager=alerts)._check_scheduler(confirmed=True)
+    assert [subject for subject, _ in alerts.alerts] == ["Scheduler Health Check Failed"]
+
+
+def test_next_deadline_follows_the_status(state_file):
+    watchdog = SchedulerWatchdog(check_interval=60, checker=ExternalHealthChecker(state_file),
+                                 alert_manager=RecordingAlerts())
+    due = datetime.now() + timedelta(seconds=10)
+    deadline = watchdog._next_deadline(True, status(progress_deadline=due.isoformat()))
+    assert 9 < deadline - time.monotonic() <= 10 + watchdog.DEADLINE_SLACK_SECONDS
+    assert 59 < watchdog._next_deadline(False, None) - time.monotonic() <= 60
+
+
+@pytest.fixture
+def event_driven(state_file):
+    alerts = RecordingAlerts()
+    checker = CountingChecker(state_file)
+    watchdog = SchedulerWatchdog(check_interval=60, event_driven=True, checker=checker,
+                                 alert_manager=alerts)
+    thread = threading.Thread(target=watchdog.run, daemon=True)
+    yield watchdog, checker, alerts, thread
+    watchdog.running = False
+    write_state(state_file)  # wake it so the loop sees running is False
+    thread.join(5)
+
+
+def test_event_driven_alerts_when_progress_deadline_passes(state_file, event_driven):
+    watchdog, checker, alerts, thread = event_driven
+    write_state(state_file, progress_deadline=(datetime.now() + timedelta(seconds=0.3)).isoformat())
+    thread.start()
+    # Woken at the deadline, not after check_interval, and alerted without repeat checks
+    assert alerts.sent.wait(3)
+    assert alerts.alerts == [("Scheduler Health Check Failed", f"{state_file}:failed")]
+    assert watchdog.consecutive_failures == 1
+
+
+def test_event_driven_checks_on_state_change(state_file, event_driven):
+    watchdog, checker, alerts, thread = event_driven
+    write_state(state_file)
+    thread.start()
+    assert until(lambda: checker.calls == 1)
+    write_state(state_file, error_count=11)
+    assert until(lambda: checker.calls == 2)
+    # A failure seen through a file change still needs consecutive failures
+    assert watchdog.consecutive_failures == 1
+    assert alerts.alerts == []
+
+
+def test_watcher_sees_complete_writes_only(state_file):
+    write_state(state_file)
+    watcher = StateFileWatcher(str(state_file))
+    try:
+        assert not watcher.wait(0.05)
+        (state_file.parent / 'unrelated.json').write_text('{}')
+        assert not watcher.wait(0.05)
+        write_state(state_file)
+        assert watcher.wait(2)
+    finally:
+        watcher.close()
+
+
+def test_watcher_wakes_when_the_process_exits(state_file):
+    child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(0.2)'])
+    watcher = StateFileWatcher(str(state_file))
+    try:
+        watcher.watch_process(child.pid)
+        started = time.monotonic()
+        watcher.wait(5)
+        assert watcher.process_exited
+        assert time.monotonic() - started < 2
+    finally:
+        watcher.close()
+        child.wait()
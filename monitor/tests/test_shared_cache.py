@@ -0,0 +1,123 @@
+import fcntl
+import multiprocessing
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from shared_cache import SharedBarCache, decode_bars, encode_bars
+
+
+def columns(n: int = 3, base: float = 100.0):
+    return {
+        't': np.arange(n, dtype=np.int64) * 60_000,
+        'open': np.full(n, base), 'high': np.full(n, base + 1), 'low': np.full(n, base - 1),
+        'close': np.full(n, base + 0.5), 'volume': np.arange(n, dtype=float),
+        'ints': np.array([1, 0, 31][:n], dtype=np.uint8),
+    }
+
+
+def assert_same(actual, expected):
+    assert actual.keys() == expected.keys()
+    for name in expected:
+        np.testing.assert_array_equal(actual[name], expected[name])
+
+
+def test_encode_decode_round_trip():
+    cols = columns()
+    decoded, written_at = decode_bars(encode_bars(cols, 123.5))
+    assert written_at == 123.5
+    assert_same(decoded, cols)
+
+
+def test_read_respects_ttl_and_ignores_bad_files(tmp_path):
+    cache = SharedBarCache(tmp_path)
+    cache.write('SPY', columns())
+    assert_same(cache.read('SPY', ttl=60), columns())
+    assert cache.read('SPY', ttl=0) is None
+    assert cache.read('QQQ', ttl=60) is None
+    cache._path('BAD').write_bytes(b'not a cache file at all, but long enough')
+    assert cache.read('BAD', ttl=60) is None
+
+
+def _fetch_once(directory, log, barrier, results):
+    cache = SharedBarCache(directory)
+    barrier.wait()
+
+    def fetch():
+        with open(log, 'a') as f:
+            f.write(f"{os.getpid()}\n")
+        time.sleep(0.3)
+        return columns(base=42.0)
+
+    results.put(float(cache.get_or_fetch('SPY/5/minute', 60, fetch)['close'][0]))
+
+
+def test_single_flight_across_processes(tmp_path):
+    ctx = multiprocessing.get_context('fork')
+    barrier, results = ctx.Barrier(6), ctx.Queue()
+    log = tmp_path / 'fetches.log'
+    workers = [ctx.Process(target=_fetch_once, args=(tmp_path / 'cache', log, barrier, results))
+               for _ in range(6)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+    assert [worker.exitcode for worker in workers] == [0] * 6
+    assert sorted(results.get(timeout=1) for _ in workers) == [42.5] * 6
+    assert len(log.read_text().splitlines()) == 1
+
+
+def test_prune_keeps_held_locks(tmp_path):
+    cache = SharedBarCache(tmp_path)
+    lock_path = cache._path('SPY').with_suffix('.lock')
+    with open(lock_path, 'a+') as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        os.utime(lock_path, (0, 0))
+        cache.prune()
+        assert lock_path.exists()
+    cache.prune()
+    assert not lock_path.exists()
+
+
+def test_prune_removes_expired_entries_only(tmp_path):
+    cache = SharedBarCache(tmp_path)
+    cache.write('old', columns())
+    cache.write('new', columns())
+    os.utime(cache._path('old'), (0, 0))
+    for key in ('old', 'new'):
+        cache._path(key).with_suffix('.lock').touch()
+    cache.prune()
+    assert not cache._path('old').exists()
+    assert not cache._path('old').with_suffix('.lock').exists()
+    assert cache._path('new').exists()
+    assert cache._path('new').with_suffix('.lock').exists()
+
+
+def test_waiter_relocks_after_lock_file_is_replaced(tmp_path):
+    """A worker that locks an unlinked lock file must not fetch next to the new lock's holder"""
+    cache = SharedBarCache(tmp_path)
+    lock_path = cache._path('SPY').with_suffix('.lock')
+    first = open(lock_path, 'a+')
+    fcntl.flock(first, fcntl.LOCK_EX)
+    fetched = threading.Event()
+
+    def fetch():
+        fetched.set()
+        return columns()
+
+    waiter = threading.Thread(target=cache.get_or_fetch, args=('SPY', 60, fetch))
+    waiter.start()
+    time.sleep(0.1)
+    # What prune() does once it holds the lock, then another worker's new lock file
+    lock_path.unlink()
+    second = open(lock_path, 'a+')
+    fcntl.flock(second, fcntl.LOCK_EX)
+    first.close()
+
+    assert not fetched.wait(0.3)
+    second.close()
+    waiter.join(5)
+    assert fetched.is_set()
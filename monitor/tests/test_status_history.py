@@ -0,0 +1,120 @@
+from datetime import datetime
+
+import pytest
+
+from scheduler_monitor import HealthStatus
+from status_history import StatusHistory
+
+T0 = 1_700_000_000 - 1_700_000_000 % 3600  # on an hour boundary
+
+
+def fill(history, count, every=30.0, start=T0):
+    """One sample every `every` seconds: one execution each, every third unhealthy"""
+    for n in range(count):
+        history.append(start + n * every, total_executions=n + 1, error_count=n // 10,
+                       healthy=n % 3 != 0, check_latency_ms=float(n % 5),
+                       heartbeat_age=float(n))
+
+
+def test_executions_are_deltas_and_survive_counter_resets():
+    history = StatusHistory(capacity=10)
+    for n, total in enumerate((5, 7, 7, 2, 4)):
+        history.append(T0 + n, total, 0, True, 1.0, 0.0)
+    series = history.query(T0, T0 + 5, step=1)['series']
+    assert series['executions'] == [0, 2, 0, 2, 2]
+    assert series['total_executions'] == [5, 7, 7, 2, 4]
+
+
+def test_ring_keeps_the_newest_samples():
+    history = StatusHistory(capacity=5)
+    fill(history, 8, every=1)
+    assert len(history) == 5
+    series = history.query(T0, T0 + 8, step=1)['series']
+    assert series['t'] == [T0 + n for n in range(3, 8)]
+
+
+def test_raw_buckets_aggregate_samples():
+    history = StatusHistory()
+    fill(history, 6, every=10)
+    series = history.query(T0, T0 + 60, step=30)['series']
+    assert series['t'] == [T0, T0 + 30]
+    assert series['samples'] == [3, 3]
+    assert series['executions'] == [2, 3]
+    assert series['healthy_ratio'] == [2 / 3, 2 / 3]
+    assert series['check_latency_ms_avg'] == pytest.approx([1.0, 7 / 3])
+    assert series['check_latency_ms_max'] == [2.0, 4.0]
+    assert series['heartbeat_age_max'] == [2.0, 5.0]
+
+
+def test_long_ranges_read_rollups():
+    history = StatusHistory()
+    fill(history, 240)  # two hours at 30s
+    hourly = history.query(T0, T0 + 7200, step=3600)['series']
+    assert hourly['t'] == [T0, T0 + 3600]
+    assert hourly['samples'] == [120, 120]
+    assert hourly['executions'] == [119, 120]
+    assert hourly['total_executions'] == [120, 240]
+    assert hourly['error_count'] == [11, 23]
+    assert hourly['heartbeat_age_max'] == [119.0, 239.0]
+    # The same answer as aggregating the raw samples
+    raw = history.query(T0, T0 + 7200, step=1800)['series']
+    assert sum(raw['samples']) == sum(hourly['samples'])
+    assert sum(raw['executions']) == sum(hourly['executions'])
+
+
+def test_rollup_query_keeps_the_bucket_holding_start():
+    history = StatusHistory()
+    fill(history, 20)  # ten minutes, two 5-minute rollups
+    series = history.query(T0 + 150, T0 + 600, step=300)['series']
+    assert series['t'][0] == T0 + 150
+    assert sum(series['samples']) == 20
+
+
+def test_record_computes_heartbeat_age():
+    history = StatusHistory()
+    status = HealthStatus(timestamp='', is_alive=True,
+                          last_execution=datetime.fromtimestamp(T0 - 45).isoformat(),
+                          error_count=1, last_error=None, uptime_seconds=0, active_jobs=1,
+                          total_executions=3)
+    history.record(status, True, 2.5, now=T0)
+    series = history.query(T0, T0 + 1, step=1)['series']
+    assert series['heartbeat_age_max'] == [45.0]
+    assert series['error_count'] == [1]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / 'history.bin'
+    history = StatusHistory(capacity=50)
+    fill(history, 80)
+    history.save(str(path))
+
+    loaded = StatusHistory.load(str(path), capacity=50)
+    assert len(loaded) == 50
+    for step in (60, 3600):
+        assert loaded.query(T0, T0 + 7200, step) == history.query(T0, T0 + 7200, step)
+    # Continues the execution deltas where the saved history stopped
+    loaded.append(T0 + 80 * 30, 82, 0, True, 1.0, 0.0)
+    assert loaded.query(T0 + 80 * 30, T0 + 81 * 30, step=30)['series']['executions'] == [2]
+
+
+def test_load_discards_rings_whose_size_changed(tmp_path):
+    path = tmp_path / 'history.bin'
+    history = StatusHistory(capacity=50)
+    fill(history, 20)
+    history.save(str(path))
+    loaded = StatusHistory.load(str(path), capacity=100)
+    assert len(loaded) == 0
+    assert loaded.rollups[300].count == history.rollups[300].count
+
+
+def test_truncated_or_missing_file(tmp_path):
+    path = tmp_path / 'history.bin'
+    history = StatusHistory(capacity=50)
+    fill(history, 20)
+    history.save(str(path))
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])
+    with pytest.raises(ValueError):
+        StatusHistory.load(str(path), capacity=50)
+    with pytest.raises(OSError):
+        StatusHistory.load(str(tmp_path / 'missing.bin'))
@@ -0,0 +1,123 @@
+import json
+import socket
+
+import pytest
+
+import status_socket
+from scheduler_monitor import SchedulerMonitor, liveness_path
+from status_socket import MAX_LINE, StatusClient, StatusSocketServer, query
+
+
+class Provider:
+    def __init__(self, healthy=True, reason='All systems operational'):
+        self.healthy = healthy
+        self.reason = reason
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.healthy, self.reason, {'errors': self.calls}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'status.sock')
+
+
+@pytest.fixture
+def serve(path):
+    servers = []
+
+    def start(provider, **kwargs):
+        server = StatusSocketServer(provider, path, **kwargs).start()
+        servers.append(server)
+        return server
+    yield start
+    for server in servers:
+        server.close()
+
+
+def test_commands_on_one_connection(serve, path):
+    serve(Provider())
+    client = StatusClient(path)
+    try:
+        assert client.query('PING') == 'PONG'
+        assert client.query('health') == 'OK All systems operational'
+        assert json.loads(client.query('STATUS')) == {'is_healthy': True, 'status': {'errors': 1}}
+        assert client.query('BOGUS') == 'ERR unknown command'
+    finally:
+        client.close()
+
+
+def test_pipelined_lines_and_quit(serve, path):
+    serve(Provider(healthy=False, reason='Scheduler not responding'))
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(2)
+        sock.connect(path)
+        sock.sendall(b'PING\nHEALTH\nQUIT\nPING\n')
+        replies = sock.makefile('rb').read()
+    assert replies == b'PONG\nFAIL Scheduler not responding\n'
+
+
+def test_replies_are_reused_for_ttl(serve, path):
+    provider = Provider()
+    server = serve(provider, ttl=60)
+    for _ in range(5):
+        query('HEALTH', path)
+        query('STATUS', path)
+    assert provider.calls == 1
+    assert server.requests == 10
+
+
+def test_provider_error_is_reported(serve, path):
+    def provider():
+        raise RuntimeError('state unreadable')
+    serve(provider)
+    assert query('HEALTH', path) == 'ERR state unreadable'
+
+
+def test_overlong_line_closes_connection(serve, path):
+    serve(Provider())
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(2)
+        sock.connect(path)
+        sock.sendall(b'x' * (MAX_LINE + 1))
+        assert sock.recv(16) == b''
+
+
+def test_stale_socket_is_replaced_but_live_one_is_not(serve, path):
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()  # leaves the file with nobody listening
+    server = serve(Provider())
+    assert query('PING', path) == 'PONG'
+    with pytest.raises(OSError, match='already being served'):
+        StatusSocketServer(Provider(), path).start()
+    server.close()
+    with pytest.raises(OSError):
+        query('PING', path)
+
+
+def test_client_exit_codes(serve, path, capsys):
+    provider = Provider()
+    serve(provider, ttl=0)
+    assert status_socket.main(['-s', path, 'health']) == 0
+    provider.healthy = False
+    assert status_socket.main(['-s', path]) == 1
+    assert status_socket.main(['-s', path, 'bogus']) == 1
+    assert status_socket.main(['-s', path + '.missing', 'ping']) == 2
+    assert capsys.readouterr().out.splitlines()[-1].startswith('UNREACHABLE')
+
+
+def test_monitor_reports_liveness_from_its_ticks(tmp_path, path):
+    state_file = tmp_path / 'scheduler_state.json'
+    monitor = SchedulerMonitor(str(state_file))
+    server = monitor.serve_status_socket(path)
+    server.ttl = 0
+    try:
+        assert json.loads(query('STATUS', path))['status']['is_alive'] is False
+        monitor.tick()
+        assert json.loads(query('STATUS', path))['status']['is_alive'] is True
+    finally:
+        server.close()
+        liveness_path(state_file).unlink(missing_ok=True)
@@ -2,7 +2,7 @@ import { Component, OnInit, OnDestroy, AfterViewInit, ViewChild, ElementRef } fr
 import { CommonModule } from '@angular/common';
 import { ApiService } from '../../services/api.service';
 import { MultiSymbolMarketDataResponse } from '../../models/models';
-import { Subscription, interval } from 'rxjs';
+import { Subscription, timer } from 'rxjs';
 import { Chart, registerables } from 'chart.js';
 import { CandlestickController, CandlestickElement } from 'chartjs-chart-financial';
 import 'chartjs-adapter-luxon';
@@ -54,8 +54,16 @@ export class MarketChartsComponent implements OnInit, OnDestroy, AfterViewInit {
 
   ngOnInit(): void {
     this.loadMarketData();
-    // Refresh every 5 minutes
-    this.refreshSubscription = interval(300000).subscribe(() => {
+  }
+
+  // Next refresh follows the API's hint: just after the next bar closes while
+  // the market is open, at the reopen (re-checked hourly) while it is closed
+  private scheduleRefresh(refreshAfterSeconds?: number): void {
+    this.refreshSubscription?.unsubscribe();
+    const delayMs = refreshAfterSeconds !== undefined
+      ? Math.min(Math.max(refreshAfterSeconds * 1000, 10000), 3600000)
+      : 300000;
+    this.refreshSubscription = timer(delayMs).subscribe(() => {
       this.loadMarketData();
     });
   }
@@ -82,12 +90,14 @@ export class MarketChartsComponent implements OnInit, OnDestroy, AfterViewInit {
         this.loading = false;
         this.error = null;
         this.currentTime = new Date();
+        this.scheduleRefresh(data.freshness?.refreshAfter);
         // Update charts after data is loaded
         setTimeout(() => this.updateCharts(), 100);
       },
       error: (err) => {
         this.error = 'Failed to load market data. Make sure the market data API is running on port 5002.';
         this.loading = false;
+        this.scheduleRefresh();
         console.error('Error loading market data:', err);
       }
     });
@@ -1,8 +1,16 @@
-import { Component, OnInit, OnDestroy } from '@angular/core';
+import { Component, OnInit, OnDestroy, ViewChild, ElementRef } from '@angular/core';
 import { CommonModule } from '@angular/common';
 import { ApiService } from '../../services/api.service';
-import { SchedulerStatusResponse } from '../../models/models';
-import { interval, Subscription } from 'rxjs';
+import {
+  SchedulerHealthStatus,
+  SchedulerStatusResponse,
+  SchedulerStatusHistoryResponse
+} from '../../models/models';
+import { timer, Subscription } from 'rxjs';
+import { Chart, registerables } from 'chart.js';
+import 'chartjs-adapter-luxon';
+
+Chart.register(...registerables);
 
 @Component({
   selector: 'app-scheduler-monitor',
@@ -12,25 +20,159 @@ import { interval, Subscription } from 'rxjs';
   styleUrls: ['./scheduler-monitor.component.css']
 })
 export class SchedulerMonitorComponent implements OnInit, OnDestroy {
+  @ViewChild('historyChart') historyChartRef?: ElementRef<HTMLCanvasElement>;
+
   schedulerStatus: SchedulerStatusResponse | null = null;
   loading = true;
   error: string | null = null;
+
+  historyRanges = [
+    { value: 86400, label: '24 Hours' },
+    { value: 7 * 86400, label: '7 Days' },
+    { value: 28 * 86400, label: '4 Weeks' }
+  ];
+  selectedHistoryRange = 86400;
+  history: SchedulerStatusHistoryResponse | null = null;
+  historyError: string | null = null;
+
+  liveUpdates = false;
+
+  private historyChart?: Chart;
   private refreshSubscription?: Subscription;
+  private streamSubscription?: Subscription;
 
   constructor(private apiService: ApiService) {}
 
   ngOnInit(): void {
     this.loadSchedulerStatus();
-    // Refresh every 30 seconds
-    this.refreshSubscription = interval(30000).subscribe(() => {
-      this.loadSchedulerStatus();
-    });
+    this.loadHistory();
+    this.subscribeToStatusStream();
   }
 
   ngOnDestroy(): void {
+    this.streamSubscription?.unsubscribe();
     if (this.refreshSubscription) {
       this.refreshSubscription.unsubscribe();
     }
+    this.historyChart?.destroy();
+  }
+
+  private subscribeToStatusStream(): void {
+    this.liveUpdates = true;
+    this.streamSubscription = this.apiService.streamSchedulerStatus().subscribe({
+      next: (event) => {
+        const status = event.full || !this.schedulerStatus
+          ? event.status
+          : { ...this.schedulerStatus.status, ...event.status };
+        this.schedulerStatus = { is_healthy: event.is_healthy, status: status as SchedulerHealthStatus };
+        this.loading = false;
+        this.error = null;
+      },
+      error: (err) => {
+        console.error('Scheduler status stream unavailable, falling back to polling:', err);
+        this.startPolling();
+      }
+    });
+  }
+
+  private startPolling(): void {
+    this.liveUpdates = false;
+    if (this.refreshSubscription) return;
+    this.schedulePoll();
+  }
+
+  // Poll again when the dashboard says the status can next change
+  // (between 5 and 60 seconds), or every 30 seconds without a hint
+  private schedulePoll(nextChange?: string | null): void {
+    this.refreshSubscription?.unsubscribe();
+    let delayMs = 30000;
+    if (nextChange) {
+      delayMs = Math.min(Math.max(new Date(nextChange).getTime() - Date.now(), 5000), 60000);
+    }
+    this.refreshSubscription = timer(delayMs).subscribe(() => {
+      this.loadSchedulerStatus();
+    });
+  }
+
+  changeHistoryRange(seconds: number): void {
+    this.selectedHistoryRange = seconds;
+    this.loadHistory();
+  }
+
+  loadHistory(): void {
+    const to = Math.floor(Date.now() / 1000);
+    this.apiService.getSchedulerStatusHistory(to - this.selectedHistoryRange, to).subscribe({
+      next: (data) => {
+        this.history = data;
+        this.historyError = null;
+        // Canvas is rendered once status has loaded
+        setTimeout(() => this.updateHistoryChart(), 100);
+      },
+      error: (err) => {
+        this.historyError = 'Failed to load scheduler history.';
+        console.error('Error loading scheduler history:', err);
+      }
+    });
+  }
+
+  private updateHistoryChart(): void {
+    const canvas = this.historyChartRef?.nativeElement;
+    if (!this.history || !canvas) return;
+
+    const ctx = canvas.getContext('2d');
+    if (!ctx) return;
+
+    this.historyChart?.destroy();
+
+    const series = this.history.series;
+    const points = (values: number[]) => series.t.map((t, i) => ({ x: t * 1000, y: values[i] }));
+
+    this.historyChart = new Chart(ctx, {
+      type: 'line',
+      data: {
+        datasets: [
+          {
+            label: 'Executions',
+            data: points(series.executions),
+            borderColor: '#1a237e',
+            backgroundColor: 'rgba(26, 35, 126, 0.1)',
+            fill: true,
+            pointRadius: 0,
+            yAxisID: 'y'
+          },
+          {
+            label: 'Error Count',
+            data: points(series.error_count),
+            borderColor: '#dc3545',
+            pointRadius: 0,
+            yAxisID: 'y'
+          },
+          {
+            label: 'Healthy %',
+            data: points(series.healthy_ratio.map(r => r * 100)),
+            borderColor: '#28a745',
+            pointRadius: 0,
+            yAxisID: 'pct'
+          }
+        ]
+      },
+      options: {
+        responsive: true,
+        maintainAspectRatio: false,
+        interaction: { mode: 'index', intersect: false },
+        scales: {
+          x: {
+            type: 'time',
+            time: {
+              unit: this.selectedHistoryRange <= 86400 ? 'hour' : 'day',
+              displayFormats: { hour: 'HH:mm', day: 'MMM dd' }
+            }
+          },
+          y: { beginAtZero: true, position: 'left' },
+          pct: { min: 0, max: 100, position: 'right', grid: { drawOnChartArea: false } }
+        }
+      }
+    });
   }
 
   loadSchedulerStatus(): void {
@@ -39,11 +181,13 @@ export class SchedulerMonitorComponent implements OnInit, OnDestroy {
         this.schedulerStatus = data;
         this.loading = false;
         this.error = null;
+        if (!this.liveUpdates) this.schedulePoll(data.freshness?.nextChange);
       },
       error: (err) => {
         this.error = 'Failed to load scheduler status. Make sure the scheduler dashboard is running on port 5001.';
         this.loading = false;
         console.error('Error loading scheduler status:', err);
+        if (!this.liveUpdates) this.schedulePoll();
       }
     });
   }
@@ -3,7 +3,7 @@ import { CommonModule } from '@angular/common';
 import { FormsModule } from '@angular/forms';
 import { ApiService } from '../../services/api.service';
 import { MarketDataResponse, SignalIndicatorsResponse } from '../../models/models';
-import { Subscription, interval, forkJoin } from 'rxjs';
+import { Subscription, timer, forkJoin } from 'rxjs';
 import { Chart, registerables } from 'chart.js';
 import { CandlestickController, CandlestickElement } from 'chartjs-chart-financial';
 import zoomPlugin from 'chartjs-plugin-zoom';
@@ -75,9 +75,84 @@ export class SymbolPriceTrackerComponent implements OnInit, OnDestroy, AfterView
 
   ngOnInit(): void {
     this.loadAvailableSymbols();
-    // Refresh every 10 seconds for near real-time updates
-    this.refreshSubscription = interval(10000).subscribe(() => {
+    this.scheduleRefresh();
+  }
+
+  // Refresh the latest price every 10 seconds while the market trades; the
+  // full series is only re-fetched once the snapshot shows the last bar has
+  // closed. While closed, wait for the reopen the API reports (re-checked hourly).
+  private scheduleRefresh(refreshAfterSeconds?: number): void {
+    this.refreshSubscription?.unsubscribe();
+    const delayMs = refreshAfterSeconds !== undefined
+      ? Math.min(Math.max(refreshAfterSeconds * 1000, 10000), 3600000)
+      : 10000;
+    this.refreshSubscription = timer(delayMs).subscribe(() => {
+      this.refreshLatestPrice();
+    });
+  }
+
+  private barIntervalMs(): number {
+    switch (this.selectedTimeFrame) {
+      case '5d': return 15 * 60 * 1000;
+      case '30d': return 60 * 60 * 1000;
+      default: return 5 * 60 * 1000;
+    }
+  }
+
+  // "YYYY-MM-DD HH:MM:SS" in exchange time; sorts and slices like an ISO string
+  private exchangeTime(ms: number): string {
+    return new Date(ms).toLocaleString('sv-SE', { timeZone: 'America/New_York', hour12: false });
+  }
+
+  // True if the API would still return the displayed series for a trade at
+  // `updatedMs`: the 1-day view keeps the previous session until the 9:30 ET
+  // open, so pre-market trades belong to a range that isn't shown yet
+  private inDisplayedRange(updatedMs: number, lastBarStart: number): boolean {
+    if (this.selectedTimeFrame !== '1d') return true;
+    const updated = this.exchangeTime(updatedMs);
+    const lastBarDay = this.exchangeTime(lastBarStart).slice(0, 10);
+    return updated.slice(0, 10) <= lastBarDay || updated.slice(11, 16) >= '09:30';
+  }
+
+  refreshLatestPrice(): void {
+    if (!this.selectedSymbol || !this.symbolData || !this.symbolData.bars.length) {
       this.loadSymbolData(true);  // Silent refresh - no loading spinner
+      this.scheduleRefresh();
+      return;
+    }
+
+    const symbol = this.selectedSymbol;
+    this.apiService.getMarketSnapshot([symbol]).subscribe({
+      next: (data) => {
+        this.scheduleRefresh(data.freshness?.refreshAfter);
+        const snapshot = data.snapshots[symbol];
+        if (symbol !== this.selectedSymbol || !this.symbolData || !this.symbolData.bars.length) return;
+        if (!snapshot || snapshot.last === null) return;
+
+        const bars = this.symbolData.bars;
+        const lastBar = bars[bars.length - 1];
+        const lastBarStart = new Date(lastBar.timestamp).getTime();
+        if (snapshot.updated !== null && !this.inDisplayedRange(snapshot.updated, lastBarStart)) {
+          // Pre-market: neither a reload nor the last bar would show this trade
+          return;
+        }
+        if (snapshot.updated !== null && snapshot.updated >= lastBarStart + this.barIntervalMs()) {
+          // A new bar has started since the series was loaded
+          this.loadSymbolData(true);
+          return;
+        }
+
+        // Fold the latest trade into the forming bar
+        lastBar.close = snapshot.last;
+        lastBar.high = Math.max(lastBar.high, snapshot.last);
+        lastBar.low = Math.min(lastBar.low, snapshot.last);
+        this.currentTime = new Date();
+        this.updateChart();
+      },
+      error: (err) => {
+        console.error('Error loading snapshot:', err);
+        this.scheduleRefresh();
+      }
     });
   }
 
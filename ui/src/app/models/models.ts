@@ -112,11 +112,50 @@ export interface SchedulerHealthStatus {
   uptime_seconds: number;
   active_jobs: number;
   total_executions: number;
+  scheduling?: SchedulerSchedulingStats | null;
+  last_liveness?: string | null;
+  progress_deadline?: string | null;
+  stack_dump_signal?: number | null;
+}
+
+export interface SchedulerSchedulingStats {
+  misfires: number;
+  skipped_runs: number;
+  last_queue_wait_seconds: number | null;
+  max_queue_wait_seconds: number;
+  last_start_delay_seconds: number | null;
+  max_start_delay_seconds: number;
 }
 
 export interface SchedulerStatusResponse {
   is_healthy: boolean;
   status: SchedulerHealthStatus;
+  freshness?: { nextChange: string | null };
+}
+
+export interface SchedulerStatusEvent {
+  full: boolean;
+  is_healthy: boolean;
+  status: Partial<SchedulerHealthStatus>;
+}
+
+export interface SchedulerHistorySeries {
+  t: number[];
+  samples: number[];
+  total_executions: number[];
+  executions: number[];
+  error_count: number[];
+  healthy_ratio: number[];
+  check_latency_ms_avg: number[];
+  check_latency_ms_max: number[];
+  heartbeat_age_max: number[];
+}
+
+export interface SchedulerStatusHistoryResponse {
+  from: number;
+  to: number;
+  step: number;
+  series: SchedulerHistorySeries;
 }
 
 export interface MarketDataBar {
@@ -132,10 +171,41 @@ export interface MarketDataResponse {
   symbol: string;
   timeFrame: string;
   bars: MarketDataBar[];
+  // Present when requested with indicators=, e.g. 'sma20', 'rsi14', 'bb20_upper'; aligned with bars
+  indicators?: { [name: string]: (number | null)[] };
+  // Set (with empty bars) when this symbol failed after the response had started streaming
+  error?: string;
+}
+
+// Session-calendar refresh hint returned by the market data API
+export interface MarketFreshness {
+  phase: 'regular' | 'pre' | 'post' | 'closed';
+  nextBarClose: string | null;       // ISO, while in session
+  marketClosedUntil: string | null;  // ISO, while closed
+  refreshAfter: number;              // seconds
 }
 
 export interface MultiSymbolMarketDataResponse {
   data: { [symbol: string]: MarketDataResponse };
+  freshness?: MarketFreshness;
+}
+
+export interface MarketSnapshot {
+  last: number | null;
+  open: number | null;
+  high: number | null;
+  low: number | null;
+  volume: number;
+  prevClose: number | null;
+  change: number | null;
+  changePercent: number | null;
+  updated: number | null;  // epoch ms
+}
+
+export interface MarketSnapshotResponse {
+  asOf: number;  // epoch ms
+  snapshots: { [symbol: string]: MarketSnapshot | null };
+  freshness?: MarketFreshness;
 }
 
 export interface SignalIndicator {
@@ -1,4 +1,4 @@
-import { Injectable } from '@angular/core';
+import { Injectable, NgZone } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
 import { Observable } from 'rxjs';
 import {
@@ -9,7 +9,10 @@ import {
   AlpacaPosition,
   AlpacaOrderInfo,
   SchedulerStatusResponse,
+  SchedulerStatusHistoryResponse,
+  SchedulerStatusEvent,
   MultiSymbolMarketDataResponse,
+  MarketSnapshotResponse,
   SignalIndicatorsResponse
 } from '../models/models';
 
@@ -19,7 +22,7 @@ import {
 export class ApiService {
   private baseUrl = 'http://localhost:5000/api';
 
-  constructor(private http: HttpClient) { }
+  constructor(private http: HttpClient, private zone: NgZone) { }
 
   // Dashboard endpoints
   getDashboardMetrics(): Observable<DashboardMetrics> {
@@ -70,6 +73,31 @@ export class ApiService {
     return this.http.get<SchedulerStatusResponse>('http://localhost:5001/api/status');
   }
 
+  streamSchedulerStatus(): Observable<SchedulerStatusEvent> {
+    // Server-sent events: a full status on connect, then only the fields that changed
+    return new Observable<SchedulerStatusEvent>(subscriber => {
+      const source = new EventSource('http://localhost:5001/api/status/stream');
+      source.addEventListener('status', (e: MessageEvent) => {
+        this.zone.run(() => subscriber.next(JSON.parse(e.data)));
+      });
+      source.onerror = () => {
+        // EventSource reconnects by itself unless the server refused the stream
+        if (source.readyState === EventSource.CLOSED) {
+          this.zone.run(() => subscriber.error(new Error('Scheduler status stream closed')));
+        }
+      };
+      return () => source.close();
+    });
+  }
+
+  getSchedulerStatusHistory(from: number, to: number, step?: number): Observable<SchedulerStatusHistoryResponse> {
+    // from/to are epoch seconds; the dashboard picks a step giving ~500 points if omitted
+    const stepParam = step ? `&step=${step}` : '';
+    return this.http.get<SchedulerStatusHistoryResponse>(
+      `http://localhost:5001/api/status/history?from=${from}&to=${to}${stepParam}`
+    );
+  }
+
   getSchedulerHealth(): Observable<{ status: string }> {
     return this.http.get<{ status: string }>('http://localhost:5001/api/health');
   }
@@ -79,9 +107,17 @@ export class ApiService {
     return this.http.get<MultiSymbolMarketDataResponse>(`http://localhost:5002/api/market/indices?timeFrame=${timeFrame}`);
   }
 
-  getMarketSymbols(symbols: string[], timeFrame: string = '1d'): Observable<MultiSymbolMarketDataResponse> {
+  getMarketSymbols(symbols: string[], timeFrame: string = '1d', indicators: string[] = []): Observable<MultiSymbolMarketDataResponse> {
+    const symbolsParam = symbols.join(',');
+    // e.g. ['sma:20', 'vwap', 'rsi:14', 'bb:20:2']
+    const indicatorsParam = indicators.length ? `&indicators=${indicators.join(',')}` : '';
+    return this.http.get<MultiSymbolMarketDataResponse>(`http://localhost:5002/api/market/symbols?symbols=${symbolsParam}&timeFrame=${timeFrame}${indicatorsParam}`);
+  }
+
+  // Latest price and day OHLC only; cheap enough for frequent polling
+  getMarketSnapshot(symbols: string[]): Observable<MarketSnapshotResponse> {
     const symbolsParam = symbols.join(',');
-    return this.http.get<MultiSymbolMarketDataResponse>(`http://localhost:5002/api/market/symbols?symbols=${symbolsParam}&timeFrame=${timeFrame}`);
+    return this.http.get<MarketSnapshotResponse>(`http://localhost:5002/api/market/snapshot?symbols=${symbolsParam}`);
   }
 
   getAvailableSymbols(): Observable<{ symbols: string[] }> {